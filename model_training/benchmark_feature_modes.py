@@ -0,0 +1,87 @@
+import json
+import pickle
+import time
+import tracemalloc
+
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from personify_training.paths import BENCHMARK_DIR, MBTI_CSV
+from train_mbti_optimized_model import build_tfidf_vectorizer, load_and_preprocess_data
+
+# Configuration
+MAX_SAMPLES_PER_CLASS = 2500
+FEATURE_MODES = [('vocab', 10000), ('hashing', 10000), ('vocab', 20000), ('hashing', 20000)]
+HASHING_N_JOBS = -1
+RESULTS_PATH = BENCHMARK_DIR / 'feature_modes.json'
+
+
+def fit_features(texts, feature_mode, max_features, n_jobs=HASHING_N_JOBS):
+    vectorizer = build_tfidf_vectorizer(max_features, feature_mode)
+    if feature_mode == 'hashing':
+        return vectorizer, vectorizer.fit_transform(texts, n_jobs=n_jobs)
+    return vectorizer, vectorizer.fit_transform(texts)
+
+
+def benchmark_mode(texts, y, feature_mode, max_features):
+    """Fit time, peak traced memory, artifact size and linear-probe accuracy for one mode"""
+    start = time.perf_counter()
+    vectorizer, features = fit_features(texts, feature_mode, max_features)
+    fit_seconds = time.perf_counter() - start
+
+    # Second fit under tracemalloc so tracing overhead does not skew the timing,
+    # in-process so worker allocations are counted too
+    tracemalloc.start()
+    fit_features(texts, feature_mode, max_features, n_jobs=1)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Same fixed split for every mode, scored with a fast sparse linear model
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, y, test_size=0.2, random_state=42, stratify=y
+    )
+    classifier = SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=20, tol=None, random_state=42)
+    classifier.fit(X_train, y_train)
+    accuracy = float(classifier.score(X_test, y_test))
+
+    return {
+        'feature_mode': feature_mode,
+        'max_features': max_features,
+        'fit_seconds': fit_seconds,
+        'fit_peak_traced_mb': peak_bytes / (1024 * 1024),
+        'vectorizer_pickle_kb': len(pickle.dumps(vectorizer, protocol=pickle.HIGHEST_PROTOCOL)) / 1024,
+        'nnz': int(features.nnz),
+        'linear_probe_accuracy': accuracy,
+    }
+
+
+def main():
+    print("=== TF-IDF Feature Mode Benchmark (vocabulary vs hashing) ===")
+    texts, labels = load_and_preprocess_data(
+        str(MBTI_CSV), max_samples_per_class=MAX_SAMPLES_PER_CLASS
+    )
+    y = LabelEncoder().fit_transform(labels)
+    print(f"Documents: {len(texts)}")
+
+    results = []
+    for feature_mode, max_features in FEATURE_MODES:
+        print(f"\nBenchmarking {feature_mode} mode with {max_features} features...")
+        result = benchmark_mode(texts, y, feature_mode, max_features)
+        results.append(result)
+        print(f"  Fit: {result['fit_seconds']:.2f}s, peak {result['fit_peak_traced_mb']:.0f} MB, "
+              f"artifact {result['vectorizer_pickle_kb']:.0f} KB, accuracy {result['linear_probe_accuracy']:.4f}")
+
+    print(f"\n{'Mode':<8} {'Features':>9} {'Fit (s)':>8} {'Peak (MB)':>10} {'Artifact (KB)':>14} {'Accuracy':>9}")
+    for r in results:
+        print(f"{r['feature_mode']:<8} {r['max_features']:>9} {r['fit_seconds']:>8.2f} "
+              f"{r['fit_peak_traced_mb']:>10.0f} {r['vectorizer_pickle_kb']:>14.0f} {r['linear_probe_accuracy']:>9.4f}")
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'documents': len(texts), 'results': results, 'created_timestamp': time.time()}, f, indent=2)
+    print(f"\n✓ Results saved: {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+import multiprocessing as mp
+import resource
+import sys
+import time
+
+from personify_training.paths import BENCHMARK_DIR, MBTI_CSV
+
+# Configuration
+MAX_FEATURES = 10000
+MAX_SAMPLES_PER_CLASS = 2500
+BATCH_SIZE = 128
+EPOCHS = 2
+RESULTS_PATH = BENCHMARK_DIR / 'sparse_vs_dense_training.json'
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_mode(mode, queue):
+    """Train the optimized MBTI model for a few epochs in dense or sparse mode"""
+    import numpy as np
+    import tensorflow as tf
+    from sklearn.preprocessing import LabelEncoder
+    import train_mbti_optimized_model as optimized
+    from personify_training.sparse_batches import CSRBatchSequence
+
+    texts, labels = optimized.load_and_preprocess_data(
+        str(MBTI_CSV), max_samples_per_class=MAX_SAMPLES_PER_CLASS
+    )
+    X, _ = optimized.create_advanced_tfidf_features(texts, max_features=MAX_FEATURES)
+    y = LabelEncoder().fit_transform(labels)
+    rss_after_features = peak_rss_mb()
+
+    epoch_times = []
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_times.append(time.perf_counter() - self.start)
+
+    model = optimized.create_optimized_model(X.shape[1], len(np.unique(y)))
+    if mode == 'dense':
+        X_dense = X.toarray()
+        model.fit(X_dense, y, batch_size=BATCH_SIZE, epochs=EPOCHS, callbacks=[EpochTimer()], verbose=0)
+    else:
+        batches = CSRBatchSequence(X, y, batch_size=BATCH_SIZE, shuffle=True)
+        model.fit(batches, epochs=EPOCHS, callbacks=[EpochTimer()], verbose=0)
+
+    queue.put({
+        'mode': mode,
+        'samples': int(X.shape[0]),
+        'features': int(X.shape[1]),
+        'nnz': int(X.nnz),
+        'peak_rss_after_features_mb': rss_after_features,
+        'peak_rss_mb': peak_rss_mb(),
+        'epoch_times_seconds': epoch_times,
+        'mean_epoch_seconds': float(np.mean(epoch_times)),
+    })
+
+
+def main():
+    print("=== Sparse vs Dense TF-IDF Training Benchmark ===")
+    print(f"  • Max Features: {MAX_FEATURES}")
+    print(f"  • Batch Size: {BATCH_SIZE}")
+    print(f"  • Epochs: {EPOCHS}")
+
+    # Each mode runs in a fresh process so peak RSS is not shared between them
+    ctx = mp.get_context('spawn')
+    results = []
+    for mode in ['sparse', 'dense']:
+        print(f"\nRunning {mode} mode...")
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_mode, args=(mode, queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"{mode} benchmark exited with code {process.exitcode}")
+        results.append(queue.get())
+
+    print(f"\n{'Mode':<8} {'Peak RSS (MB)':>14} {'Epoch (s)':>10}")
+    for result in results:
+        print(f"{result['mode']:<8} {result['peak_rss_mb']:>14.0f} {result['mean_epoch_seconds']:>10.2f}")
+
+    RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump({'config': {'max_features': MAX_FEATURES, 'batch_size': BATCH_SIZE, 'epochs': EPOCHS},
+                   'results': results, 'created_timestamp': time.time()}, f, indent=2)
+    print(f"\n✓ Results saved: {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
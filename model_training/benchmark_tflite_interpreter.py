@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from personify_training.model_variants import VARIANTS
+from personify_training.paths import ASSETS_DIR, BENCHMARK_DIR
+from personify_training.tflite_export import quantize_input
+
+RESULTS_PATH = BENCHMARK_DIR / 'tflite_interpreter.json'
+BATCH_SIZES = (1, 8, 32)
+NUM_THREADS = (1, 2, 4)
+STEADY_RUNS = 100
+WARMUP_RUNS = 10
+COLD_STARTS = 3
+
+# XNNPACK is applied by default; the resolver without default delegates turns it off
+RESOLVERS = {
+    True: tf.lite.experimental.OpResolverType.AUTO,
+    False: tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES,
+}
+
+
+def params_for_model(tflite_file):
+    """Params JSON of the variant a .tflite file belongs to, including quantized siblings"""
+    stem = Path(tflite_file).stem
+    for variant in VARIANTS.values():
+        base = Path(variant['tflite']).stem
+        if stem == base or stem.startswith(base + '_'):
+            params_path = os.path.join(ASSETS_DIR, variant['params'])
+            if os.path.exists(params_path):
+                with open(params_path, 'r') as f:
+                    return json.load(f)
+    return None
+
+
+def input_dim_for_model(tflite_file):
+    params = params_for_model(tflite_file)
+    if params is None:
+        return None
+    if 'input_dim' in params:
+        return int(params['input_dim'])
+    return len(params.get('feature_columns', [])) or None
+
+
+def synthetic_batch(input_dim, batch_size, seed=42):
+    return np.random.default_rng(seed).standard_normal((batch_size, input_dim)).astype(np.float32)
+
+
+def cold_start(model_path, batch_size, input_dim, num_threads, xnnpack):
+    """One fresh interpreter: load, allocate and first-invoke times in milliseconds"""
+    start = time.perf_counter()
+    interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads,
+                                      experimental_op_resolver_type=RESOLVERS[xnnpack])
+    load_ms = (time.perf_counter() - start) * 1000
+
+    input_detail = interpreter.get_input_details()[0]
+    interpreter.resize_tensor_input(input_detail['index'], (batch_size, input_dim))
+    start = time.perf_counter()
+    interpreter.allocate_tensors()
+    allocate_ms = (time.perf_counter() - start) * 1000
+
+    batch = quantize_input(synthetic_batch(input_dim, batch_size), input_detail)
+    interpreter.set_tensor(input_detail['index'], batch)
+    start = time.perf_counter()
+    interpreter.invoke()
+    first_invoke_ms = (time.perf_counter() - start) * 1000
+    return interpreter, batch, {'load_ms': load_ms, 'allocate_ms': allocate_ms, 'first_invoke_ms': first_invoke_ms}
+
+
+def benchmark_configuration(model_path, input_dim, batch_size, num_threads, xnnpack,
+                            cold_starts=COLD_STARTS, runs=STEADY_RUNS, warmup=WARMUP_RUNS):
+    """Median cold-start timings over fresh interpreters, then steady-state invoke percentiles"""
+    timings = []
+    for _ in range(cold_starts):
+        interpreter, batch, cold = cold_start(model_path, batch_size, input_dim, num_threads, xnnpack)
+        timings.append(cold)
+    input_index = interpreter.get_input_details()[0]['index']
+
+    for _ in range(warmup):
+        interpreter.set_tensor(input_index, batch)
+        interpreter.invoke()
+    steady = np.empty(runs)
+    for i in range(runs):
+        interpreter.set_tensor(input_index, batch)
+        start = time.perf_counter()
+        interpreter.invoke()
+        steady[i] = (time.perf_counter() - start) * 1000
+
+    p50, p95, p99 = np.percentile(steady, [50, 95, 99])
+    result = {key: float(np.median([t[key] for t in timings])) for key in timings[0]}
+    result.update({
+        'steady_p50_ms': float(p50),
+        'steady_p95_ms': float(p95),
+        'steady_p99_ms': float(p99),
+        'steady_per_sample_ms': float(p50) / batch_size,
+    })
+    return result
+
+
+def benchmark_model(model_path, batch_sizes=BATCH_SIZES, num_threads=NUM_THREADS, **kwargs):
+    input_dim = input_dim_for_model(model_path)
+    if input_dim is None:
+        # No params JSON next to the model: fall back to the interpreter's own input shape
+        input_dim = int(tf.lite.Interpreter(model_path=model_path).get_input_details()[0]['shape'][-1])
+        print(f"  No params input_dim, using model input shape ({input_dim})")
+
+    rows = []
+    for xnnpack in (True, False):
+        for threads in num_threads:
+            for batch_size in batch_sizes:
+                result = benchmark_configuration(model_path, input_dim, batch_size, threads, xnnpack, **kwargs)
+                result.update({'model': os.path.basename(model_path), 'input_dim': input_dim,
+                               'size_kb': os.path.getsize(model_path) / 1024, 'xnnpack': xnnpack,
+                               'num_threads': threads, 'batch_size': batch_size})
+                rows.append(result)
+                print(f"  xnnpack={'on ' if xnnpack else 'off'} threads={threads} batch={batch_size:>3}: "
+                      f"load {result['load_ms']:.2f} ms, allocate {result['allocate_ms']:.2f} ms, "
+                      f"first {result['first_invoke_ms']:.2f} ms, steady p50 {result['steady_p50_ms']:.3f} ms")
+    return rows
+
+
+def print_cold_start_summary(rows):
+    """Time to first result per model: batch 1, single thread, XNNPACK on (the app's default path)"""
+    print(f"\n{'Model':<40} {'Size (KB)':>10} {'Load':>8} {'Alloc':>8} {'First':>8} {'Total ms':>9}")
+    for r in rows:
+        if r['batch_size'] == 1 and r['num_threads'] == 1 and r['xnnpack']:
+            total = r['load_ms'] + r['allocate_ms'] + r['first_invoke_ms']
+            print(f"{r['model']:<40} {r['size_kb']:>10.1f} {r['load_ms']:>8.2f} {r['allocate_ms']:>8.2f} "
+                  f"{r['first_invoke_ms']:>8.2f} {total:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start and steady-state latency of every .tflite model")
+    parser.add_argument('--models', nargs='+', type=Path,
+                        help="model files (default: every .tflite in the assets directory)")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=list(BATCH_SIZES))
+    parser.add_argument('--threads', nargs='+', type=int, default=list(NUM_THREADS))
+    parser.add_argument('--runs', type=int, default=STEADY_RUNS)
+    parser.add_argument('--cold-starts', type=int, default=COLD_STARTS)
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    models = args.models or sorted(ASSETS_DIR.glob('*.tflite'))
+    print("=== TensorFlow Lite Interpreter Benchmark ===")
+    rows = []
+    for model_path in models:
+        print(f"\n{model_path.name}:")
+        rows.extend(benchmark_model(str(model_path), args.batch_sizes, args.threads,
+                                    cold_starts=args.cold_starts, runs=args.runs))
+
+    print_cold_start_summary(rows)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'tensorflow_version': tf.__version__, 'results': rows, 'created_timestamp': time.time()}, f, indent=2)
+    print(f"\n✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+import tensorflow as tf
+
+from personify_training.model_variants import VARIANTS, artifact_path, artifacts_available, load_params, load_test_split
+from personify_training.sparse_batches import CSRBatchSequence
+from personify_training.paths import BENCHMARK_DIR, TRAINING_DIR
+from personify_training.tflite_export import measure_latency, predicted_classes, tflite_predict
+
+RESULTS_PATH = BENCHMARK_DIR / 'model_comparison.json'
+EVAL_BATCH_SIZE = 256
+LATENCY_RUNS = 500
+
+
+def run_training_script(script):
+    """Run a training script in its own process; wall time and that process's peak RSS"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(TRAINING_DIR / script)])
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall_seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{script} exited with status {process.returncode}")
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {'train_wall_seconds': wall_seconds, 'peak_rss_mb': usage.ru_maxrss / divisor, 'source': 'measured'}
+
+
+def recorded_training_stats(params):
+    """Training figures a previous run left in its params JSON
+
+    Top-level fields where the script records them, otherwise the stage
+    profile every trainer writes: its peak RSS and the summed stage wall times.
+    """
+    profile = params.get('profile') or {}
+    stages = profile.get('stages') or {}
+    wall_seconds = params.get('training_time_seconds')
+    if wall_seconds is None and stages:
+        wall_seconds = sum(stage['wall_seconds'] for stage in stages.values())
+    peak_rss_mb = params.get('peak_rss_mb')
+    if peak_rss_mb is None:
+        peak_rss_mb = profile.get('peak_rss_mb')
+    return {'train_wall_seconds': wall_seconds, 'peak_rss_mb': peak_rss_mb, 'source': 'params'}
+
+
+def top_k_accuracy(y_true, outputs, k):
+    top_k = np.argsort(outputs, axis=1)[:, -k:]
+    return float(np.mean(np.any(top_k == np.asarray(y_true)[:, None], axis=1)))
+
+
+def keras_predict(model, X_test):
+    if sp.issparse(X_test):
+        return model.predict(CSRBatchSequence(X_test, batch_size=EVAL_BATCH_SIZE), verbose=0)
+    return model.predict(X_test, batch_size=EVAL_BATCH_SIZE, verbose=0)
+
+
+def evaluate_variant(name):
+    """Accuracy, top-k, file sizes and TFLite latency on the variant's fixed held-out split"""
+    variant = VARIANTS[name]
+    X_test, y_test = load_test_split(name)
+    model = tf.keras.models.load_model(artifact_path(variant, 'keras'))
+    outputs = keras_predict(model, X_test)
+
+    result = {
+        'test_samples': int(X_test.shape[0]),
+        'accuracy': float(np.mean(predicted_classes(outputs) == y_test)),
+        'top_k': variant['top_k'],
+        'top_k_accuracy': top_k_accuracy(y_test, outputs, variant['top_k']) if variant['top_k'] else None,
+        'keras_size_kb': os.path.getsize(artifact_path(variant, 'keras')) / 1024,
+    }
+
+    tflite_path = artifact_path(variant, 'tflite')
+    if os.path.exists(tflite_path):
+        with open(tflite_path, 'rb') as f:
+            tflite_model = f.read()
+        result['tflite_size_kb'] = len(tflite_model) / 1024
+        result['tflite_accuracy'] = float(np.mean(predicted_classes(tflite_predict(tflite_model, X_test)) == y_test))
+        result['tflite_latency'] = measure_latency(tflite_model, X_test, runs=LATENCY_RUNS)
+    return result
+
+
+def benchmark(names, train=False):
+    results = []
+    for name in names:
+        variant = VARIANTS[name]
+        print(f"\n=== {name} ({variant['script']}) ===")
+        entry = {'variant': name, 'script': variant['script']}
+        try:
+            if train:
+                # Evaluate right after training: mbti_base and mbti_linear share artifact files
+                entry['training'] = run_training_script(variant['script'])
+            if not artifacts_available(name):
+                print(f"Skipping {name}: no artifacts from {variant['script']} (train it or pass --train)")
+                entry['error'] = 'artifacts not available'
+                results.append(entry)
+                continue
+            if not train:
+                entry['training'] = recorded_training_stats(load_params(name))
+            entry.update(evaluate_variant(name))
+        except Exception as e:
+            print(f"Warning: benchmark failed for {name}: {e}")
+            entry['error'] = str(e)
+        results.append(entry)
+    return results
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def print_table(results):
+    header = (f"{'Variant':<19} {'Acc':>7} {'Top-k':>7} {'Train (s)':>10} {'RSS (MB)':>9} "
+              f"{'Keras KB':>9} {'TFLite KB':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(f"\n{header}")
+    print('-' * len(header))
+    for r in results:
+        if 'error' in r:
+            print(f"{r['variant']:<19} {r['error']}")
+            continue
+        training = r.get('training', {})
+        latency = r.get('tflite_latency', {})
+        print(f"{r['variant']:<19} {r['accuracy']:>7.4f} {_fmt(r['top_k_accuracy'], '>7.4f')} "
+              f"{_fmt(training.get('train_wall_seconds'), '>10.1f')} {_fmt(training.get('peak_rss_mb'), '>9.0f')} "
+              f"{r['keras_size_kb']:>9.1f} {_fmt(r.get('tflite_size_kb'), '>10.1f')} "
+              f"{_fmt(latency.get('p50_ms'), '>8.3f')} {_fmt(latency.get('p95_ms'), '>8.3f')} "
+              f"{_fmt(latency.get('p99_ms'), '>8.3f')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every trained personality model on its held-out split")
+    parser.add_argument('--train', action='store_true',
+                        help="retrain each variant with its script first (measures wall time and peak RSS)")
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS),
+                        help="variants to benchmark (default: all)")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    print("=== Personify Model Benchmark Suite ===")
+    results = benchmark(args.variants, train=args.train)
+    print_table(results)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'mode': 'train' if args.train else 'load', 'results': results,
+                   'created_timestamp': time.time()}, f, indent=2)
+    print(f"\n✓ Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
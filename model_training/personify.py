@@ -0,0 +1,7 @@
+"""Command line entry point that works from any directory: python model_training/personify.py --help"""
+import sys
+
+from personify_training.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Shared training, export and benchmark code for the Personify models
+
+Run ``python -m personify_training --help`` from ``model_training/`` for the
+command line interface. Submodules are imported on demand; importing the
+package itself loads nothing heavy.
+"""
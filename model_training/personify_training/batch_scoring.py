@@ -0,0 +1,366 @@
+import csv
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .bigfive_scoring import BigFiveScorer, demographic_features
+from .model_variants import VARIANTS, artifact_path, load_params
+from .paths import ASSETS_DIR
+from .text_cleaning import clean_text
+
+# Rows read, featurized and scored together. A multiple of INFERENCE_BATCH_SIZE,
+# so interpreters are only resized for the last chunk of a file.
+CHUNK_SIZE = 1024
+INFERENCE_BATCH_SIZE = 256
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+TOP_K = 3
+
+INPUT_FORMATS = {'.csv': 'csv', '.tsv': 'tsv', '.tab': 'tsv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+OUTPUT_FORMATS = ('csv', 'jsonl')
+
+
+def _truncated_lowercase(text):
+    return str(text)[:500].lower()
+
+
+def _lowercase(text):
+    return str(text).lower()
+
+
+# How each MBTI training script prepared raw posts before its vectorizer
+TEXT_PREPROCESSING = {
+    'mbti_base': _truncated_lowercase,
+    'mbti_linear': _lowercase,
+    'mbti_optimized': clean_text,
+}
+
+
+def _load_pickle(filename, files=None):
+    """Unpickle an asset, from already read bytes when files holds it"""
+    if files is not None and filename in files:
+        return pickle.loads(files[filename])
+    with open(os.path.join(ASSETS_DIR, filename), 'rb') as f:
+        return pickle.load(f)
+
+
+class PersonalityFeaturizer:
+    """The 7 questionnaire answers, encoded and scaled like train_personality_model.py"""
+
+    def __init__(self, params):
+        self.fields = list(params['feature_columns'])
+        encoders = params['label_encoders']
+        self.encoders = {col: mapping for col, mapping in encoders.items() if col in self.fields}
+        self.mean = np.asarray(params['scaler_mean'])
+        self.scale = np.asarray(params['scaler_scale'])
+        target = encoders['Personality']
+        self.labels = sorted(target, key=target.get)
+
+    def _value(self, col, value):
+        # Yes/No answers may arrive as text or already encoded
+        if col in self.encoders and value in self.encoders[col]:
+            return self.encoders[col][value]
+        return float(value)
+
+    def transform(self, records):
+        rows, errors = [], []
+        for record in records:
+            try:
+                row = [self._value(col, record.get(col)) for col in self.fields]
+            except (TypeError, ValueError):
+                missing = [col for col in self.fields if record.get(col) in (None, '')]
+                errors.append(f"missing or invalid values: {', '.join(missing) or 'non-numeric field'}")
+                continue
+            rows.append(row)
+            errors.append(None)
+        X = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(self.fields))
+        return ((X - self.mean) / self.scale).astype(np.float32), errors
+
+
+class MBTIFeaturizer:
+    """Raw posts through the variant's own text preprocessing and saved vectorizer"""
+
+    def __init__(self, name, text_field='posts', files=None):
+        variant = VARIANTS[name]
+        self.fields = [text_field]
+        self.text_field = text_field
+        self.preprocess = TEXT_PREPROCESSING[name]
+        self.vectorizer = _load_pickle(variant['vectorizer'], files)
+        self.labels = [str(label) for label in _load_pickle(variant['encoder'], files).classes_]
+
+    def transform(self, records):
+        texts, errors = [], []
+        for record in records:
+            text = record.get(self.text_field)
+            if text is None or not str(text).strip():
+                errors.append(f"missing '{self.text_field}' text")
+                continue
+            texts.append(self.preprocess(text))
+            errors.append(None)
+        return self.vectorizer.transform(texts), errors
+
+
+class BigFiveFeaturizer:
+    """Item responses scored into traits, plus demographics, scaled like the clustering script"""
+
+    def __init__(self, params, files=None):
+        if params.get('trait_scoring'):
+            self.scorer = BigFiveScorer.from_dict(params['trait_scoring'])
+        else:
+            # Params from before the key was exported: training used the full codebook
+            self.scorer = BigFiveScorer.from_codebook()
+        self.feature_names = list(params['feature_names'])
+        self.labels = list(params['personality_types'])
+
+        self.demographic_scaling = params.get('demographic_scaling')
+        demographics = [name for name in self.feature_names if name in ('screen_ratio', 'log_test_time')]
+        if demographics and not self.demographic_scaling:
+            raise ValueError("The Big Five params predate 'demographic_scaling', so demographic features "
+                             "cannot be rebuilt; retrain with train_bigfive_clustering_model.py")
+        self.demographic_columns = []
+        if 'screen_ratio' in demographics:
+            self.demographic_columns += ['screenw', 'screenh']
+        if 'log_test_time' in demographics:
+            self.demographic_columns.append('testelapse')
+        self.fields = self.scorer.items + self.demographic_columns
+
+        scaler = _load_pickle(VARIANTS['bigfive_clustering']['scaler'], files)
+        self.mean = scaler.mean_
+        self.scale = scaler.scale_
+
+    def transform(self, records):
+        items, demographics, errors = [], [], []
+        for record in records:
+            try:
+                responses = [float(record.get(item)) for item in self.scorer.items]
+                values = [float(record.get(col)) for col in self.demographic_columns]
+            except (TypeError, ValueError):
+                errors.append("missing or non-numeric item responses or demographic fields")
+                continue
+            # Same validity rule as training: every item answered on the 1-5 scale
+            if not all(1 <= r <= 5 for r in responses):
+                errors.append("item responses outside the 1-5 scale")
+                continue
+            items.append(responses)
+            demographics.append(values)
+            errors.append(None)
+
+        # Float32 like the columnar store the training data was read from
+        items = np.asarray(items, dtype=np.float32).reshape(len(items), len(self.scorer.items))
+        columns = dict(zip(self.scorer.score_names, self.scorer.score(items).T))
+        columns.update(zip(self.scorer.items, items.T))
+        if self.demographic_columns:
+            raw = np.asarray(demographics, dtype=np.float32).reshape(len(demographics), len(self.demographic_columns))
+            matrix, names = demographic_features(dict(zip(self.demographic_columns, raw.T)))
+            scaling = self.demographic_scaling
+            for name, column in zip(names, matrix.T):
+                i = scaling['features'].index(name)
+                columns[name] = (column - scaling['mean'][i]) / scaling['scale'][i]
+
+        X = np.column_stack([columns[name] for name in self.feature_names]) if items.size else \
+            np.empty((0, len(self.feature_names)))
+        return ((X - self.mean) / self.scale).astype(np.float32), errors
+
+
+def build_featurizer(name, text_field='posts', params=None, files=None):
+    """Featurizer of a trained model; params and files may come from load_serving_artifacts"""
+    if name == 'personality':
+        return PersonalityFeaturizer(params or load_params(name))
+    if name == 'bigfive_clustering':
+        return BigFiveFeaturizer(params or load_params(name), files)
+    return MBTIFeaturizer(name, text_field=text_field, files=files)
+
+
+class ModelScorer:
+    """Featurizer plus one long-lived TFLite interpreter for a trained model
+
+    With params and files (see load_serving_artifacts) the featurizer and the
+    interpreter are both built from those already read bytes, so they come
+    from the same training run even if the files are rewritten meanwhile.
+    """
+
+    def __init__(self, name, tflite_path=None, text_field='posts', num_threads=1, top_k=TOP_K,
+                 params=None, files=None):
+        self.name = name
+        self.featurizer = build_featurizer(name, text_field=text_field, params=params, files=files)
+        self.labels = self.featurizer.labels
+        self.top_k = top_k
+        self.tflite_path = str(tflite_path or artifact_path(VARIANTS[name], 'tflite'))
+        self.tflite_content = (files or {}).get(VARIANTS[name]['tflite'])
+        self.num_threads = num_threads
+        self.interpreter = self.new_interpreter()
+
+    def new_interpreter(self, batch_size=None):
+        """An allocated interpreter for this model, optionally sized for a fixed batch"""
+        import tensorflow as tf
+
+        if self.tflite_content is not None:
+            interpreter = tf.lite.Interpreter(model_content=self.tflite_content, num_threads=self.num_threads)
+        else:
+            interpreter = tf.lite.Interpreter(model_path=self.tflite_path, num_threads=self.num_threads)
+        if batch_size is not None:
+            detail = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(detail['index'], (batch_size, detail['shape'][-1]))
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def predict(self, X):
+        from .tflite_export import interpreter_predict
+
+        return interpreter_predict(self.interpreter, X, INFERENCE_BATCH_SIZE)
+
+    def score(self, records):
+        """One result dict per record, in order: prediction and confidence, or an error"""
+        X, errors = self.featurizer.transform(records)
+        outputs = self.predict(X) if X.shape[0] else None
+
+        results, row = [], 0
+        for error in errors:
+            if error is not None:
+                results.append({'error': error})
+                continue
+            probabilities = outputs[row]
+            row += 1
+            if probabilities.shape[-1] == 1:
+                # Single sigmoid unit: probability of class 1
+                positive = float(probabilities[0])
+                label = int(positive > 0.5)
+                results.append({'prediction': self.labels[label],
+                                'confidence': positive if label else 1.0 - positive})
+                continue
+            order = np.argsort(probabilities)[::-1][:self.top_k]
+            results.append({
+                'prediction': self.labels[order[0]],
+                'confidence': float(probabilities[order[0]]),
+                'top_k': [[self.labels[i], float(probabilities[i])] for i in order],
+            })
+        return results
+
+
+# Per-worker scorer, built once by the pool initializer instead of pickled per task
+_worker_scorer = None
+
+
+def _init_worker(name, options):
+    global _worker_scorer
+    _worker_scorer = ModelScorer(name, **options)
+
+
+def _score_in_worker(records):
+    return _worker_scorer.score(records)
+
+
+def file_format(path, formats):
+    fmt = INPUT_FORMATS.get(Path(path).suffix.lower())
+    if fmt not in formats:
+        raise ValueError(f"Cannot tell the format of {path}; expected one of {', '.join(formats)}")
+    return fmt
+
+
+def read_chunks(path, fmt=None, chunk_size=CHUNK_SIZE):
+    """Yield lists of at most chunk_size record dicts, reading the file incrementally"""
+    fmt = fmt or file_format(path, ('csv', 'tsv', 'jsonl'))
+    with open(path, newline='' if fmt != 'jsonl' else None, encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            # MBTI posts exceed the csv module's default 128 KB field limit
+            csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+            records = csv.DictReader(f, delimiter='\t' if fmt == 'tsv' else ',')
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class PredictionWriter:
+    """Appends predictions to a CSV or JSONL file as chunks complete"""
+
+    def __init__(self, path, fmt=None, id_field=None):
+        self.fmt = fmt or file_format(path, OUTPUT_FORMATS)
+        self.id_field = id_field or 'row'
+        self.file = open(path, 'w', newline='' if self.fmt == 'csv' else None, encoding='utf-8')
+        if self.fmt == 'csv':
+            self.writer = csv.writer(self.file)
+            self.writer.writerow([self.id_field, 'prediction', 'confidence', 'top_k', 'error'])
+
+    def write(self, ids, results):
+        for record_id, result in zip(ids, results):
+            if self.fmt == 'jsonl':
+                self.file.write(json.dumps({self.id_field: record_id, **result}) + '\n')
+                continue
+            top_k = '|'.join(f"{label}:{p:.4f}" for label, p in result.get('top_k', []))
+            confidence = result.get('confidence')
+            self.writer.writerow([record_id, result.get('prediction', ''),
+                                  f"{confidence:.6f}" if confidence is not None else '', top_k,
+                                  result.get('error', '')])
+
+    def close(self):
+        self.file.close()
+
+
+def score_file(name, input_path, output_path, n_jobs=-1, chunk_size=CHUNK_SIZE, id_field=None,
+               text_field='posts', tflite_path=None, input_format=None, output_format=None, num_threads=1):
+    """Stream input_path through a trained model and write one prediction per row to output_path
+
+    Rows are read, scored and written chunk by chunk with at most
+    CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker outstanding, so memory stays
+    bounded however large the file is. Each worker process builds the
+    featurizer and one TFLite interpreter once; output keeps input order.
+    Rows that cannot be featurized get an error instead of a prediction.
+    """
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    options = {'tflite_path': tflite_path, 'text_field': text_field, 'num_threads': num_threads}
+    chunks = read_chunks(input_path, input_format, chunk_size)
+    writer = PredictionWriter(output_path, output_format, id_field)
+    stats = {'model': name, 'rows': 0, 'errors': 0, 'workers': n_jobs, 'chunk_size': chunk_size}
+
+    def ids_of(chunk):
+        start = stats['rows']
+        stats['rows'] += len(chunk)
+        if id_field:
+            return [record.get(id_field) for record in chunk]
+        return list(range(start, start + len(chunk)))
+
+    def emit(ids, results):
+        writer.write(ids, results)
+        stats['errors'] += sum('error' in result for result in results)
+
+    start = time.perf_counter()
+    try:
+        if n_jobs == 1:
+            scorer = ModelScorer(name, **options)
+            for chunk in chunks:
+                emit(ids_of(chunk), scorer.score(chunk))
+        else:
+            # Spawned, not forked: TensorFlow is not fork-safe once initialized
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context,
+                                     initializer=_init_worker, initargs=(name, options)) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append((ids_of(chunk), executor.submit(_score_in_worker, chunk)))
+                    if len(pending) >= n_jobs * CHUNKS_IN_FLIGHT_PER_WORKER:
+                        ids, future = pending.popleft()
+                        emit(ids, future.result())
+                while pending:
+                    ids, future = pending.popleft()
+                    emit(ids, future.result())
+    finally:
+        writer.close()
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else None
+    return stats
@@ -0,0 +1,146 @@
+import json
+import re
+
+import numpy as np
+
+from .paths import BIGFIVE_CODEBOOK
+
+# IPIP Big-Five Factor Markers used by lib/data/codebook.txt
+# https://ipip.ori.org/newBigFive5broadKey.htm
+DEFAULT_CODEBOOK = BIGFIVE_CODEBOOK
+
+TRAITS = ['EXT', 'EST', 'AGR', 'CSN', 'OPN']
+
+# Reverse-keyed items per trait (scored as 6 - response on the 1-5 scale)
+REVERSE_KEYED = {
+    'EXT': [2, 4, 6, 8, 10],
+    'EST': [1, 3, 5, 6, 7, 8, 9, 10],  # Items describe neuroticism, reversed for stability
+    'AGR': [1, 3, 5, 7],
+    'CSN': [2, 4, 6, 8],
+    'OPN': [2, 4, 6],
+}
+
+SCALE_MAX = 5
+MIN_ITEMS_PER_TRAIT = 8  # Need at least 8 out of 10 for a reliable score
+
+ITEM_PATTERN = re.compile(r'^(EXT|EST|AGR|CSN|OPN)(\d+)\t')
+
+
+def read_codebook_items(codebook_path=DEFAULT_CODEBOOK):
+    """Read the questionnaire item codes in the order they are listed in the codebook"""
+    items = []
+    with open(codebook_path, encoding='utf-8') as f:
+        for line in f:
+            match = ITEM_PATTERN.match(line)
+            if match:
+                items.append(match.group(1) + match.group(2))
+    return items
+
+
+class BigFiveScorer:
+    """Scores Likert responses into Big Five trait means with one matrix product
+
+    Each trait score is the mean of its items after reverse keying, which is
+    linear in the responses:
+
+        score = responses @ weights + offset
+
+    where weights[i, t] is +1/n_t for forward items, -1/n_t for reverse items,
+    and offset[t] = (SCALE_MAX + 1) * n_reverse_t / n_t.
+    """
+
+    def __init__(self, items, traits, weights, offset):
+        self.items = list(items)
+        self.traits = list(traits)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.offset = np.asarray(offset, dtype=np.float32)
+
+    @classmethod
+    def from_codebook(cls, codebook_path=DEFAULT_CODEBOOK, available_items=None,
+                      min_items=MIN_ITEMS_PER_TRAIT):
+        """Build the item x trait key, keeping only items present in the data"""
+        items = read_codebook_items(codebook_path)
+        if available_items is not None:
+            available = set(available_items)
+            items = [item for item in items if item in available]
+
+        # Only score traits that have enough of their items available
+        counts = {trait: sum(item.startswith(trait) for item in items) for trait in TRAITS}
+        traits = [trait for trait in TRAITS if counts[trait] >= min_items]
+        items = [item for item in items if item[:3] in traits]
+
+        weights = np.zeros((len(items), len(traits)), dtype=np.float32)
+        offset = np.zeros(len(traits), dtype=np.float32)
+        for i, item in enumerate(items):
+            t = traits.index(item[:3])
+            n_items = counts[item[:3]]
+            if int(item[3:]) in REVERSE_KEYED[item[:3]]:
+                weights[i, t] = -1.0 / n_items
+                offset[t] += (SCALE_MAX + 1) / n_items
+            else:
+                weights[i, t] = 1.0 / n_items
+
+        return cls(items, traits, weights, offset)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild the key exported by to_dict, e.g. from a model's params JSON"""
+        return cls(data['items'], data['traits'], data['weights'], data['offset'])
+
+    @property
+    def score_names(self):
+        return [f'{trait}_score' for trait in self.traits]
+
+    def score(self, responses, block_size=65536):
+        """Score an (n_rows, n_items) response array, columns ordered as self.items"""
+        responses = np.asarray(responses)
+        scores = np.empty((len(responses), len(self.traits)), dtype=np.float32)
+
+        # Cast compact (uint8) responses to float one block at a time
+        for start in range(0, len(responses), block_size):
+            block = responses[start:start + block_size].astype(np.float32)
+            scores[start:start + block_size] = block @ self.weights + self.offset
+        return scores
+
+    def score_chunks(self, chunks):
+        """Score response batches as they arrive, e.g. from a chunked CSV reader"""
+        for chunk in chunks:
+            yield self.score(chunk)
+
+    def to_dict(self):
+        """Export the key so inference can reproduce the same scores"""
+        return {
+            'items': self.items,
+            'traits': self.traits,
+            'weights': self.weights.tolist(),
+            'offset': self.offset.tolist(),
+            'scale': [1, SCALE_MAX],
+        }
+
+    def export(self, path):
+        """Write the scoring matrix as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def demographic_features(columns):
+    """Screen aspect ratio and log test time, before standardization
+
+    columns maps column names to arrays (a DataFrame works). Only features
+    whose source columns are all present are returned, as (matrix, names).
+    """
+    features = []
+    names = []
+    if 'screenw' in columns and 'screenh' in columns:
+        screenw = np.asarray(columns['screenw'])
+        screenh = np.asarray(columns['screenh'])
+        features.append(screenw / (screenh + 1e-8))  # Avoid division by zero
+        names.append('screen_ratio')
+    if 'testelapse' in columns:
+        # Log transform test time to handle outliers
+        features.append(np.log1p(np.asarray(columns['testelapse'])))
+        names.append('log_test_time')
+    if not features:
+        return np.empty((0, 0)), names
+    return np.column_stack(features), names
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .paths import ASSETS_DIR, BENCHMARK_DIR
+from .reference_centroids import FORMAT_VERSION, HEADER, MAGIC, ReferenceCentroids
+
+CENTROID_FILE = 'bigfive_centroids.pbc'
+RESULTS_PATH = BENCHMARK_DIR / 'bigfive_centroids.json'
+BENCHMARK_CENTROID_PATH = BENCHMARK_DIR / CENTROID_FILE  # The benchmark never touches the shipped asset
+DEFAULT_TEMPERATURE = 1.0  # In squared standardized distance units
+LATENCY_RUNS = 1000
+LATENCY_WARMUP = 50
+
+
+def export_centroids(scaler, kmeans, path, feature_names=None, personality_types=None,
+                     demographic_scaling=None, temperature=DEFAULT_TEMPERATURE):
+    """Write the clustering scaler and K-Means centroids as a flat float32 file
+
+    Everything the app needs to assign a cluster without an interpreter:
+    (2 + k) * d floats plus a small JSON config.
+    """
+    mean = np.asarray(scaler.mean_, dtype='<f4')
+    scale = np.asarray(scaler.scale_, dtype='<f4')
+    centroids = np.asarray(kmeans.cluster_centers_, dtype='<f4')
+    n_clusters, n_features = centroids.shape
+    if mean.shape != (n_features,) or scale.shape != (n_features,):
+        raise ValueError(f"Scaler has {mean.shape[0]} features, centroids have {n_features}")
+    if feature_names is not None and len(feature_names) != n_features:
+        raise ValueError(f"{len(feature_names)} feature names for {n_features} features")
+
+    config = json.dumps({
+        'feature_names': list(feature_names) if feature_names is not None else None,
+        'personality_types': list(personality_types) if personality_types is not None else None,
+        'demographic_scaling': demographic_scaling,
+        'distance': 'squared_euclidean',
+        'temperature': float(temperature),
+    }, sort_keys=True).encode('utf-8')
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, n_features, n_clusters, len(config)))
+        f.write(config)
+        f.write(b'\0' * (-len(config) % 8))
+        f.write(mean.tobytes())
+        f.write(scale.tobytes())
+        f.write(centroids.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def centroid_outputs(reference, features, temperature=None):
+    """(clusters, probabilities) for a batch of unscaled rows, vectorized over the exported arrays
+
+    Same arithmetic as the reference predictor, for evaluating a whole split.
+    """
+    temperature = reference.temperature if temperature is None else temperature
+    mean = np.asarray(reference.mean, dtype=np.float64)
+    scale = np.asarray(reference.scale, dtype=np.float64)
+    centroids = np.asarray(reference.centroids, dtype=np.float64)
+    scaled = (np.asarray(features, dtype=np.float64) - mean) / scale
+    distances = ((scaled[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    logits = -(distances - distances.min(axis=1, keepdims=True)) / temperature
+    weights = np.exp(logits)
+    return np.argmin(distances, axis=1), weights / weights.sum(axis=1, keepdims=True)
+
+
+def reference_latency(reference, features, runs=LATENCY_RUNS, warmup=LATENCY_WARMUP):
+    """Single-row latency of the pure-Python predictor in milliseconds, soft assignment included"""
+    rows = [list(map(float, row)) for row in np.asarray(features)[:runs]]
+    for i in range(warmup):
+        reference.soft_assign(rows[i % len(rows)])
+    timings = np.empty(runs)
+    for i in range(runs):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        reference.soft_assign(row)
+        timings[i] = (time.perf_counter() - start) * 1000
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'mean_ms': float(timings.mean())}
+
+
+def export_from_assets(path, assets_dir=ASSETS_DIR, temperature=DEFAULT_TEMPERATURE):
+    """Export a centroid file to path from the trained scaler, K-Means model and params"""
+    with open(os.path.join(assets_dir, 'bigfive_scaler.pickle'), 'rb') as f:
+        scaler = pickle.load(f)
+    with open(os.path.join(assets_dir, 'bigfive_kmeans_model.pickle'), 'rb') as f:
+        kmeans = pickle.load(f)
+    with open(os.path.join(assets_dir, 'bigfive_clustering_params.json'), 'r') as f:
+        params = json.load(f)
+    path = export_centroids(scaler, kmeans, path,
+                            feature_names=params.get('feature_names'),
+                            personality_types=params.get('personality_types'),
+                            demographic_scaling=params.get('demographic_scaling'), temperature=temperature)
+    return path, scaler, kmeans
+
+
+def compare_with_tflite(centroid_path, scaler, X_test, y_test, tflite_path):
+    """Agreement with K-Means, size and single-row latency: centroid file vs the TFLite classifier
+
+    X_test is the scaled split the classifier was evaluated on; the centroid
+    path is fed the same rows unscaled, so its standardization is covered too.
+    """
+    from .tflite_export import measure_latency, tflite_predict
+
+    reference = ReferenceCentroids.load(centroid_path)
+    raw_test = scaler.inverse_transform(np.asarray(X_test, dtype=np.float64))
+    clusters, probabilities = centroid_outputs(reference, raw_test)
+    # The pure-Python predictor must match the vectorized one row for row
+    python_clusters = np.array([reference.predict_one(list(map(float, row))) for row in raw_test])
+
+    with open(tflite_path, 'rb') as f:
+        tflite_model = f.read()
+    tflite_probabilities = tflite_predict(tflite_model, X_test)
+    tflite_clusters = np.argmax(tflite_probabilities, axis=1)
+
+    return {
+        'samples': int(len(y_test)),
+        'n_clusters': reference.n_clusters,
+        'n_features': reference.n_features,
+        'temperature': reference.temperature,
+        'centroid': {
+            'file': os.path.basename(centroid_path),
+            'size_bytes': os.path.getsize(centroid_path),
+            'kmeans_agreement': float(np.mean(clusters == y_test)),
+            'python_agreement': float(np.mean(python_clusters == clusters)),
+            'mean_max_probability': float(probabilities.max(axis=1).mean()),
+            'latency': reference_latency(reference, raw_test),
+        },
+        'tflite': {
+            'file': os.path.basename(tflite_path),
+            'size_bytes': os.path.getsize(tflite_path),
+            'kmeans_agreement': float(np.mean(tflite_clusters == y_test)),
+            'mean_max_probability': float(tflite_probabilities.max(axis=1).mean()),
+            'latency': measure_latency(tflite_model, X_test),
+        },
+        'prediction_agreement': float(np.mean(clusters == tflite_clusters)),
+        'mean_abs_probability_difference': float(np.abs(probabilities - tflite_probabilities).mean()),
+    }
+
+
+def print_comparison(report):
+    print(f"\n{'Model':<28} {'Size (KB)':>10} {'K-Means agr.':>13} {'p50 ms':>8} {'p99 ms':>8} {'Mean max p':>11}")
+    for side in ('centroid', 'tflite'):
+        r = report[side]
+        print(f"{r['file']:<28} {r['size_bytes'] / 1024:>10.2f} {r['kmeans_agreement']:>13.2%} "
+              f"{r['latency']['p50_ms']:>8.4f} {r['latency']['p99_ms']:>8.4f} {r['mean_max_probability']:>11.3f}")
+    print(f"\nCentroid vs TFLite predictions agree on {report['prediction_agreement']:.2%} of "
+          f"{report['samples']} test rows (mean |Δp| {report['mean_abs_probability_difference']:.4f})")
+
+
+def main(argv=None):
+    """Export the Big Five centroid file and benchmark it against the TFLite classifier"""
+    from .model_variants import VARIANTS, artifact_path, artifacts_available, load_test_split
+
+    parser = argparse.ArgumentParser(description="Nearest-centroid export of the Big Five cluster model vs TFLite")
+    parser.add_argument('--temperature', type=float, default=DEFAULT_TEMPERATURE,
+                        help="softmax temperature over squared distances (default: 1.0)")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    parser.add_argument('--centroid-file', type=Path, default=BENCHMARK_CENTROID_PATH,
+                        help=f"where to write the benchmarked centroid file (default: {BENCHMARK_CENTROID_PATH})")
+    args = parser.parse_args(argv)
+    if args.temperature <= 0:
+        parser.error("--temperature must be positive")
+
+    name = 'bigfive_clustering'
+    if not artifacts_available(name):
+        print(f"Error: no artifacts from {VARIANTS[name]['script']}")
+        return 1
+
+    print("=== Big Five nearest-centroid export vs TensorFlow Lite ===")
+    args.centroid_file.parent.mkdir(parents=True, exist_ok=True)
+    centroid_path, scaler, _ = export_from_assets(args.centroid_file, temperature=args.temperature)
+    print(f"✓ Centroid file saved: {centroid_path} ({os.path.getsize(centroid_path)} bytes)")
+
+    X_test, y_test = load_test_split(name)
+    report = compare_with_tflite(centroid_path, scaler, X_test, y_test, artifact_path(VARIANTS[name], 'tflite'))
+    print_comparison(report)
+    if report['centroid']['python_agreement'] < 1.0:
+        print(f"⚠️  Pure-Python predictor differs from the vectorized path on "
+              f"{1 - report['centroid']['python_agreement']:.2%} of rows")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(dict(report, created_timestamp=time.time()), f, indent=2)
+    print(f"\n✓ Results saved: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+import argparse
+import importlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from .model_variants import VARIANTS
+from .paths import ASSETS_DIR, DATASET_STORE_DIR, FEATURE_CACHE_DIR, TRAINING_DIR
+
+# Nothing heavier than NumPy is imported up here. TensorFlow, scikit-learn and
+# pandas load inside the subcommands that need them, so cache and inspection
+# commands start without paying TensorFlow's multi-second import.
+
+MODEL_VARIANTS = {
+    'personality': 'personality',
+    'mbti': 'mbti_{variant}',
+    'bigfive': 'bigfive_clustering',
+}
+MBTI_VARIANTS = ('base', 'linear', 'optimized')
+
+# Subcommand -> (module, whether its main() takes an argv list)
+BENCHMARKS = {
+    'models': ('compare_ml_models', True),
+    'interpreter': ('benchmark_tflite_interpreter', True),
+    'parity': ('personify_training.tflite_parity', True),
+    'centroids': ('personify_training.centroid_export', True),
+    'features': ('benchmark_feature_modes', False),
+    'sparse': ('benchmark_sparse_training', False),
+}
+
+
+def _variant_name(model, variant):
+    return MODEL_VARIANTS[model].format(variant=variant)
+
+
+def _dir_bytes(path):
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def _training_scripts_importable():
+    # The training and benchmark scripts live next to the package, not inside it
+    if str(TRAINING_DIR) not in sys.path:
+        sys.path.insert(0, str(TRAINING_DIR))
+
+
+def cmd_train(args):
+    _training_scripts_importable()
+    name = _variant_name(args.model, args.variant)
+    print(f"Training {name} ({VARIANTS[name]['script']})")
+    importlib.import_module(VARIANTS[name]['module']).main()
+
+
+def cmd_export(args):
+    """Re-convert a trained Keras model to TensorFlow Lite without retraining it"""
+    import numpy as np
+    import tensorflow as tf
+
+    from .model_variants import (artifact_path, artifacts_available, file_digests, load_params, load_split,
+                                 serving_files)
+    from .tflite_export import export_tflite_variants, predicted_classes, print_variant_table
+    from .tflite_parity import keras_outputs
+
+    _training_scripts_importable()
+    name = _variant_name(args.model, args.variant)
+    variant = VARIANTS[name]
+    if not artifacts_available(name):
+        print(f"Error: no artifacts from {variant['script']}; run 'train {args.model}' first")
+        return 1
+
+    params = load_params(name)
+    # Default to the variants the training run exported, primary (shipped) file first
+    variants = args.quantization or [r['variant'] for r in params.get('tflite_variants', [])] or ['dynamic']
+    X_train, X_test, _, y_test = load_split(name)
+    model = tf.keras.models.load_model(artifact_path(variant, 'keras'))
+    keras_accuracy = float(np.mean(predicted_classes(keras_outputs(model, X_test)) == y_test))
+    print(f"Keras accuracy on {len(y_test)} held-out samples: {keras_accuracy:.4f}")
+
+    reports = export_tflite_variants(model, ASSETS_DIR, Path(variant['tflite']).stem, X_train, X_test, y_test,
+                                     keras_accuracy, variants=tuple(variants))
+    print_variant_table(reports)
+
+    params['tflite_variants'] = reports
+    params['artifacts'] = file_digests(serving_files(name))
+    with open(artifact_path(variant, 'params'), 'w') as f:
+        json.dump(params, f, indent=2)
+    print(f"\n✓ Params updated: {artifact_path(variant, 'params')}")
+    return 0
+
+
+def cmd_score(args):
+    """Stream a file of raw inputs through a trained model's TFLite export"""
+    from .batch_scoring import score_file
+
+    name = _variant_name(args.model, args.variant)
+    options = {'chunk_size': args.chunk_size} if args.chunk_size else {}
+    stats = score_file(name, args.input, args.output, n_jobs=args.jobs, id_field=args.id_field,
+                       text_field=args.text_field, tflite_path=args.tflite, **options)
+    print(f"Scored {stats['rows']} rows with {name} ({stats['errors']} errors) in {stats['seconds']:.1f}s: "
+          f"{stats['rows_per_sec'] or 0:.0f} rows/sec across {stats['workers']} worker(s)")
+    print(f"✓ Predictions saved: {args.output}")
+    return 0
+
+
+def cmd_serve(args):
+    """Serve trained models over HTTP until interrupted"""
+    import asyncio
+
+    from .inference_server import serve
+
+    unknown = [name for name in args.models if name not in VARIANTS]
+    if unknown:
+        print(f"Error: unknown model(s) {', '.join(unknown)}; choose from {', '.join(VARIANTS)}")
+        return 2
+    options = {'models': args.models} if args.models else {}
+    try:
+        asyncio.run(serve(host=args.host, port=args.port, max_batch_size=args.max_batch_size,
+                          max_delay_ms=args.max_delay_ms, watch_seconds=args.watch, num_threads=args.threads,
+                          text_field=args.text_field, **options))
+    except KeyboardInterrupt:
+        print("\nStopped")
+    return 0
+
+
+def cmd_update(args):
+    """Fold newly collected labelled rows into a trained model"""
+    from .incremental import update_model
+
+    _training_scripts_importable()
+    name = _variant_name(args.model, args.variant)
+    try:
+        update = update_model(name, args.rows, epochs=args.epochs, learning_rate_factor=args.lr_factor,
+                              text_field=args.text_field, compare_full=args.compare_full)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Updated {name} to version {update['version']} in {update['seconds']:.1f}s")
+    return 0
+
+
+def cmd_sweep(args):
+    from .hparam_sweep import main
+
+    return main([args.model] + args.args)
+
+
+def cmd_cv(args):
+    from .cross_validation import main
+
+    return main([args.model] + args.args)
+
+
+def cmd_bench(args):
+    module_name, takes_argv = BENCHMARKS[args.benchmark]
+    if args.args and not takes_argv:
+        print(f"Error: 'bench {args.benchmark}' takes no arguments")
+        return 2
+    _training_scripts_importable()
+    main = importlib.import_module(module_name).main
+    return main(args.args) if takes_argv else main()
+
+
+def cmd_cache(args):
+    from .feature_cache import FeatureCache
+
+    cache = FeatureCache(FEATURE_CACHE_DIR)
+    if args.action == 'stats':
+        stats = cache.stats()
+        namespaces = {}
+        for _, size, entry in cache.entries():
+            namespace = entry.name.rsplit('-', 1)[0]
+            count, total = namespaces.get(namespace, (0, 0))
+            namespaces[namespace] = (count + 1, total + size)
+
+        print(f"Feature cache: {FEATURE_CACHE_DIR}")
+        print(f"{stats['entries']} entries using {stats['size_mb']:.1f} / {stats['budget_mb']:.0f} MB")
+        if namespaces:
+            print(f"\n{'Namespace':<28} {'Entries':>8} {'Size (MB)':>10}")
+            for namespace, (count, total) in sorted(namespaces.items()):
+                print(f"{namespace:<28} {count:>8} {total / (1024 * 1024):>10.1f}")
+
+        stores = sorted(p for p in DATASET_STORE_DIR.glob('*') if p.is_dir()) if DATASET_STORE_DIR.exists() else []
+        print(f"\nDataset store: {DATASET_STORE_DIR}")
+        for store in stores:
+            print(f"{store.name:<60} {_dir_bytes(store) / (1024 * 1024):>8.1f} MB")
+        if not stores:
+            print("(empty)")
+    elif args.action == 'evict':
+        remaining = cache.evict(max_bytes=int(args.max_mb * 1024 * 1024))
+        print(f"Evicted {cache.evictions} entries ({cache.evicted_bytes / (1024 * 1024):.1f} MB), "
+              f"{remaining / (1024 * 1024):.1f} MB left")
+    elif args.action == 'clear':
+        cache.clear()
+        print(f"Cleared {cache.evictions} feature cache entries ({cache.evicted_bytes / (1024 * 1024):.1f} MB)")
+        if args.datasets and DATASET_STORE_DIR.exists():
+            size = _dir_bytes(DATASET_STORE_DIR)
+            shutil.rmtree(DATASET_STORE_DIR)
+            print(f"Cleared the dataset store ({size / (1024 * 1024):.1f} MB)")
+    return 0
+
+
+def cmd_inspect(args):
+    """Summarize trained models from their params JSON alone"""
+    unknown = [name for name in args.models if name not in VARIANTS]
+    if unknown:
+        print(f"Error: unknown model(s) {', '.join(unknown)}; choose from {', '.join(VARIANTS)}")
+        return 2
+
+    shown = set()
+    for name in args.models or list(VARIANTS):
+        params_path = ASSETS_DIR / VARIANTS[name]['params']
+        # mbti_base and mbti_linear share a params file; show it once
+        if params_path in shown:
+            continue
+        shown.add(params_path)
+        if not params_path.exists():
+            print(f"{name}: not trained ({params_path.name} missing)")
+            continue
+        with open(params_path, 'r') as f:
+            params = json.load(f)
+
+        created = params.get('created_timestamp')
+        print(f"\n=== {name} ({params_path.name}) ===")
+        if created:
+            print(f"Created: {time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}")
+        for key in ('model_type', 'input_dim', 'num_classes', 'n_clusters', 'test_accuracy', 'test_top_3_accuracy',
+                    'training_time_seconds', 'peak_rss_mb'):
+            if key in params:
+                value = params[key]
+                print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+        for report in params.get('tflite_variants', []):
+            if 'error' in report:
+                print(f"  {report['variant']:<8} failed: {report['error']}")
+                continue
+            on_disk = os.path.exists(ASSETS_DIR / report['file'])
+            print(f"  {report['variant']:<8} {report['file']:<40} {report['size_kb']:>8.1f} KB "
+                  f"acc {report['accuracy']:.4f} ({report['accuracy_delta']:+.4f})"
+                  f"{'' if on_disk else '  [missing]'}")
+
+        stages = params.get('profile', {}).get('stages', {})
+        if stages:
+            print('  ' + ', '.join(f"{stage} {s['wall_seconds']:.1f}s" for stage, s in stages.items()))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='personify_training', description="Personify model training toolkit")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train = commands.add_parser('train', help="train a model with its training script")
+    train.add_argument('model', choices=list(MODEL_VARIANTS))
+    train.add_argument('--variant', choices=MBTI_VARIANTS, default='optimized', help="MBTI variant (default: optimized)")
+    train.set_defaults(handler=cmd_train)
+
+    export = commands.add_parser('export', help="re-export a trained model to TensorFlow Lite")
+    export.add_argument('model', choices=list(MODEL_VARIANTS))
+    export.add_argument('--variant', choices=MBTI_VARIANTS, default='optimized', help="MBTI variant (default: optimized)")
+    export.add_argument('--quantization', nargs='+', choices=['dynamic', 'float16', 'int8', 'uint8'],
+                        help="variants to write, primary first (default: those of the last training run)")
+    export.set_defaults(handler=cmd_export)
+
+    score = commands.add_parser('score', help="score a CSV, TSV or JSONL file of raw inputs")
+    score.add_argument('model', choices=list(MODEL_VARIANTS))
+    score.add_argument('input', type=Path)
+    score.add_argument('output', type=Path, help="predictions file, .csv or .jsonl")
+    score.add_argument('--variant', choices=MBTI_VARIANTS, default='optimized', help="MBTI variant (default: optimized)")
+    score.add_argument('--jobs', type=int, default=-1, help="worker processes, one interpreter each (default: all cores)")
+    score.add_argument('--chunk-size', type=int, help="rows per chunk (default: 1024)")
+    score.add_argument('--id-field', help="input field copied to the output (default: row number)")
+    score.add_argument('--text-field', default='posts', help="MBTI text field (default: posts)")
+    score.add_argument('--tflite', type=Path, help="model file (default: the shipped .tflite)")
+    score.set_defaults(handler=cmd_score)
+
+    serve = commands.add_parser('serve', help="serve trained models over a local HTTP JSON API")
+    serve.add_argument('models', nargs='*', metavar='model',
+                       help="any of the models listed by inspect (default: personality, mbti_optimized, "
+                            "bigfive_clustering)")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--max-batch-size', type=int, default=64, help="requests per micro-batch (default: 64)")
+    serve.add_argument('--max-delay-ms', type=float, default=5.0,
+                       help="longest a request waits for its batch to fill (default: 5)")
+    serve.add_argument('--watch', type=float, metavar='SECONDS',
+                       help="poll each params JSON this often and reload models that training rewrote")
+    serve.add_argument('--threads', type=int, default=1, help="TFLite threads per interpreter (default: 1)")
+    serve.add_argument('--text-field', default='posts', help="MBTI text field (default: posts)")
+    serve.set_defaults(handler=cmd_serve)
+
+    update = commands.add_parser('update', help="warm-start a trained model on newly collected labelled rows")
+    update.add_argument('model', choices=list(MODEL_VARIANTS))
+    update.add_argument('rows', type=Path, help="CSV, TSV or JSONL in the training data's columns")
+    update.add_argument('--variant', choices=MBTI_VARIANTS, default='optimized', help="MBTI variant (default: optimized)")
+    update.add_argument('--epochs', type=int, default=3, help="warm-start epochs (default: 3)")
+    update.add_argument('--lr-factor', type=float, default=0.1,
+                        help="learning rate relative to the saved optimizer's (default: 0.1)")
+    update.add_argument('--text-field', default='posts', help="MBTI text field (default: posts)")
+    update.add_argument('--compare-full', action='store_true',
+                        help="also train from scratch on old + new rows and record the accuracy gap")
+    update.set_defaults(handler=cmd_update)
+
+    sweep = commands.add_parser('sweep', help="successive-halving hyperparameter sweep; remaining arguments go to it")
+    sweep.add_argument('model', choices=['mbti_optimized', 'mbti_linear'])
+    sweep.add_argument('args', nargs=argparse.REMAINDER)
+    sweep.set_defaults(handler=cmd_sweep)
+
+    cv = commands.add_parser('cv', help="parallel stratified k-fold cross-validation; remaining arguments go to it")
+    cv.add_argument('model', choices=[f'mbti_{variant}' for variant in MBTI_VARIANTS])
+    cv.add_argument('args', nargs=argparse.REMAINDER)
+    cv.set_defaults(handler=cmd_cv)
+
+    bench = commands.add_parser('bench', help="run a benchmark; remaining arguments go to it")
+    bench.add_argument('benchmark', choices=list(BENCHMARKS))
+    bench.add_argument('args', nargs=argparse.REMAINDER)
+    bench.set_defaults(handler=cmd_bench)
+
+    cache = commands.add_parser('cache', help="inspect or trim the feature cache (training shards included)")
+    cache.add_argument('action', choices=['stats', 'evict', 'clear'])
+    cache.add_argument('--max-mb', type=float, default=1024, help="evict down to this size (default: 1024)")
+    cache.add_argument('--datasets', action='store_true', help="with clear: also delete the columnar dataset store")
+    cache.set_defaults(handler=cmd_cache)
+
+    inspect = commands.add_parser('inspect', help="summarize trained models from their params JSON")
+    inspect.add_argument('models', nargs='*', metavar='model', help=f"any of {', '.join(VARIANTS)} (default: all)")
+    inspect.set_defaults(handler=cmd_inspect)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -0,0 +1,104 @@
+import numpy as np
+from sklearn.metrics import pairwise_distances_argmin_min, silhouette_samples, silhouette_score
+
+SILHOUETTE_MODES = ('auto', 'exact', 'sampled', 'centroid')
+
+# Above this many rows 'auto' switches from the O(n^2) exact score to sampling
+EXACT_MAX_SAMPLES = 20000
+DEFAULT_SAMPLE_SIZE = 10000
+DEFAULT_N_BOOTSTRAP = 200
+DEFAULT_CONFIDENCE = 0.95
+
+
+def resolve_mode(mode, n_samples, exact_max_samples=EXACT_MAX_SAMPLES):
+    """Concrete scorer for a requested mode: 'auto' is exact on small inputs, sampled otherwise"""
+    if mode not in SILHOUETTE_MODES:
+        raise ValueError(f"Unknown silhouette mode {mode!r}, expected one of {SILHOUETTE_MODES}")
+    if mode == 'auto':
+        return 'exact' if n_samples <= exact_max_samples else 'sampled'
+    return mode
+
+
+def stratified_sample(labels, sample_size, rng):
+    """Row indices drawn from every cluster in proportion to its size, at least two per cluster"""
+    labels = np.asarray(labels)
+    clusters, counts = np.unique(labels, return_counts=True)
+    fraction = min(1.0, sample_size / len(labels))
+    indices = []
+    for cluster, count in zip(clusters, counts):
+        members = np.flatnonzero(labels == cluster)
+        take = min(count, max(2, int(round(count * fraction))))
+        indices.append(rng.choice(members, size=take, replace=False))
+    return np.sort(np.concatenate(indices))
+
+
+def exact_silhouette(features, labels):
+    return {'score': float(silhouette_score(features, labels))}
+
+
+def sampled_silhouette(features, labels, sample_size=DEFAULT_SAMPLE_SIZE, n_bootstrap=DEFAULT_N_BOOTSTRAP,
+                       confidence=DEFAULT_CONFIDENCE, random_state=42):
+    """Silhouette on a stratified subsample with a stratified bootstrap confidence interval
+
+    Per-point silhouettes are computed once on the subsample (O(sample_size^2));
+    the interval comes from resampling those values within each cluster, so
+    the bootstrap itself is cheap.
+    """
+    rng = np.random.default_rng(random_state)
+    sample = stratified_sample(labels, sample_size, rng)
+    sample_labels = np.asarray(labels)[sample]
+    values = silhouette_samples(features[sample], sample_labels)
+
+    strata = [np.flatnonzero(sample_labels == cluster) for cluster in np.unique(sample_labels)]
+    means = np.empty(n_bootstrap)
+    for b in range(n_bootstrap):
+        resampled = np.concatenate([rng.choice(stratum, size=len(stratum), replace=True) for stratum in strata])
+        means[b] = values[resampled].mean()
+
+    alpha = (1.0 - confidence) / 2
+    return {
+        'score': float(values.mean()),
+        'ci_low': float(np.quantile(means, alpha)),
+        'ci_high': float(np.quantile(means, 1.0 - alpha)),
+        'sample_size': int(len(sample)),
+        'confidence': confidence,
+    }
+
+
+def centroid_silhouette(features, labels, centers):
+    """Simplified silhouette: distances to the own and nearest other centroid, O(n*k)
+
+    Uses the fitted centroids in place of the mean intra- and inter-cluster
+    distances, so it never builds a pairwise distance matrix.
+    """
+    labels = np.asarray(labels)
+    centers = np.asarray(centers)
+    own = np.linalg.norm(features - centers[labels], axis=1)
+
+    # Nearest other centroid: mask each row's own centroid out of the search
+    nearest_other = np.full(len(features), np.inf)
+    for cluster in range(len(centers)):
+        others = np.delete(centers, cluster, axis=0)
+        members = labels == cluster
+        if members.any():
+            _, nearest_other[members] = pairwise_distances_argmin_min(features[members], others)
+
+    denom = np.maximum(own, nearest_other)
+    values = np.divide(nearest_other - own, denom, out=np.zeros_like(own), where=denom > 0)
+    return {'score': float(values.mean())}
+
+
+def score_clustering(features, labels, centers=None, mode='auto', sample_size=DEFAULT_SAMPLE_SIZE,
+                     n_bootstrap=DEFAULT_N_BOOTSTRAP, confidence=DEFAULT_CONFIDENCE, random_state=42):
+    """Cluster quality with the selected silhouette scorer, tagged with the mode that ran"""
+    resolved = resolve_mode(mode, len(features))
+    if resolved == 'exact':
+        result = exact_silhouette(features, labels)
+    elif resolved == 'sampled':
+        result = sampled_silhouette(features, labels, sample_size, n_bootstrap, confidence, random_state)
+    else:
+        if centers is None:
+            raise ValueError("Centroid silhouette needs the fitted cluster centers")
+        result = centroid_silhouette(features, labels, centers)
+    result['mode'] = resolved
+    return result
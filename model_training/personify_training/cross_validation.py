@@ -0,0 +1,237 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .feature_cache import FeatureCache, content_key
+from .hparam_sweep import cap_tensorflow_threads
+from .paths import BENCHMARK_DIR, FEATURE_CACHE_DIR, MBTI_CSV, TRAINING_DIR
+
+N_FOLDS = 5
+SPLIT_SEED = 42
+EARLY_STOPPING_SIZE = 0.1  # Part of each fold's training rows held out for early stopping
+BATCH_SIZE = 128
+METRICS = ('accuracy', 'top_3_accuracy', 'macro_f1', 'log_loss')
+
+
+# Each MBTI trainer's data loading, vectorizer fit and model. Feature width,
+# epochs and early-stopping patience come from the trainer module's own
+# constants (MAX_FEATURES, EPOCHS, EARLY_STOPPING_PATIENCE). The vectorizer
+# functions cache their fit by the texts they are given, so every fold's fit
+# is cached separately.
+CV_MODELS = {
+    'mbti_base': {
+        'module': 'train_mbti_model',
+        'texts': lambda module: module.load_and_preprocess_data(str(MBTI_CSV)),
+        'vectorize': lambda module, texts: module.create_tfidf_features(texts, max_features=module.MAX_FEATURES),
+        'builder': 'create_linear_model',
+    },
+    'mbti_linear': {
+        'module': 'train_mbti_linear_model',
+        'texts': lambda module: module.load_and_preprocess_data(str(MBTI_CSV)),
+        'vectorize': lambda module, texts: module.create_tfidf_features(texts, max_features=module.MAX_FEATURES),
+        'builder': 'create_linear_model',
+    },
+    'mbti_optimized': {
+        'module': 'train_mbti_optimized_model',
+        'texts': lambda module: module.load_and_preprocess_data(
+            str(MBTI_CSV), use_full_dataset=False, max_samples_per_class=module.MAX_SAMPLES_PER_CLASS, n_jobs=-1),
+        'vectorize': lambda module, texts: module.create_advanced_tfidf_features(texts,
+                                                                                 max_features=module.MAX_FEATURES),
+        'builder': 'create_optimized_model',
+    },
+}
+
+# Per-worker state, set once by the pool initializer instead of pickled per task
+_worker = None
+
+
+def _init_worker(name, texts, y, threads):
+    global _worker
+    cap_tensorflow_threads(threads)
+    _worker = {'name': name, 'texts': texts, 'y': y}
+
+
+def fold_features(name, module, texts, train_rows, eval_rows):
+    """Vectorizer fitted on the fold's training rows only, and both sides of the fold transformed
+
+    The fit goes through the trainer's own cached vectorizer function; the
+    held-out transform is cached here under the same fold.
+    """
+    train_texts = [texts[i] for i in train_rows]
+    eval_texts = [texts[i] for i in eval_rows]
+    X_train, vectorizer = CV_MODELS[name]['vectorize'](module, train_texts)
+
+    cache = FeatureCache(FEATURE_CACHE_DIR)
+    cache_key = content_key('cv_eval_features', train_texts, eval_texts, vectorizer=vectorizer.get_params())
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return X_train, cached['features']
+    X_eval = vectorizer.transform(eval_texts)
+    cache.put(cache_key, {'features': X_eval})
+    return X_train, X_eval
+
+
+def fold_metrics(y_true, probabilities, num_classes):
+    from sklearn.metrics import f1_score, log_loss, top_k_accuracy_score
+
+    labels = np.arange(num_classes)
+    return {
+        'accuracy': float(np.mean(np.argmax(probabilities, axis=1) == y_true)),
+        'top_3_accuracy': float(top_k_accuracy_score(y_true, probabilities, k=3, labels=labels)),
+        'macro_f1': float(f1_score(y_true, np.argmax(probabilities, axis=1), labels=labels, average='macro',
+                                   zero_division=0)),
+        'log_loss': float(log_loss(y_true, np.clip(probabilities, 1e-7, 1.0), labels=labels)),
+    }
+
+
+def run_fold(fold, train_rows, eval_rows):
+    """Featurize, train and score one fold; early stopping never sees the fold's held-out rows"""
+    import tensorflow as tf
+    from sklearn.model_selection import train_test_split
+    from sklearn.utils.class_weight import compute_class_weight
+
+    from .sparse_batches import CSRBatchSequence
+
+    name, texts, y = _worker['name'], _worker['texts'], _worker['y']
+    spec = CV_MODELS[name]
+    module = importlib.import_module(spec['module'])
+    num_classes = int(y.max()) + 1
+
+    start = time.perf_counter()
+    X_fold, X_eval = fold_features(name, module, texts, train_rows, eval_rows)
+    y_fold, y_eval = y[train_rows], y[eval_rows]
+    featurize_seconds = time.perf_counter() - start
+
+    X_train, X_stop, y_train, y_stop = train_test_split(X_fold, y_fold, test_size=EARLY_STOPPING_SIZE,
+                                                        random_state=SPLIT_SEED, stratify=y_fold)
+    weights = compute_class_weight('balanced', classes=np.arange(num_classes), y=y_train)
+
+    tf.keras.utils.set_random_seed(SPLIT_SEED + fold)
+    model = getattr(module, spec['builder'])(X_train.shape[1], num_classes)
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_accuracy', patience=module.EARLY_STOPPING_PATIENCE,
+                                                      restore_best_weights=True, min_delta=0.001)
+    train_start = time.perf_counter()
+    history = model.fit(
+        CSRBatchSequence(X_train, y_train, batch_size=BATCH_SIZE, shuffle=True,
+                         class_weight=dict(enumerate(weights)), seed=SPLIT_SEED + fold),
+        validation_data=CSRBatchSequence(X_stop, y_stop, batch_size=BATCH_SIZE),
+        epochs=module.EPOCHS,
+        callbacks=[early_stopping],
+        verbose=0
+    )
+    train_seconds = time.perf_counter() - train_start
+
+    probabilities = model.predict(CSRBatchSequence(X_eval, batch_size=BATCH_SIZE), verbose=0)
+    return dict(fold_metrics(y_eval, probabilities, num_classes), fold=fold, eval_rows=len(eval_rows),
+                epochs=len(history.history['loss']), featurize_seconds=featurize_seconds,
+                train_seconds=train_seconds)
+
+
+def summarize(folds):
+    """Mean, standard deviation and variance of every metric across folds (sample statistics)"""
+    summary = {}
+    for metric in METRICS:
+        values = np.array([fold[metric] for fold in folds])
+        ddof = 1 if len(values) > 1 else 0
+        summary[metric] = {'mean': float(values.mean()), 'std': float(values.std(ddof=ddof)),
+                           'variance': float(values.var(ddof=ddof)), 'min': float(values.min()),
+                           'max': float(values.max())}
+    return summary
+
+
+def single_split_accuracy(name):
+    """Test accuracy the trained model recorded on its one 80/20 split, if its params are on disk"""
+    from .model_variants import load_params
+
+    try:
+        return load_params(name).get('test_accuracy')
+    except (OSError, ValueError):
+        return None
+
+
+def cross_validate(name, n_folds=N_FOLDS, n_jobs=-1):
+    """Stratified k-fold over the trainer's sampled texts, folds trained concurrently
+
+    Each fold refits the vectorizer on its own training rows, so no
+    vocabulary or IDF statistic leaks from the held-out rows. Folds run in
+    spawned worker processes with an equal share of the cores each.
+    """
+    from sklearn.model_selection import StratifiedKFold
+    from sklearn.preprocessing import LabelEncoder
+
+    spec = CV_MODELS[name]
+    if str(TRAINING_DIR) not in sys.path:
+        sys.path.insert(0, str(TRAINING_DIR))
+    module = importlib.import_module(spec['module'])
+    texts, labels = spec['texts'](module)
+    texts = list(texts)
+    y = LabelEncoder().fit_transform(labels)
+    splits = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=SPLIT_SEED).split(texts, y))
+
+    cpu_count = os.cpu_count() or 1
+    n_jobs = min(n_jobs if n_jobs and n_jobs > 0 else cpu_count, n_folds)
+    threads = max(1, cpu_count // n_jobs)
+    print(f"{n_folds}-fold cross-validation of {name} on {len(texts)} samples across {n_jobs} processes "
+          f"({threads} TensorFlow threads each)")
+
+    context = multiprocessing.get_context('spawn')  # TensorFlow is not fork-safe
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context, initializer=_init_worker,
+                             initargs=(name, texts, y, threads)) as executor:
+        futures = [executor.submit(run_fold, fold, train_rows, eval_rows)
+                   for fold, (train_rows, eval_rows) in enumerate(splits)]
+        folds = []
+        for future in futures:
+            folds.append(future.result())
+            fold = folds[-1]
+            print(f"  Fold {fold['fold'] + 1}: accuracy {fold['accuracy']:.4f}, top-3 {fold['top_3_accuracy']:.4f}, "
+                  f"macro F1 {fold['macro_f1']:.4f} ({fold['epochs']} epochs, "
+                  f"{fold['featurize_seconds'] + fold['train_seconds']:.1f}s)")
+    return folds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel stratified k-fold cross-validation of an MBTI model")
+    parser.add_argument('model', choices=list(CV_MODELS))
+    parser.add_argument('--folds', type=int, default=N_FOLDS, help="number of folds (default: 5)")
+    parser.add_argument('--jobs', type=int, default=-1, help="worker processes (default: one per fold, up to all cores)")
+    args = parser.parse_args(argv)
+    if args.folds < 2:
+        parser.error("--folds must be at least 2")
+
+    print(f"=== Cross-validation: {args.model} ===")
+    start = time.perf_counter()
+    folds = cross_validate(args.model, n_folds=args.folds, n_jobs=args.jobs)
+    summary = summarize(folds)
+    wall_seconds = time.perf_counter() - start
+
+    print(f"\n{'Metric':<16} {'Mean':>8} {'Std':>8} {'Variance':>10} {'Min':>8} {'Max':>8}")
+    for metric, stats in summary.items():
+        print(f"{metric:<16} {stats['mean']:>8.4f} {stats['std']:>8.4f} {stats['variance']:>10.6f} "
+              f"{stats['min']:>8.4f} {stats['max']:>8.4f}")
+    single_split = single_split_accuracy(args.model)
+    if single_split is not None:
+        accuracy = summary['accuracy']
+        print(f"\nSingle-split test accuracy {single_split:.4f} vs {args.folds}-fold "
+              f"{accuracy['mean']:.4f} ± {accuracy['std']:.4f}")
+    fold_seconds = sum(f['featurize_seconds'] + f['train_seconds'] for f in folds)
+    print(f"\n{args.folds} folds in {wall_seconds:.1f}s wall ({fold_seconds:.1f}s of fold time)")
+
+    results_path = BENCHMARK_DIR / f"cv_{args.model}.json"
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, 'w') as f:
+        json.dump({'model': args.model, 'folds': folds, 'summary': summary, 'n_folds': args.folds,
+                   'single_split_test_accuracy': single_split,
+                   'wall_seconds': wall_seconds, 'created_timestamp': time.time()}, f, indent=2)
+    print(f"✓ Results saved: {results_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from .paths import DATASET_STORE_DIR
+
+# Columnar copies of the raw training CSVs, one directory per source content hash
+STORE_DIR = DATASET_STORE_DIR
+
+STORE_VERSION = 2
+INGEST_CHUNK_SIZE = 100000
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_content_hash(csv_path):
+    """SHA-256 of the file contents, memoized on (size, mtime) so unchanged files are not rehashed"""
+    csv_path = Path(csv_path).resolve()
+    stat = csv_path.stat()
+    index_path = STORE_DIR / 'hash_index.json'
+
+    index = {}
+    if index_path.exists():
+        with open(index_path) as f:
+            index = json.load(f)
+
+    entry = index.get(str(csv_path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    digest = hashlib.sha256()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+
+    index[str(csv_path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return digest.hexdigest()
+
+
+class DatasetStore:
+    """Read-only view over an ingested dataset
+
+    Numeric columns are ``<column>.npy`` files opened with ``mmap_mode='r'``,
+    text columns live in ``text.parquet`` and are read through a memory map,
+    so only the projected columns are ever touched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json') as f:
+            self.meta = json.load(f)
+        self.n_rows = self.meta['n_rows']
+        self.numeric_columns = self.meta['numeric_columns']
+        self.text_columns = self.meta['text_columns']
+        self.columns = self.meta['columns']
+
+    def numeric(self, column):
+        """Zero-copy memory map of a numeric column"""
+        return np.load(self.path / self.meta['numeric_files'][column], mmap_mode='r')
+
+    def text(self, columns):
+        """Arrow table holding the requested text columns"""
+        import pyarrow.parquet as pq
+        return pq.read_table(self.path / 'text.parquet', columns=list(columns), memory_map=True)
+
+    def _project(self, columns):
+        columns = self.columns if columns is None else list(columns)
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            raise KeyError(f"Columns not in dataset store: {missing}")
+        return columns
+
+    def _text_batches(self, text_cols, chunksize):
+        """Record batches of the text columns, decoded one batch at a time"""
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(self.path / 'text.parquet', memory_map=True)
+        return parquet.iter_batches(batch_size=chunksize, columns=text_cols)
+
+    def iter_frames(self, columns=None, chunksize=INGEST_CHUNK_SIZE, nrows=None):
+        """Yield DataFrames of at most chunksize rows, copying only the current block
+
+        Text columns are streamed from the Parquet file batch by batch, so a
+        full text column is never decoded at once; frames follow the text
+        batches, which can be shorter than chunksize at row-group ends.
+        """
+        import pandas as pd
+
+        columns = self._project(columns)
+        n_rows = self.n_rows if nrows is None else min(nrows, self.n_rows)
+        arrays = {col: self.numeric(col) for col in columns if col in self.numeric_columns}
+        text_cols = [col for col in columns if col in self.text_columns]
+
+        if not text_cols:
+            for start in range(0, n_rows, chunksize):
+                stop = min(start + chunksize, n_rows)
+                yield pd.DataFrame({col: np.array(arr[start:stop]) for col, arr in arrays.items()}, columns=columns)
+            return
+
+        start = 0
+        for batch in self._text_batches(text_cols, chunksize):
+            if start >= n_rows:
+                break
+            batch = batch.slice(0, n_rows - start)
+            stop = start + batch.num_rows
+            data = {col: np.array(arr[start:stop]) for col, arr in arrays.items()}
+            data.update({col: batch.column(col).to_numpy(zero_copy_only=False) for col in text_cols})
+            yield pd.DataFrame(data, columns=columns)
+            start = stop
+
+    def to_frame(self, columns=None, nrows=None):
+        """Materialize the projected columns as one DataFrame"""
+        import pandas as pd
+
+        columns = self._project(columns)
+        n_rows = self.n_rows if nrows is None else min(nrows, self.n_rows)
+        data = {col: np.array(self.numeric(col)[:n_rows]) for col in columns if col in self.numeric_columns}
+        text_cols = [col for col in columns if col in self.text_columns]
+        if text_cols:
+            block = self.text(text_cols).slice(0, n_rows).to_pandas()
+            data.update({col: block[col].to_numpy() for col in text_cols})
+        return pd.DataFrame(data, columns=columns)
+
+
+def _store_path(csv_path, sep, numeric_dtype):
+    """Store directory keyed by the source content hash and the ingest settings"""
+    content_hash = file_content_hash(csv_path)
+    config = f"v{STORE_VERSION}|sep={sep!r}|dtype={np.dtype(numeric_dtype).name}"
+    config_hash = hashlib.md5(config.encode()).hexdigest()[:8]
+    return STORE_DIR / f"{Path(csv_path).stem}-{content_hash[:16]}-{config_hash}"
+
+
+def _column_kinds(csv_path, sep, chunksize):
+    """(columns, numeric_columns) from a parse of the whole file
+
+    A column is numeric only if pandas parses it as a non-boolean number in
+    every chunk, so a stray string deep in the file keeps it a text column
+    instead of being coerced to NaN.
+    """
+    import pandas as pd
+
+    columns, numeric = None, None
+    for chunk in pd.read_csv(csv_path, sep=sep, chunksize=chunksize):
+        if columns is None:
+            columns = chunk.columns.tolist()
+            numeric = set(columns)
+        numeric = {col for col in numeric
+                   if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col])}
+    if columns is None:
+        columns = pd.read_csv(csv_path, sep=sep, nrows=0).columns.tolist()
+        numeric = set()
+    return columns, [col for col in columns if col in numeric]
+
+
+def ingest_csv(csv_path, sep=',', numeric_dtype=np.float64, chunksize=INGEST_CHUNK_SIZE):
+    """Convert a CSV into a columnar store once; later calls return the existing store"""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    store_path = _store_path(csv_path, sep, numeric_dtype)
+    if (store_path / 'meta.json').exists():
+        return DatasetStore(store_path)
+
+    print(f"Converting {csv_path} to columnar store (one-time)...")
+
+    # Decide column kinds over the whole file, then keep them fixed for every chunk
+    columns, numeric_columns = _column_kinds(csv_path, sep, chunksize)
+    text_columns = [col for col in columns if col not in numeric_columns]
+
+    tmp_path = store_path.with_name(store_path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    # Numeric columns are appended as raw binary, then wrapped as .npy once the row count is known
+    numeric_files = {col: f"col{i:03d}.npy" for i, col in enumerate(columns) if col in numeric_columns}
+    raw_handles = {col: open(tmp_path / (numeric_files[col] + '.raw'), 'wb') for col in numeric_columns}
+    text_schema = pa.schema([(col, pa.large_string()) for col in text_columns])
+    text_writer = pq.ParquetWriter(tmp_path / 'text.parquet', text_schema) if text_columns else None
+
+    n_rows = 0
+    try:
+        reader = pd.read_csv(csv_path, sep=sep, chunksize=chunksize,
+                             dtype={col: 'string' for col in text_columns})
+        for chunk in reader:
+            for col in numeric_columns:
+                # Every chunk parsed this column as numbers, so nothing is coerced here
+                values = pd.to_numeric(chunk[col]).to_numpy(dtype=numeric_dtype, na_value=np.nan)
+                raw_handles[col].write(values.tobytes())
+            if text_writer is not None:
+                text_writer.write_table(pa.Table.from_pandas(chunk[text_columns], schema=text_schema,
+                                                             preserve_index=False))
+            n_rows += len(chunk)
+    finally:
+        for handle in raw_handles.values():
+            handle.close()
+        if text_writer is not None:
+            text_writer.close()
+
+    for col in numeric_columns:
+        raw_path = tmp_path / (numeric_files[col] + '.raw')
+        target = np.lib.format.open_memmap(tmp_path / numeric_files[col], mode='w+',
+                                           dtype=numeric_dtype, shape=(n_rows,))
+        if n_rows:
+            target[:] = np.memmap(raw_path, dtype=numeric_dtype, mode='r', shape=(n_rows,))
+        target.flush()
+        del target
+        raw_path.unlink()
+
+    meta = {
+        'version': STORE_VERSION,
+        'source': str(Path(csv_path).resolve()),
+        'source_sha256': file_content_hash(csv_path),
+        'sep': sep,
+        'n_rows': n_rows,
+        'columns': columns,
+        'numeric_columns': numeric_columns,
+        'numeric_dtype': np.dtype(numeric_dtype).name,
+        'numeric_files': numeric_files,
+        'text_columns': text_columns,
+    }
+    with open(tmp_path / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # Publish atomically so an interrupted conversion is never picked up
+    if store_path.exists():
+        shutil.rmtree(store_path)
+    os.replace(tmp_path, store_path)
+    print(f"✓ Columnar store ready: {store_path} ({n_rows} rows, "
+          f"{len(numeric_columns)} numeric / {len(text_columns)} text columns)")
+    return DatasetStore(store_path)
+
+
+def open_dataset(csv_path, sep=',', numeric_dtype=np.float64):
+    """Columnar store for csv_path, or None when pyarrow is not installed"""
+    try:
+        return ingest_csv(csv_path, sep=sep, numeric_dtype=numeric_dtype)
+    except ImportError:
+        print("pyarrow not installed, reading the raw CSV instead of the columnar store")
+        return None
+
+
+def load_columns(csv_path, columns=None, sep=',', numeric_dtype=np.float64):
+    """Load the projected columns of csv_path, through the columnar store when available"""
+    store = open_dataset(csv_path, sep=sep, numeric_dtype=numeric_dtype)
+    if store is None:
+        import pandas as pd
+        return pd.read_csv(csv_path, sep=sep, usecols=columns)
+    return store.to_frame(columns)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .dataset_store import file_content_hash
+from .paths import FEATURE_CACHE_DIR
+
+CACHE_ROOT = FEATURE_CACHE_DIR
+DEFAULT_MAX_BYTES = 8 * 1024 ** 3  # 8 GB disk budget before LRU eviction
+
+
+def _update_digest(digest, value):
+    """Feed a value into a hash in a type-tagged, unambiguous way"""
+    if isinstance(value, Path):
+        digest.update(b'file:' + file_content_hash(value).encode())
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8', 'surrogatepass')
+        digest.update(b'str:%d:' % len(encoded) + encoded)
+    elif isinstance(value, bytes):
+        digest.update(b'bytes:%d:' % len(value) + value)
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        digest.update(f'ndarray:{value.dtype.str}:{value.shape}:'.encode())
+        digest.update(np.ascontiguousarray(value).data)
+    elif hasattr(value, 'tocsr') and hasattr(value, 'indptr'):
+        csr = value.tocsr()
+        digest.update(f'csr:{csr.shape}:'.encode())
+        for part in (csr.data, csr.indices, csr.indptr):
+            _update_digest(digest, part)
+    elif isinstance(value, dict):
+        digest.update(b'dict:')
+        digest.update(json.dumps(value, sort_keys=True, default=repr).encode())
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        digest.update(b'seq:%d:' % len(value))
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(f'{type(value).__name__}:{value!r}'.encode())
+
+
+def content_key(namespace, *inputs, **params):
+    """Cache key from the content of every input plus every preprocessing parameter"""
+    digest = hashlib.sha256()
+    for value in inputs:
+        _update_digest(digest, value)
+    _update_digest(digest, params)
+    return f"{namespace}-{digest.hexdigest()[:24]}"
+
+
+class FeatureCache:
+    """Content-addressed on-disk cache with a size budget and LRU eviction
+
+    Every entry is a directory holding one file per value: dense numeric
+    arrays as ``.npy`` (loaded memory-mapped), CSR matrices as their three
+    component arrays, and anything else (vectorizers, label lists) as pickle.
+    Entries are written to a temporary directory and renamed into place, so
+    readers never see a partial write. Access time is tracked through the
+    mtime of each entry's ``entry.json``.
+    """
+
+    def __init__(self, root=CACHE_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def _entry_path(self, key):
+        return self.root / key
+
+    def get(self, key):
+        """Return the cached dict of values for key, or None on a miss"""
+        entry = self._entry_path(key)
+        meta_path = entry / 'entry.json'
+        if not meta_path.exists():
+            self.misses += 1
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        values = {}
+        for name, spec in meta['values'].items():
+            if spec['kind'] == 'ndarray':
+                values[name] = np.load(entry / spec['file'], mmap_mode='r')
+            elif spec['kind'] == 'csr':
+                from scipy.sparse import csr_matrix
+                parts = [np.load(entry / spec['files'][part], mmap_mode='r')
+                         for part in ('data', 'indices', 'indptr')]
+                values[name] = csr_matrix(tuple(parts), shape=tuple(spec['shape']), copy=False)
+            else:
+                with open(entry / spec['file'], 'rb') as f:
+                    values[name] = pickle.load(f)
+
+        os.utime(meta_path)  # Mark as recently used
+        self.hits += 1
+        return values
+
+    def put(self, key, values):
+        """Atomically store a dict of values under key, then enforce the size budget"""
+        entry = self._entry_path(key)
+        tmp = self.root / f".{key}.{os.getpid()}.tmp"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir()
+
+        specs = {}
+        for i, (name, value) in enumerate(values.items()):
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                specs[name] = {'kind': 'ndarray', 'file': f'v{i}.npy'}
+                np.save(tmp / specs[name]['file'], value)
+            elif hasattr(value, 'tocsr') and hasattr(value, 'indptr'):
+                csr = value.tocsr()
+                files = {part: f'v{i}_{part}.npy' for part in ('data', 'indices', 'indptr')}
+                for part, filename in files.items():
+                    np.save(tmp / filename, getattr(csr, part))
+                specs[name] = {'kind': 'csr', 'files': files, 'shape': list(csr.shape)}
+            else:
+                specs[name] = {'kind': 'pickle', 'file': f'v{i}.pkl'}
+                with open(tmp / specs[name]['file'], 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with open(tmp / 'entry.json', 'w') as f:
+            json.dump({'key': key, 'created': time.time(), 'values': specs}, f, indent=2)
+
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(tmp, entry)
+        self.evict()
+        return values
+
+    def entries(self):
+        """(last_access, size_bytes, path) for every complete entry"""
+        result = []
+        for entry in self.root.iterdir():
+            meta_path = entry / 'entry.json'
+            if entry.name.startswith('.') or not meta_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            result.append((meta_path.stat().st_mtime, size, entry))
+        return result
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits the budget"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+        return total
+
+    def clear(self):
+        return self.evict(max_bytes=0)
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'evicted_mb': self.evicted_bytes / (1024 * 1024),
+            'entries': len(entries),
+            'size_mb': sum(size for _, size, _ in entries) / (1024 * 1024),
+            'budget_mb': self.max_bytes / (1024 * 1024),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Feature cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['evictions']} evictions ({stats['evicted_mb']:.1f} MB), "
+              f"{stats['entries']} entries using {stats['size_mb']:.1f} / {stats['budget_mb']:.0f} MB")
+        return stats
@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_selection import chi2, mutual_info_classif
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import top_k_accuracy_score
+from sklearn.preprocessing import normalize
+
+SELECTION_METHODS = ('chi2', 'mutual_info', 'l1')
+
+
+def _l1_penalty():
+    """Pure L1 LogisticRegression arguments for the installed scikit-learn
+
+    From 1.8 the penalty is set by l1_ratio alone and `penalty` is deprecated
+    (removed in 1.10); before that, l1_ratio is ignored unless the penalty
+    is 'elasticnet'.
+    """
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split('.')[:2])
+    if (major, minor) >= (1, 8):
+        return {'l1_ratio': 1.0}
+    return {'penalty': 'l1'}
+
+
+def feature_scores(X, y, method='chi2', l1_C=0.5, random_state=42):
+    """Per-column relevance of a sparse non-negative feature matrix to the labels"""
+    if method == 'chi2':
+        scores, _ = chi2(X, y)
+    elif method == 'mutual_info':
+        # Term presence as a discrete feature: MI over raw TF-IDF values would
+        # treat every distinct weight as its own category
+        presence = (X > 0).astype(np.int8)
+        scores = mutual_info_classif(presence, y, discrete_features=True, random_state=random_state)
+    elif method == 'l1':
+        model = LogisticRegression(C=l1_C, solver='saga', max_iter=200, random_state=random_state,
+                                   **_l1_penalty())
+        model.fit(X, y)
+        scores = np.abs(model.coef_).max(axis=0)
+    else:
+        raise ValueError(f"Unknown selection method {method!r}, expected one of {SELECTION_METHODS}")
+    return np.nan_to_num(np.asarray(scores, dtype=np.float64))
+
+
+def rank_features(X, y, method='chi2', **kwargs):
+    """Column indices ordered from most to least relevant (stable for ties)"""
+    start = time.time()
+    scores = feature_scores(X, y, method, **kwargs)
+    ranking = np.argsort(-scores, kind='stable')
+    print(f"Ranked {X.shape[1]} features by {method} in {time.time() - start:.2f} seconds")
+    return ranking
+
+
+def reduce_features(X, columns, norm='l2'):
+    """Keep the given columns and renormalize rows
+
+    TF-IDF rows are normalized after weighting, so slicing and renormalizing
+    gives exactly what the reduced vectorizer's transform() produces.
+    """
+    reduced = X[:, columns]
+    return normalize(reduced, norm=norm, copy=False) if norm else reduced
+
+
+def linear_probe_top_k(X_train, y_train, X_eval, y_eval, k=3, random_state=42):
+    """Top-k accuracy of a fast sparse linear model, the cheap stand-in for a full training run"""
+    probe = SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=20, tol=None, random_state=random_state)
+    probe.fit(X_train, y_train)
+    return float(top_k_accuracy_score(y_eval, probe.predict_proba(X_eval), k=k, labels=probe.classes_))
+
+
+def width_curve(X_train, y_train, X_eval, y_eval, ranking, widths, norm='l2', k=3):
+    """Probe top-k accuracy for each candidate input width, widest last"""
+    curve = []
+    for width in sorted(set(min(w, len(ranking)) for w in widths)):
+        columns = np.sort(ranking[:width])
+        accuracy = linear_probe_top_k(
+            reduce_features(X_train, columns, norm), y_train,
+            reduce_features(X_eval, columns, norm), y_eval, k=k
+        )
+        curve.append({'width': int(width), f'top_{k}_accuracy': accuracy})
+        print(f"  • {width:>6} features: top-{k} accuracy {accuracy:.4f}")
+    return curve
+
+
+def select_width(curve, tolerance, k=3):
+    """Smallest width whose accuracy is within tolerance of the widest point on the curve"""
+    metric = f'top_{k}_accuracy'
+    reference = curve[-1][metric]
+    for point in curve:
+        if point[metric] >= reference - tolerance:
+            return point['width']
+    return curve[-1]['width']
+
+
+def reduce_vectorizer(vectorizer, columns):
+    """Fitted TfidfVectorizer restricted to the given columns, renumbered in column order"""
+    if not isinstance(vectorizer, TfidfVectorizer):
+        raise ValueError("Feature selection needs a vocabulary (TfidfVectorizer); hashed features cannot be pruned")
+
+    columns = np.asarray(columns)
+    new_index = {int(old): new for new, old in enumerate(columns)}
+    vocabulary = {term: new_index[col] for term, col in vectorizer.vocabulary_.items() if col in new_index}
+
+    # A fixed vocabulary plus the original idf weights, no refit over the corpus
+    params = vectorizer.get_params()
+    params.update(vocabulary=vocabulary, max_features=None)
+    reduced = TfidfVectorizer(**params)
+    reduced.idf_ = vectorizer.idf_[columns]
+    return reduced
@@ -0,0 +1,313 @@
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+SHARD_FORMATS = ('tfrecord', 'npz')
+ROWS_PER_SHARD = 2048
+SHUFFLE_BUFFER = 8192  # Rows, kept sparse until batching
+CYCLE_LENGTH = 4       # Shards read concurrently when shuffling
+MANIFEST = 'manifest.json'
+
+# TensorFlow is imported inside the functions that build or feed a pipeline,
+# so NPZ shards can be written without it.
+
+
+def transform_chunks(transform, texts, labels, rows=ROWS_PER_SHARD):
+    """(features, labels) blocks featurized a block of texts at a time, for write_shards"""
+    labels = np.asarray(labels)
+    for start in range(0, len(labels), rows):
+        yield transform(texts[start:start + rows]), labels[start:start + rows]
+
+
+def _write_npz(path, features, labels):
+    np.savez(path, data=features.data.astype(np.float32), indices=features.indices.astype(np.int64),
+             indptr=features.indptr.astype(np.int64), labels=labels.astype(np.int64))
+
+
+def _write_tfrecord(path, features, labels):
+    import tensorflow as tf
+
+    with tf.io.TFRecordWriter(str(path)) as writer:
+        for row, label in enumerate(labels):
+            start, end = features.indptr[row], features.indptr[row + 1]
+            example = tf.train.Example(features=tf.train.Features(feature={
+                'indices': tf.train.Feature(int64_list=tf.train.Int64List(value=features.indices[start:end])),
+                'values': tf.train.Feature(float_list=tf.train.FloatList(value=features.data[start:end])),
+                'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)])),
+            }))
+            writer.write(example.SerializeToString())
+
+
+def write_shards(chunks, out_dir, fmt='tfrecord'):
+    """Write (features, labels) chunks as one sparse shard each, plus a manifest
+
+    Chunks can come from a featurizer transforming its input a block at a
+    time, so the full feature matrix never has to exist in memory. Rows are
+    stored sparse (column indices and values), which for TF-IDF is a small
+    fraction of the dense size. Shards go to a temporary directory renamed
+    into place once the manifest is written, so a reader never sees a partial
+    set.
+    """
+    if fmt not in SHARD_FORMATS:
+        raise ValueError(f"Unknown shard format {fmt!r}, expected one of {SHARD_FORMATS}")
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    shards, n_features, n_rows, label_counts = [], None, 0, np.zeros(0, dtype=np.int64)
+    for index, (features, labels) in enumerate(chunks):
+        features = sp.csr_matrix(features)
+        labels = np.asarray(labels)
+        if n_features is not None and features.shape[1] != n_features:
+            raise ValueError(f"Chunk {index} has {features.shape[1]} features, expected {n_features}")
+        n_features = features.shape[1]
+        name = f"shard-{index:05d}.{fmt}"
+        (_write_npz if fmt == 'npz' else _write_tfrecord)(tmp_dir / name, features, labels)
+        shards.append({'file': name, 'rows': int(features.shape[0])})
+        n_rows += features.shape[0]
+        counts = np.bincount(labels.astype(np.int64), minlength=len(label_counts))
+        label_counts = np.pad(label_counts, (0, len(counts) - len(label_counts))) + counts
+
+    manifest = {'format': fmt, 'n_rows': n_rows, 'n_features': n_features, 'shards': shards,
+                'label_counts': label_counts.tolist(), 'created_timestamp': time.time()}
+    with open(tmp_dir / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+def read_manifest(shard_dir):
+    with open(Path(shard_dir) / MANIFEST, 'r') as f:
+        return json.load(f)
+
+
+def cached_shards(cache, key, chunks, fmt='tfrecord'):
+    """Shard directory for key in a FeatureCache, written from chunks only if there is no complete set yet
+
+    The shard set is an entry of the cache like any other: its entry.json
+    marks it complete and records its last use, so shards count toward the
+    cache budget, are evicted least recently used first and go with
+    ``cache clear``. chunks is only consumed when the shards are written.
+    """
+    shard_dir = cache.root / key
+    entry_path = shard_dir / 'entry.json'
+    if entry_path.exists() and read_manifest(shard_dir)['format'] == fmt:
+        os.utime(entry_path)  # Mark as recently used
+        cache.hits += 1
+        print(f"Reusing {fmt} shards: {shard_dir}")
+        return shard_dir
+    cache.misses += 1
+    start = time.time()
+    manifest = write_shards(chunks, shard_dir, fmt)
+    with open(entry_path, 'w') as f:
+        json.dump({'key': key, 'created': manifest['created_timestamp'], 'values': {}}, f, indent=2)
+    print(f"Wrote {len(manifest['shards'])} {fmt} shards ({manifest['n_rows']} rows) in "
+          f"{time.time() - start:.1f}s: {shard_dir}")
+    cache.evict()
+    return shard_dir
+
+
+def _read_npz(path, n_features):
+    with np.load(path) as shard:
+        labels = shard['labels']
+        features = sp.csr_matrix((shard['data'], shard['indices'], shard['indptr']), shape=(len(labels), n_features))
+    return features, labels
+
+
+def _read_tfrecord(path, n_features):
+    indices, values, labels, indptr = [], [], [], [0]
+    for row_indices, row_values, label in _tfrecord_shard(str(path)).as_numpy_iterator():
+        indices.append(row_indices)
+        values.append(row_values)
+        labels.append(label)
+        indptr.append(indptr[-1] + len(row_indices))
+    features = sp.csr_matrix((np.concatenate(values) if values else np.empty(0, np.float32),
+                              np.concatenate(indices) if indices else np.empty(0, np.int64), indptr),
+                             shape=(len(labels), n_features))
+    return features, np.asarray(labels, dtype=np.int64)
+
+
+def read_shards(shard_dir, max_rows=None):
+    """(CSR features, labels) of a shard directory in written order, or of its first max_rows rows
+
+    For the parts of a split that are needed in memory: calibration rows
+    and the held-out split for TFLite parity checks. Whole shards are read,
+    so only the shards covering max_rows are opened.
+    """
+    manifest = read_manifest(shard_dir)
+    read_shard = _read_npz if manifest['format'] == 'npz' else _read_tfrecord
+    blocks, labels, n_rows = [], [], 0
+    for shard in manifest['shards']:
+        if max_rows is not None and n_rows >= max_rows:
+            break
+        features, shard_labels = read_shard(Path(shard_dir) / shard['file'], manifest['n_features'])
+        blocks.append(features)
+        labels.append(shard_labels)
+        n_rows += len(shard_labels)
+    if not blocks:
+        return sp.csr_matrix((0, manifest['n_features']), dtype=np.float32), np.empty(0, dtype=np.int64)
+    features, labels = sp.vstack(blocks, format='csr'), np.concatenate(labels)
+    if max_rows is not None:
+        features, labels = features[:max_rows], labels[:max_rows]
+    return features, labels
+
+
+def shard_labels(shard_dir):
+    """Labels of every row of a shard directory, in written order, without decoding the features"""
+    manifest = read_manifest(shard_dir)
+    files = [Path(shard_dir) / shard['file'] for shard in manifest['shards']]
+    if manifest['format'] == 'npz':
+        labels = []
+        for path in files:
+            with np.load(path) as shard:
+                labels.append(shard['labels'])
+        return np.concatenate(labels) if labels else np.empty(0, dtype=np.int64)
+
+    import tensorflow as tf
+
+    schema = {'label': tf.io.FixedLenFeature([], tf.int64)}
+    dataset = tf.data.TFRecordDataset([str(path) for path in files])
+    dataset = dataset.map(lambda serialized: tf.io.parse_single_example(serialized, schema)['label'])
+    return np.fromiter(dataset.as_numpy_iterator(), dtype=np.int64, count=manifest['n_rows'])
+
+
+def _npz_shard(path):
+    """One NPZ shard as per-row (column indices, values, label) elements"""
+    import tensorflow as tf
+
+    def load(path):
+        with np.load(path.decode() if isinstance(path, bytes) else path) as shard:
+            yield shard['indptr'], shard['indices'], shard['data'], shard['labels']
+
+    shard = tf.data.Dataset.from_generator(load, args=(path,), output_signature=(
+        tf.TensorSpec([None], tf.int64), tf.TensorSpec([None], tf.int64),
+        tf.TensorSpec([None], tf.float32), tf.TensorSpec([None], tf.int64)))
+
+    def rows(indptr, indices, values, labels):
+        return tf.data.Dataset.from_tensor_slices((tf.RaggedTensor.from_row_splits(indices, indptr),
+                                                   tf.RaggedTensor.from_row_splits(values, indptr), labels))
+
+    return shard.flat_map(rows)
+
+
+def _tfrecord_shard(path):
+    import tensorflow as tf
+
+    schema = {
+        'indices': tf.io.VarLenFeature(tf.int64),
+        'values': tf.io.VarLenFeature(tf.float32),
+        'label': tf.io.FixedLenFeature([], tf.int64),
+    }
+
+    def parse(serialized):
+        example = tf.io.parse_single_example(serialized, schema)
+        return example['indices'].values, example['values'].values, example['label']
+
+    return tf.data.TFRecordDataset(path).map(parse)
+
+
+def shard_dataset(shard_dir, batch_size, shuffle=False, shuffle_buffer=SHUFFLE_BUFFER,
+                  cycle_length=CYCLE_LENGTH, seed=42):
+    """tf.data pipeline of dense (features, labels) batches over a shard directory
+
+    Shards are read concurrently with interleave, rows are shuffled while
+    still sparse, and each batch is densified with one scatter after
+    batching. Prefetch keeps the next batches ready while the model trains on
+    the current one. Without shuffle, shards are read one after another, so
+    rows come back in the order they were written (for evaluate and predict).
+    """
+    import tensorflow as tf
+
+    manifest = read_manifest(shard_dir)
+    n_features = manifest['n_features']
+    files = [str(Path(shard_dir) / shard['file']) for shard in manifest['shards']]
+    read_shard = _npz_shard if manifest['format'] == 'npz' else _tfrecord_shard
+
+    dataset = tf.data.Dataset.from_tensor_slices(files)
+    if shuffle:
+        dataset = dataset.shuffle(len(files), seed=seed, reshuffle_each_iteration=True)
+        dataset = dataset.interleave(read_shard, cycle_length=min(cycle_length, len(files)),
+                                     num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    else:
+        dataset = dataset.flat_map(read_shard)
+
+    def densify(indices, values, labels):
+        coordinates = tf.stack([indices.value_rowids(), indices.flat_values], axis=1)
+        shape = tf.stack([indices.nrows(), tf.constant(n_features, tf.int64)])
+        return tf.scatter_nd(coordinates, values.flat_values, shape), labels
+
+    dataset = dataset.ragged_batch(batch_size).map(densify, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class InputStallMonitor:
+    """Time each training step spends waiting for its batch
+
+    The gap between the end of one training batch and the start of the next
+    is spent producing input (plus negligible callback overhead). A well fed
+    pipeline keeps it near zero; a large stall fraction means training is
+    bound by reading or featurization rather than compute.
+    """
+
+    def __init__(self):
+        self.epochs = []
+
+    def callback(self):
+        import tensorflow as tf
+
+        monitor = self
+
+        class InputStall(tf.keras.callbacks.Callback):
+            def on_epoch_begin(self, epoch, logs=None):
+                self.epoch_start = self.batch_end = time.perf_counter()
+                self.stall = 0.0
+                self.steps = 0
+
+            def on_train_batch_begin(self, batch, logs=None):
+                self.stall += time.perf_counter() - self.batch_end
+                self.steps += 1
+
+            def on_train_batch_end(self, batch, logs=None):
+                self.batch_end = time.perf_counter()
+
+            def on_epoch_end(self, epoch, logs=None):
+                # Training time only: validation runs between the last batch and here
+                seconds = self.batch_end - self.epoch_start
+                monitor.epochs.append({
+                    'epoch': epoch + 1,
+                    'train_seconds': seconds,
+                    'stall_seconds': self.stall,
+                    'stall_fraction': self.stall / seconds if seconds > 0 else 0.0,
+                    'steps': self.steps,
+                })
+
+        return InputStall()
+
+    def to_dict(self):
+        if not self.epochs:
+            return {'epochs': []}
+        stall = sum(e['stall_seconds'] for e in self.epochs)
+        seconds = sum(e['train_seconds'] for e in self.epochs)
+        return {
+            'stall_seconds': stall,
+            'stall_fraction': stall / seconds if seconds > 0 else 0.0,
+            # The first epoch also pays for filling the shuffle buffer
+            'first_epoch_stall_seconds': self.epochs[0]['stall_seconds'],
+            'epochs': self.epochs,
+        }
+
+    def report(self):
+        summary = self.to_dict()
+        if not self.epochs:
+            return
+        print(f"\nInput stall: {summary['stall_seconds']:.1f}s over {len(self.epochs)} epochs "
+              f"({summary['stall_fraction']:.1%} of training time, "
+              f"{summary['first_epoch_stall_seconds']:.1f}s in the first epoch)")
@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import diags, vstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+
+def _hash_shard(hasher, texts):
+    """Raw term counts and per-bucket document frequencies for one shard"""
+    counts = hasher.transform(texts)
+    doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+    return counts, doc_freq
+
+
+class HashedTfidfVectorizer:
+    """TF-IDF over a fixed-width feature hash instead of a fitted vocabulary
+
+    Term counts come from a stateless HashingVectorizer (murmurhash3 of each
+    n-gram modulo n_features), so shards can be featurized independently and
+    in parallel. The only fitted state is the document-frequency vector,
+    which is accumulated across calls to partial_fit and turned into the
+    same smoothed idf TfidfVectorizer uses:
+
+        idf = ln((1 + n_docs) / (1 + df)) + 1
+
+    min_df / max_df prune hash buckets instead of vocabulary entries.
+    """
+
+    def __init__(self, n_features=10000, ngram_range=(1, 1), stop_words=None, lowercase=True,
+                 strip_accents=None, min_df=1, max_df=1.0, sublinear_tf=False, smooth_idf=True,
+                 norm='l2', dtype=np.float64):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+        self.min_df = min_df
+        self.max_df = max_df
+        self.sublinear_tf = sublinear_tf
+        self.smooth_idf = smooth_idf
+        self.norm = norm
+        self.dtype = dtype
+        self.doc_freq_ = np.zeros(n_features, dtype=np.int64)
+        self.n_docs_ = 0
+
+    def get_params(self):
+        return {
+            'n_features': self.n_features,
+            'ngram_range': self.ngram_range,
+            'stop_words': self.stop_words,
+            'lowercase': self.lowercase,
+            'strip_accents': self.strip_accents,
+            'min_df': self.min_df,
+            'max_df': self.max_df,
+            'sublinear_tf': self.sublinear_tf,
+            'smooth_idf': self.smooth_idf,
+            'norm': self.norm,
+            'dtype': np.dtype(self.dtype).name,
+            'hashing': 'murmurhash3_32_abs_mod',
+        }
+
+    @property
+    def hasher(self):
+        return HashingVectorizer(
+            n_features=self.n_features,
+            ngram_range=self.ngram_range,
+            stop_words=self.stop_words,
+            lowercase=self.lowercase,
+            strip_accents=self.strip_accents,
+            alternate_sign=False,
+            norm=None,
+            dtype=self.dtype
+        )
+
+    def _hash(self, texts, n_jobs=1, shard_size=2000):
+        texts = list(texts)
+        hasher = self.hasher
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        n_jobs = min(n_jobs, max(1, len(texts) // shard_size))
+        if n_jobs == 1:
+            return _hash_shard(hasher, texts)
+
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        context = multiprocessing.get_context('spawn')  # TensorFlow is not fork-safe
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as executor:
+            results = list(executor.map(_hash_shard, [hasher] * len(shards), shards))
+        counts = vstack([counts for counts, _ in results], format='csr')
+        doc_freq = np.sum([doc_freq for _, doc_freq in results], axis=0)
+        return counts, doc_freq
+
+    def partial_fit(self, texts, n_jobs=1):
+        """Add a batch of documents to the document-frequency counts"""
+        _, doc_freq = self._hash(texts, n_jobs=n_jobs)
+        self.doc_freq_ += doc_freq
+        self.n_docs_ += len(texts)
+        return self
+
+    @property
+    def idf_(self):
+        n_docs = self.n_docs_ + int(self.smooth_idf)
+        doc_freq = self.doc_freq_ + int(self.smooth_idf)
+        idf = np.log(n_docs / np.maximum(doc_freq, 1)) + 1.0
+
+        # Pruned buckets (too rare / too common / never seen) get zero weight
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * self.n_docs_
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * self.n_docs_
+        keep = (self.doc_freq_ >= max(min_doc_count, 1)) & (self.doc_freq_ <= max_doc_count)
+        return np.where(keep, idf, 0.0).astype(self.dtype)
+
+    def _weight(self, counts):
+        if self.sublinear_tf:
+            counts.data = np.log(counts.data) + 1
+        weighted = counts @ diags(self.idf_, format='csr')
+        weighted.eliminate_zeros()
+        if self.norm:
+            weighted = normalize(weighted, norm=self.norm, copy=False)
+        return weighted.tocsr()
+
+    def fit(self, texts, n_jobs=1):
+        self.doc_freq_ = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs_ = 0
+        return self.partial_fit(texts, n_jobs=n_jobs)
+
+    def fit_transform(self, texts, n_jobs=1):
+        """Hash once, accumulate document frequencies, then weight the same counts"""
+        texts = list(texts)
+        counts, doc_freq = self._hash(texts, n_jobs=n_jobs)
+        self.doc_freq_ = doc_freq.astype(np.int64)
+        self.n_docs_ = len(texts)
+        return self._weight(counts)
+
+    def transform(self, texts, n_jobs=1):
+        counts, _ = self._hash(texts, n_jobs=n_jobs)
+        return self._weight(counts)
@@ -0,0 +1,324 @@
+import argparse
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .feature_cache import FeatureCache, content_key
+from .paths import BENCHMARK_DIR, CACHE_DIR, FEATURE_CACHE_DIR, MBTI_CSV, TRAINING_DIR
+
+SWEEP_DIR = CACHE_DIR / 'sweeps'
+VALIDATION_SIZE = 0.2
+SPLIT_SEED = 42
+ETA = 3          # Successive halving keeps the best 1/ETA of the trials at every rung
+MIN_EPOCHS = 3   # Epochs every trial gets before the first cut
+MAX_EPOCHS = 27  # Epochs the surviving trials reach
+
+
+def _optimized_features(module):
+    texts, labels = module.load_and_preprocess_data(str(MBTI_CSV), use_full_dataset=False,
+                                                    max_samples_per_class=module.MAX_SAMPLES_PER_CLASS, n_jobs=-1)
+    features, _ = module.create_advanced_tfidf_features(texts, max_features=module.MAX_FEATURES, n_jobs=-1)
+    return features, labels
+
+
+def _linear_features(module):
+    texts, labels = module.load_and_preprocess_data(str(MBTI_CSV))
+    features, _ = module.create_tfidf_features(texts, max_features=module.MAX_FEATURES, n_jobs=-1)
+    return features, labels
+
+
+# Searchable models: the trainer's feature pipeline, its model builder and the
+# choices for each hyperparameter. The first choice of every list is the
+# trainer's own setting; search_space puts the trainer's MAX_FEATURES first in
+# 'width'. 'width' keeps the top chi2-ranked TF-IDF columns, so every width
+# comes from the one featurization.
+SEARCH_SPACES = {
+    'mbti_optimized': {
+        'module': 'train_mbti_optimized_model',
+        'builder': 'create_optimized_model',
+        'features': _optimized_features,
+        'space': {
+            'width': [10000, 7500, 5000, 3000, 2000],
+            'batch_size': [128, 64, 256],
+            'learning_rate': [0.0003, 0.0001, 0.001, 0.002],
+            'dropout': [(0.6, 0.5, 0.4), (0.5, 0.4, 0.3), (0.4, 0.3, 0.2), (0.3, 0.2, 0.1)],
+            'l2': [0.001, 0.0003, 0.0001],
+        },
+    },
+    'mbti_linear': {
+        'module': 'train_mbti_linear_model',
+        'builder': 'create_linear_model',
+        'features': _linear_features,
+        'space': {
+            'width': [20000, 15000, 10000, 5000],
+            'batch_size': [128, 64, 256],
+            'learning_rate': [0.0007, 0.0003, 0.0015],
+            'dropout': [(0.5, 0.4, 0.3, 0.2), (0.4, 0.3, 0.2, 0.1), (0.3, 0.2, 0.1, 0.0)],
+            'l2': [0.0005, 0.0001, 0.002],
+        },
+    },
+}
+
+
+def search_space(name, module):
+    """The model's search space with the trainer module's own feature width as the first width"""
+    space = dict(SEARCH_SPACES[name]['space'])
+    space['width'] = [module.MAX_FEATURES] + [width for width in space['width'] if width != module.MAX_FEATURES]
+    return space
+
+
+def sample_configs(space, n_trials, seed=42):
+    """Up to n_trials distinct configurations; the first is the trainer's own"""
+    keys = list(space)
+    grid = list(itertools.product(*(range(len(space[key])) for key in keys)))
+    rng = np.random.default_rng(seed)
+    order = [0] + list(1 + rng.permutation(len(grid) - 1))
+    return [{key: space[key][i] for key, i in zip(keys, grid[index])} for index in order[:n_trials]]
+
+
+def rung_epochs(min_epochs=MIN_EPOCHS, max_epochs=MAX_EPOCHS, eta=ETA):
+    """Cumulative epochs at each rung: min_epochs, min_epochs * eta, ... up to max_epochs"""
+    rungs = [min_epochs]
+    while rungs[-1] * eta < max_epochs:
+        rungs.append(rungs[-1] * eta)
+    return rungs + [max_epochs] if rungs[-1] < max_epochs else rungs
+
+
+# Per-worker state, set once by the pool initializer instead of pickled per task
+_worker = None
+
+
+def cap_tensorflow_threads(threads):
+    """Limit TensorFlow (and OpenMP) in this process to `threads` intra-op threads and one inter-op thread
+
+    Must run before TensorFlow executes anything, i.e. first thing in a
+    freshly spawned worker.
+    """
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    # The trainer modules live next to the package, not inside it
+    if str(TRAINING_DIR) not in sys.path:
+        sys.path.insert(0, str(TRAINING_DIR))
+
+
+def _init_worker(data, threads):
+    """Cap TensorFlow's thread pools before it starts, then keep the shared data"""
+    global _worker
+    cap_tensorflow_threads(threads)
+    _worker = dict(data, reduced={})
+
+
+def _reduced(width):
+    """Train and validation features cut to the top `width` columns, built once per worker"""
+    from .feature_selection import reduce_features
+
+    if width not in _worker['reduced']:
+        columns = np.sort(_worker['ranking'][:width])
+        _worker['reduced'][width] = (reduce_features(_worker['X_train'], columns),
+                                     reduce_features(_worker['X_val'], columns))
+    return _worker['reduced'][width]
+
+
+def run_trial(trial_id, config, initial_epoch, epochs, checkpoint):
+    """Train one trial from initial_epoch to epochs, resuming from its checkpoint"""
+    import tensorflow as tf
+
+    from .sparse_batches import CSRBatchSequence
+
+    start = time.perf_counter()
+    X_train, X_val = _reduced(config['width'])
+    if initial_epoch:
+        # Weights and optimizer state carry over from the previous rung
+        model = tf.keras.models.load_model(checkpoint)
+    else:
+        tf.keras.utils.set_random_seed(SPLIT_SEED + trial_id)
+        builder = getattr(importlib.import_module(_worker['module']), _worker['builder'])
+        model_params = {key: config[key] for key in ('learning_rate', 'dropout', 'l2')}
+        model = builder(X_train.shape[1], _worker['num_classes'], **model_params)
+
+    batch_size = config['batch_size']
+    history = model.fit(
+        CSRBatchSequence(X_train, _worker['y_train'], batch_size=batch_size, shuffle=True,
+                         class_weight=_worker['class_weight'], seed=SPLIT_SEED + trial_id),
+        validation_data=CSRBatchSequence(X_val, _worker['y_val'], batch_size=batch_size),
+        initial_epoch=initial_epoch,
+        epochs=epochs,
+        verbose=0
+    )
+    model.save(checkpoint)
+    return {
+        'trial': trial_id,
+        'val_accuracy': float(max(history.history['val_accuracy'])),
+        'last_val_accuracy': float(history.history['val_accuracy'][-1]),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def prepare_data(name, selection_method='chi2'):
+    """Featurize once (through the feature cache), split off validation and rank columns"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+    from sklearn.utils.class_weight import compute_class_weight
+
+    from .feature_selection import rank_features
+
+    search = SEARCH_SPACES[name]
+    if str(TRAINING_DIR) not in sys.path:
+        sys.path.insert(0, str(TRAINING_DIR))
+    module = importlib.import_module(search['module'])
+    features, labels = search['features'](module)
+    y = LabelEncoder().fit_transform(labels)
+
+    # The trainers' test split is held out entirely; validation comes from the rest
+    X_rest, _, y_rest, _ = train_test_split(features, y, test_size=0.2, random_state=SPLIT_SEED, stratify=y)
+    X_train, X_val, y_train, y_val = train_test_split(X_rest, y_rest, test_size=VALIDATION_SIZE,
+                                                      random_state=SPLIT_SEED, stratify=y_rest)
+
+    cache = FeatureCache(FEATURE_CACHE_DIR)
+    cache_key = content_key('feature_ranking', X_train, y_train, method=selection_method)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        ranking = np.asarray(cached['ranking'])
+    else:
+        ranking = rank_features(X_train, y_train, method=selection_method)
+        cache.put(cache_key, {'ranking': ranking})
+
+    weights = compute_class_weight('balanced', classes=np.unique(y_train), y=y_train)
+    return {
+        'module': search['module'],
+        'builder': search['builder'],
+        'X_train': X_train.tocsr(),
+        'X_val': X_val.tocsr(),
+        'y_train': y_train,
+        'y_val': y_val,
+        'ranking': ranking,
+        'class_weight': dict(enumerate(weights)),
+        'num_classes': int(len(np.unique(y))),
+    }
+
+
+def successive_halving(data, configs, rungs, sweep_dir, n_jobs, eta=ETA):
+    """Train every config to the first rung, keep the best 1/eta, continue them to the next, ...
+
+    Trials run concurrently in spawned worker processes, each with an equal
+    share of the cores for TensorFlow. Between rungs a trial's model is
+    checkpointed to disk and resumed, so survivors never retrain epochs.
+    """
+    cpu_count = os.cpu_count() or 1
+    n_jobs = min(n_jobs if n_jobs and n_jobs > 0 else cpu_count, len(configs))
+    threads = max(1, cpu_count // n_jobs)
+    trials = [{'trial': i, 'config': config, 'epochs': 0, 'val_accuracy': None, 'seconds': 0.0,
+               'status': 'running', 'history': []} for i, config in enumerate(configs)]
+    print(f"{len(configs)} trials, rungs at {rungs} epochs, {n_jobs} processes "
+          f"({threads} TensorFlow threads each)")
+
+    active = trials
+    context = multiprocessing.get_context('spawn')  # TensorFlow is not fork-safe
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context, initializer=_init_worker,
+                             initargs=(data, threads)) as executor:
+        for rung, epochs in enumerate(rungs):
+            rung_start = time.perf_counter()
+            futures = [executor.submit(run_trial, t['trial'], t['config'], t['epochs'], epochs,
+                                       str(sweep_dir / f"trial-{t['trial']:03d}.keras")) for t in active]
+            for trial, future in zip(active, futures):
+                result = future.result()
+                trial.update(epochs=epochs, val_accuracy=result['val_accuracy'])
+                trial['seconds'] += result['seconds']
+                trial['history'].append({'epochs': epochs, 'val_accuracy': result['val_accuracy'],
+                                         'seconds': result['seconds']})
+
+            active = sorted(active, key=lambda t: t['val_accuracy'], reverse=True)
+            keep = len(active) if rung == len(rungs) - 1 else max(1, len(active) // eta)
+            for trial in active[keep:]:
+                trial['status'] = f"pruned at {epochs}"
+            print(f"Rung {rung + 1}: {len(active)} trials to {epochs} epochs in "
+                  f"{time.perf_counter() - rung_start:.1f}s, best val accuracy {active[0]['val_accuracy']:.4f}")
+            active = active[:keep]
+    for trial in active:
+        trial['status'] = 'finished'
+    return sorted(trials, key=lambda t: (t['epochs'], t['val_accuracy']), reverse=True)
+
+
+def _describe(config):
+    return (f"w={config['width']} bs={config['batch_size']} lr={config['learning_rate']:g} "
+            f"drop={'/'.join(f'{r:g}' for r in config['dropout'])} l2={config['l2']:g}")
+
+
+def print_leaderboard(leaderboard, top=15):
+    print(f"\n{'Rank':<5} {'Trial':>5} {'Epochs':>6} {'Val acc':>8} {'Wall (s)':>9}  {'Status':<14} Config")
+    for rank, trial in enumerate(leaderboard[:top], 1):
+        print(f"{rank:<5} {trial['trial']:>5} {trial['epochs']:>6} {trial['val_accuracy']:>8.4f} "
+              f"{trial['seconds']:>9.1f}  {trial['status']:<14} {_describe(trial['config'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving hyperparameter sweep over cached MBTI features")
+    parser.add_argument('model', choices=list(SEARCH_SPACES))
+    parser.add_argument('--trials', type=int, default=27, help="configurations to start (default: 27)")
+    parser.add_argument('--jobs', type=int, default=-1, help="worker processes (default: all cores)")
+    parser.add_argument('--min-epochs', type=int, default=MIN_EPOCHS)
+    parser.add_argument('--max-epochs', type=int, default=MAX_EPOCHS)
+    parser.add_argument('--eta', type=int, default=ETA, help="keep the best 1/eta at every rung (default: 3)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    if args.eta < 2 or args.min_epochs < 1 or args.max_epochs < args.min_epochs:
+        parser.error("need eta >= 2 and 1 <= min-epochs <= max-epochs")
+
+    print(f"=== Hyperparameter sweep: {args.model} ===")
+    start = time.perf_counter()
+    data = prepare_data(args.model)
+    featurize_seconds = time.perf_counter() - start
+    print(f"Features ready in {featurize_seconds:.1f}s: {data['X_train'].shape[0]} train, "
+          f"{data['X_val'].shape[0]} validation rows, {data['X_train'].shape[1]} columns")
+
+    module = importlib.import_module(SEARCH_SPACES[args.model]['module'])  # Imported by prepare_data
+    configs = sample_configs(search_space(args.model, module), args.trials, seed=args.seed)
+    rungs = rung_epochs(args.min_epochs, args.max_epochs, args.eta)
+    sweep_dir = SWEEP_DIR / f"{args.model}-{int(time.time())}"
+    sweep_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        leaderboard = successive_halving(data, configs, rungs, sweep_dir, args.jobs, eta=args.eta)
+    finally:
+        # Checkpoints only matter between rungs
+        shutil.rmtree(sweep_dir, ignore_errors=True)
+    total_seconds = time.perf_counter() - start
+
+    print_leaderboard(leaderboard)
+    trial_seconds = sum(t['seconds'] for t in leaderboard)
+    print(f"\nSweep took {total_seconds:.1f}s wall ({featurize_seconds:.1f}s featurizing) for "
+          f"{trial_seconds:.1f}s of trial time; {len(configs) * args.max_epochs} epochs without pruning, "
+          f"{sum(t['epochs'] for t in leaderboard)} trained")
+
+    results_path = BENCHMARK_DIR / f"sweep_{args.model}.json"
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, 'w') as f:
+        json.dump({
+            'model': args.model,
+            'rungs': rungs,
+            'eta': args.eta,
+            'wall_seconds': total_seconds,
+            'featurize_seconds': featurize_seconds,
+            'best': leaderboard[0],
+            'leaderboard': leaderboard,
+            'created_timestamp': time.time(),
+        }, f, indent=2)
+    print(f"✓ Leaderboard saved: {results_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
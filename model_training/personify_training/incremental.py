@@ -0,0 +1,329 @@
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from .batch_scoring import TEXT_PREPROCESSING, build_featurizer, read_chunks
+from .centroid_export import CENTROID_FILE, DEFAULT_TEMPERATURE, export_centroids
+from .hashed_tfidf import HashedTfidfVectorizer
+from .model_variants import (VARIANTS, artifact_path, artifacts_available, file_digests, load_params, load_split,
+                             serving_files)
+from .paths import ASSETS_DIR, CACHE_DIR
+from .text_cleaning import cleaning_config
+
+VERSIONS_DIR = CACHE_DIR / 'model_versions'
+UPDATE_EPOCHS = 3
+LEARNING_RATE_FACTOR = 0.1  # Fine-tuning steps are smaller than the original training's
+BATCH_SIZE = 64
+CENTROID_BATCH_SIZE = 1024
+KMEANS_FILE = 'bigfive_kmeans_model.pickle'
+
+# Column holding the label of a newly collected row (Big Five rows are labelled by their nearest centroid)
+LABEL_FIELDS = {
+    'personality': 'Personality',
+    'mbti_base': 'type',
+    'mbti_linear': 'type',
+    'mbti_optimized': 'type',
+}
+
+# Text cleaning recorded in each variant's exported binary vocabulary
+VOCAB_TEXT_CLEANING = {
+    'mbti_linear': lambda: None,
+    'mbti_optimized': cleaning_config,
+}
+
+
+def document_frequencies(idf, n_documents, smooth_idf=True):
+    """Per-column document counts behind a fitted idf vector
+
+    Inverts idf = ln((n + s) / (df + s)) + 1 with s = 1 for smoothed idf, so
+    a TfidfVectorizer that only kept idf_ can still take new documents.
+    """
+    smooth = int(smooth_idf)
+    return np.rint((n_documents + smooth) / np.exp(np.asarray(idf, dtype=np.float64) - 1) - smooth).astype(np.int64)
+
+
+def update_idf(vectorizer, texts, n_documents):
+    """Add documents to a fitted vectorizer's IDF without changing its columns; returns the new document count
+
+    The vocabulary stays fixed (the model's input layer depends on it); only
+    the weights of known terms move. Hashed vectorizers keep their counts and
+    simply continue partial_fit.
+    """
+    texts = list(texts)
+    if isinstance(vectorizer, HashedTfidfVectorizer):
+        vectorizer.partial_fit(texts)
+        return vectorizer.n_docs_
+
+    smooth = int(vectorizer.smooth_idf)
+    doc_freq = document_frequencies(vectorizer.idf_, n_documents, vectorizer.smooth_idf)
+    # Every known term present in a document has a non-zero weight in its row
+    presence = vectorizer.transform(texts)
+    doc_freq += np.bincount(presence.indices, minlength=len(doc_freq))
+    n_documents += len(texts)
+    vectorizer.idf_ = np.log((n_documents + smooth) / (doc_freq + smooth)) + 1
+    return n_documents
+
+
+def update_centroids(centers, counts, X, batch_size=CENTROID_BATCH_SIZE):
+    """Mini-batch k-means steps that continue from the trained centroids
+
+    Each centroid stays the running mean of every point ever assigned to it:
+    a batch moves it towards its new members with a per-centroid learning
+    rate of 1 / count, where count includes the original training points.
+    Starting MiniBatchKMeans from init=centers would instead restart the
+    counts at zero and snap each centroid to the first batch's mean.
+    """
+    centers = np.array(centers, dtype=np.float64)
+    counts = np.array(counts, dtype=np.float64)
+    for start in range(0, len(X), batch_size):
+        batch = np.asarray(X[start:start + batch_size], dtype=np.float64)
+        distances = (batch ** 2).sum(axis=1)[:, None] - 2 * batch @ centers.T + (centers ** 2).sum(axis=1)
+        labels = np.argmin(distances, axis=1)
+
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        added = np.bincount(labels, minlength=len(centers))
+        moved = added > 0
+        counts += added
+        centers[moved] += (sums[moved] - added[moved, None] * centers[moved]) / counts[moved, None]
+    return centers, counts.astype(np.int64)
+
+
+def _files_of(name, params):
+    """Every asset an update rewrites, for archiving the version it replaces"""
+    variant = VARIANTS[name]
+    files = [variant['keras'], variant['tflite'], variant['params']]
+    files += [report['file'] for report in params.get('tflite_variants', []) if 'file' in report]
+    if 'vectorizer' in variant:
+        files.append(variant['vectorizer'])
+    if params.get('vocabulary_file'):
+        files.append(params['vocabulary_file'])
+    if name == 'bigfive_clustering':
+        files += [KMEANS_FILE, CENTROID_FILE]
+    return sorted(set(files))
+
+
+def archive_version(name, params):
+    """Copy the current assets to cache/model_versions/<name>/v<version>/ so an update can be rolled back"""
+    version = params.get('version', 1)
+    target = VERSIONS_DIR / name / f"v{version}"
+    target.mkdir(parents=True, exist_ok=True)
+    for filename in _files_of(name, params):
+        source = os.path.join(ASSETS_DIR, filename)
+        if os.path.exists(source):
+            shutil.copy2(source, target / filename)
+    return target
+
+
+def restore_version(archive, filenames):
+    """Copy archived assets back into place, each file renamed over its replacement"""
+    for filename in filenames:
+        source = archive / filename
+        if not source.exists():
+            continue
+        target = os.path.join(ASSETS_DIR, filename)
+        tmp_path = f"{target}.tmp-{os.getpid()}"
+        shutil.copy2(source, tmp_path)
+        os.replace(tmp_path, target)
+
+
+def _labelled_records(name, records, text_field):
+    """Records with a known label, and the encoded labels"""
+    if name == 'bigfive_clustering':
+        return records, None
+    field = LABEL_FIELDS[name]
+    if name == 'personality':
+        encoding = load_params(name)['label_encoders']['Personality']
+    else:
+        with open(artifact_path(VARIANTS[name], 'encoder'), 'rb') as f:
+            encoding = {str(label): i for i, label in enumerate(pickle.load(f).classes_)}
+    kept, labels = [], []
+    for record in records:
+        label = str(record.get(field, '')).strip()
+        if label in encoding and (name == 'personality' or str(record.get(text_field) or '').strip()):
+            kept.append(record)
+            labels.append(encoding[label])
+    return kept, np.asarray(labels, dtype=np.int64)
+
+
+def _stack(*blocks):
+    return sp.vstack(blocks, format='csr') if sp.issparse(blocks[0]) else np.concatenate(blocks)
+
+
+def _fit(model, X, y, epochs, batch_size):
+    from .sparse_batches import CSRBatchSequence
+
+    if sp.issparse(X):
+        return model.fit(CSRBatchSequence(X, y, batch_size=batch_size, shuffle=True), epochs=epochs, verbose=0)
+    return model.fit(X, y, batch_size=batch_size, epochs=epochs, shuffle=True, verbose=0)
+
+
+def _accuracy(model, X, y):
+    from .tflite_export import predicted_classes
+    from .tflite_parity import keras_outputs
+
+    return float(np.mean(predicted_classes(keras_outputs(model, X)) == y))
+
+
+def full_retrain_reference(model, optimizer_config, X_train, y_train, X_new, y_new, X_test, y_test, epochs,
+                           batch_size):
+    """Accuracy of the same architecture trained from scratch on the old training split plus the new rows
+
+    Uses the updated features (vocabulary, IDF, centroid labels), so it
+    isolates what warm-starting costs the network compared with retraining it.
+    """
+    import tensorflow as tf
+
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(42)
+    fresh = tf.keras.models.clone_model(model)
+    fresh.compile(optimizer=type(model.optimizer).from_config(optimizer_config), loss=model.loss,
+                  metrics=['accuracy'])
+    _fit(fresh, _stack(X_train, X_new), np.concatenate([y_train, y_new]), epochs, batch_size)
+    return _accuracy(fresh, X_test, y_test), time.perf_counter() - start
+
+
+def update_model(name, rows_path, epochs=UPDATE_EPOCHS, learning_rate_factor=LEARNING_RATE_FACTOR,
+                 batch_size=BATCH_SIZE, text_field='posts', compare_full=False, full_epochs=None):
+    """Fold newly collected labelled rows into a trained model without rebuilding it
+
+    MBTI: new documents are added to the vectorizer's document frequencies
+    and IDF. Big Five: the K-Means centroids take mini-batch steps, are
+    re-exported to the centroid file and label the new rows. Every model:
+    the Keras network is warm-started from its saved artifact for a few epochs at a
+    reduced learning rate, then re-exported to TFLite. The replaced assets
+    are archived and the params get a new version with an update record.
+    """
+    variant = VARIANTS[name]
+    if not artifacts_available(name):
+        raise FileNotFoundError(f"No artifacts from {variant['script']}; train {name} first")
+    start = time.perf_counter()
+    params = load_params(name)
+    version = params.get('version', 1)
+    archived = _files_of(name, params)
+    archive = archive_version(name, params)
+    print(f"Archived version {version} of {name}: {archive}")
+
+    try:
+        return _apply_update(name, params, version, rows_path, epochs, learning_rate_factor, batch_size, text_field,
+                             compare_full, full_epochs, start)
+    except BaseException:
+        # Assets are rewritten as the update goes; put the archived version back so a
+        # retry starts from the same IDF counts, centroids and weights
+        restore_version(archive, archived)
+        print(f"Update failed, restored version {version} of {name} from {archive}")
+        raise
+
+
+def _apply_update(name, params, version, rows_path, epochs, learning_rate_factor, batch_size, text_field,
+                  compare_full, full_epochs, start):
+    import tensorflow as tf
+
+    from .tflite_export import export_tflite_variants, print_variant_table
+    from .vocab_export import export_vectorizer
+
+    variant = VARIANTS[name]
+    records = [record for chunk in read_chunks(rows_path) for record in chunk]
+    records, y_new = _labelled_records(name, records, text_field)
+    print(f"{len(records)} labelled rows in {rows_path}")
+    if not records:
+        raise ValueError(f"No usable labelled rows in {rows_path}")
+    update = {'version': version + 1, 'rows_file': str(rows_path), 'rows_read': len(records)}
+
+    if 'vectorizer' in variant:
+        vectorizer_path = artifact_path(variant, 'vectorizer')
+        with open(vectorizer_path, 'rb') as f:
+            vectorizer = pickle.load(f)
+        n_documents = params.get('idf_documents', params.get('total_samples'))
+        if n_documents is None and not isinstance(vectorizer, HashedTfidfVectorizer):
+            raise ValueError(f"{artifact_path(variant, 'params')} does not record how many documents the IDF was "
+                             f"fitted on (idf_documents); retrain {name} before updating it")
+        texts = [TEXT_PREPROCESSING[name](record[text_field]) for record in records]
+        params['idf_documents'] = update_idf(vectorizer, texts, n_documents)
+        with open(vectorizer_path, 'wb') as f:
+            pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if params.get('vocabulary_file') and name in VOCAB_TEXT_CLEANING:
+            export_vectorizer(vectorizer, os.path.join(ASSETS_DIR, params['vocabulary_file']),
+                              text_cleaning=VOCAB_TEXT_CLEANING[name]())
+        update['idf_documents'] = params['idf_documents']
+        print(f"✓ IDF updated over {params['idf_documents']} documents")
+
+    X_new, errors = build_featurizer(name, text_field=text_field).transform(records)
+    if y_new is not None:
+        y_new = y_new[[error is None for error in errors]]
+    update['rows_skipped'] = sum(error is not None for error in errors)
+    if X_new.shape[0] == 0:
+        raise ValueError(f"None of the {len(records)} labelled rows could be featurized: {errors[0]}")
+
+    if name == 'bigfive_clustering':
+        kmeans_path = os.path.join(ASSETS_DIR, KMEANS_FILE)
+        with open(kmeans_path, 'rb') as f:
+            kmeans = pickle.load(f)
+        counts = params.get('cluster_sizes') or np.bincount(kmeans.labels_, minlength=kmeans.n_clusters)
+        centers, counts = update_centroids(kmeans.cluster_centers_, counts, X_new)
+        shift = float(np.linalg.norm(centers - kmeans.cluster_centers_, axis=1).max())
+        kmeans.cluster_centers_ = centers.astype(kmeans.cluster_centers_.dtype)
+        with open(kmeans_path, 'wb') as f:
+            pickle.dump(kmeans, f, protocol=pickle.HIGHEST_PROTOCOL)
+        params['cluster_sizes'] = counts.tolist()
+        update['max_centroid_shift'] = shift
+        with open(artifact_path(variant, 'scaler'), 'rb') as f:
+            scaler = pickle.load(f)
+        temperature = params.get('centroid_export', {}).get('temperature', DEFAULT_TEMPERATURE)
+        centroid_path = export_centroids(scaler, kmeans, os.path.join(ASSETS_DIR, CENTROID_FILE),
+                                         feature_names=params.get('feature_names'),
+                                         personality_types=params.get('personality_types'),
+                                         demographic_scaling=params.get('demographic_scaling'), temperature=temperature)
+        params['centroid_export'] = {'file': CENTROID_FILE, 'size_bytes': os.path.getsize(centroid_path),
+                                     'temperature': temperature}
+        y_new = kmeans.predict(X_new)
+        print(f"✓ Centroids updated (largest shift {shift:.4f} in scaled units)")
+
+    # The held-out split through the updated vectorizer / centroids
+    X_train, X_test, y_train, y_test = load_split(name)
+    model = tf.keras.models.load_model(artifact_path(variant, 'keras'))
+    accuracy_before = _accuracy(model, X_test, y_test)
+    optimizer_config = model.optimizer.get_config()
+    learning_rate = float(np.asarray(model.optimizer.learning_rate)) * learning_rate_factor
+    model.optimizer.learning_rate.assign(learning_rate)
+
+    fit_start = time.perf_counter()
+    _fit(model, X_new, y_new, epochs, batch_size)
+    fit_seconds = time.perf_counter() - fit_start
+    accuracy_after = _accuracy(model, X_test, y_test)
+    print(f"Warm start: {epochs} epochs on {X_new.shape[0]} rows in {fit_seconds:.1f}s, "
+          f"held-out accuracy {accuracy_before:.4f} -> {accuracy_after:.4f}")
+    update.update(epochs=epochs, learning_rate=learning_rate, rows_used=int(X_new.shape[0]),
+                  fit_seconds=fit_seconds, accuracy_before=accuracy_before, accuracy_after=accuracy_after)
+
+    if compare_full:
+        full_epochs = full_epochs or params.get('epochs_trained', 30)
+        print(f"Full retrain reference: {full_epochs} epochs from scratch on {X_train.shape[0] + X_new.shape[0]} rows...")
+        full_accuracy, full_seconds = full_retrain_reference(model, optimizer_config, X_train, y_train, X_new, y_new,
+                                                             X_test, y_test, full_epochs, batch_size)
+        update['full_retrain'] = {'accuracy': full_accuracy, 'seconds': full_seconds, 'epochs': full_epochs,
+                                  'accuracy_gap': accuracy_after - full_accuracy}
+        print(f"Full retrain accuracy {full_accuracy:.4f} in {full_seconds:.1f}s "
+              f"(incremental {accuracy_after - full_accuracy:+.4f} in {fit_seconds:.1f}s)")
+
+    model.save(artifact_path(variant, 'keras'))
+    variants = [report['variant'] for report in params.get('tflite_variants', []) if 'file' in report] or ['dynamic']
+    reports = export_tflite_variants(model, ASSETS_DIR, os.path.splitext(variant['tflite'])[0], X_train, X_test,
+                                     y_test, accuracy_after, variants=tuple(variants))
+    print_variant_table(reports)
+
+    update['seconds'] = time.perf_counter() - start
+    update['timestamp'] = time.time()
+    params.update(version=version + 1, parent_version=version, tflite_variants=reports,
+                  test_accuracy=accuracy_after, updated_timestamp=update['timestamp'])
+    params.setdefault('incremental_updates', []).append(update)
+    params['artifacts'] = file_digests(serving_files(name))
+    with open(artifact_path(variant, 'params'), 'w') as f:
+        json.dump(params, f, indent=2)
+    print(f"✓ {name} is now version {version + 1}: {artifact_path(variant, 'params')}")
+    return update
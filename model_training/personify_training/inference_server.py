@@ -0,0 +1,389 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from .batch_scoring import ModelScorer
+from .model_variants import VARIANTS, artifact_path, load_serving_artifacts
+
+DEFAULT_MODELS = ('personality', 'mbti_optimized', 'bigfive_clustering')
+MAX_BATCH_SIZE = 64
+MAX_DELAY_MS = 5.0
+METRICS_WINDOW = 10000  # Latest requests and batches kept for percentiles
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+def batch_buckets(max_batch_size):
+    """Padded batch sizes: powers of two up to and including max_batch_size"""
+    buckets, size = [], 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    return buckets + [max_batch_size]
+
+
+class BucketedScorer(ModelScorer):
+    """ModelScorer padding each batch to a fixed bucket size with one interpreter per bucket
+
+    Micro-batches vary in size from one flush to the next. Resizing a single
+    interpreter for each would reallocate its tensors every time, so each
+    bucket gets its own interpreter, allocated once for that shape.
+    """
+
+    def __init__(self, name, max_batch_size=MAX_BATCH_SIZE, **kwargs):
+        super().__init__(name, **kwargs)
+        self.buckets = batch_buckets(max_batch_size)
+        self.interpreters = {}
+        self.input_dim = int(self.interpreter.get_input_details()[0]['shape'][-1])
+
+    def _interpreter_for(self, bucket):
+        if bucket not in self.interpreters:
+            self.interpreters[bucket] = self.new_interpreter(bucket)
+        return self.interpreters[bucket]
+
+    def predict(self, X):
+        from .tflite_export import _dense_rows, dequantize_output, quantize_input
+
+        outputs = []
+        for start in range(0, X.shape[0], self.buckets[-1]):
+            rows = _dense_rows(X, slice(start, start + self.buckets[-1]))
+            bucket = next(size for size in self.buckets if size >= len(rows))
+            batch = np.zeros((bucket, self.input_dim), dtype=np.float32)
+            batch[:len(rows)] = rows
+
+            interpreter = self._interpreter_for(bucket)
+            input_detail = interpreter.get_input_details()[0]
+            output_detail = interpreter.get_output_details()[0]
+            interpreter.set_tensor(input_detail['index'], quantize_input(batch, input_detail))
+            interpreter.invoke()
+            output = interpreter.get_tensor(output_detail['index'])[:len(rows)]
+            outputs.append(dequantize_output(output, output_detail))
+        return np.concatenate(outputs)
+
+    def warm_up(self):
+        """Allocate every bucket before serving, so no request pays for it"""
+        for bucket in self.buckets:
+            self._interpreter_for(bucket)
+
+
+class ServingMetrics:
+    """Request latency and batch size over a sliding window, kept across model reloads"""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.latencies_ms = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.reloads = 0
+
+    def record_batch(self, size, latencies_ms, errors):
+        self.batches += 1
+        self.requests += size
+        self.errors += errors
+        self.batch_sizes.append(size)
+        self.latencies_ms.extend(latencies_ms)
+
+    def snapshot(self):
+        result = {'requests': self.requests, 'batches': self.batches, 'errors': self.errors, 'reloads': self.reloads}
+        if self.latencies_ms:
+            p50, p95, p99 = np.percentile(self.latencies_ms, [50, 95, 99])
+            result['latency_ms'] = {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                                    'max': float(max(self.latencies_ms))}
+        if self.batch_sizes:
+            result['batch_size'] = {
+                'mean': float(np.mean(self.batch_sizes)),
+                'max': int(max(self.batch_sizes)),
+                'histogram': {str(size): count for size, count in sorted(Counter(self.batch_sizes).items())},
+            }
+        return result
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests for one scorer into batches under a latency deadline
+
+    A batch is flushed once it holds max_batch_size requests or its oldest
+    request has waited max_delay_ms. Scoring runs on a single dedicated
+    thread, so the interpreters are never used concurrently and the event
+    loop keeps accepting requests while a batch is being scored.
+    """
+
+    def __init__(self, scorer, metrics, max_batch_size=MAX_BATCH_SIZE, max_delay_ms=MAX_DELAY_MS):
+        self.scorer = scorer
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+        self.pending = deque()
+        self.arrived = asyncio.Event()
+        self.closing = False
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'score-{scorer.name}')
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, record):
+        """Queue one record; the returned future resolves to its result dict"""
+        if self.closing:
+            raise RuntimeError("batcher is closed")
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((record, future, time.perf_counter()))
+        self.arrived.set()
+        return future
+
+    async def _next_batch(self):
+        while not self.pending:
+            if self.closing:
+                return None
+            self.arrived.clear()
+            await self.arrived.wait()
+        deadline = self.pending[0][2] + self.max_delay
+        while len(self.pending) < self.max_batch_size and not self.closing:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        count = min(len(self.pending), self.max_batch_size)
+        return [self.pending.popleft() for _ in range(count)]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            try:
+                results = await loop.run_in_executor(self.executor, self.scorer.score, [r for r, _, _ in batch])
+            except Exception as e:
+                results = [{'error': f"scoring failed: {e}"}] * len(batch)
+            finished = time.perf_counter()
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.metrics.record_batch(len(batch), [(finished - arrived) * 1000 for _, _, arrived in batch],
+                                      sum('error' in result for result in results))
+
+    async def close(self):
+        """Stop accepting requests, finish every queued one, then release the thread"""
+        self.closing = True
+        self.arrived.set()
+        await self.task
+        self.executor.shutdown(wait=True)
+
+
+def model_version(name, tflite_path=None, params_bytes=None):
+    """Identifies a training run by its params JSON, which training writes after every other file
+
+    Watching the params alone means a reload starts only once the whole set
+    is on disk. An explicitly given .tflite file adds its modification time.
+    """
+    if params_bytes is None:
+        with open(artifact_path(VARIANTS[name], 'params'), 'rb') as f:
+            params_bytes = f.read()
+    version = hashlib.sha256(params_bytes).hexdigest()[:12]
+    if tflite_path:
+        version += f"-{os.path.getmtime(tflite_path):.0f}"
+    return version
+
+
+class ModelSlot:
+    """The live batcher of one model; reload swaps in a new one without dropping requests"""
+
+    def __init__(self, name, options, max_batch_size, max_delay_ms):
+        self.name = name
+        self.options = options
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self.metrics = ServingMetrics()
+        self.batcher = None
+        self.version = None
+        self.tflite_path = options.get('tflite_path')
+        self.reload_lock = asyncio.Lock()
+
+    def _build(self, tflite_path):
+        """Warmed scorer and its version, featurizer and interpreter from one consistent file set"""
+        with open(artifact_path(VARIANTS[self.name], 'params'), 'rb') as f:
+            version = model_version(self.name, tflite_path, f.read())
+        params, files = load_serving_artifacts(self.name, tflite_path)
+        scorer = BucketedScorer(self.name, max_batch_size=self.max_batch_size, params=params, files=files,
+                                **dict(self.options, tflite_path=tflite_path))
+        scorer.warm_up()
+        if model_version(self.name, tflite_path) != version:
+            raise ValueError("the params JSON changed while loading; training may still be writing")
+        return scorer, version
+
+    async def load(self, tflite_path=None):
+        """Build and warm the new scorer off the event loop, swap it in, then drain the old batcher
+
+        Requests arriving during the load keep going to the old batcher; from
+        the swap on they go to the new one, while the old batcher finishes
+        what it already queued.
+        """
+        async with self.reload_lock:
+            tflite_path = tflite_path or self.tflite_path
+            loop = asyncio.get_running_loop()
+            scorer, version = await loop.run_in_executor(None, self._build, tflite_path)
+            old, self.batcher = self.batcher, MicroBatcher(scorer, self.metrics, self.max_batch_size,
+                                                           self.max_delay_ms)
+            self.tflite_path = tflite_path
+            self.version = version
+            if old is not None:
+                self.metrics.reloads += 1
+                await old.close()
+            return self.version
+
+    async def predict(self, records):
+        batcher = self.batcher
+        return await asyncio.gather(*(batcher.submit(record) for record in records))
+
+
+class InferenceServer:
+    """Minimal HTTP/1.1 JSON API over the model slots
+
+    POST /predict/<model>  {"instances": [record, ...]} or a single record
+    POST /reload/<model>   optional {"tflite": path}
+    GET  /metrics          latency percentiles and batch sizes per model
+    GET  /health
+    """
+
+    def __init__(self, slots, watch_seconds=None):
+        self.slots = slots
+        self.watch_seconds = watch_seconds
+        self.started = time.time()
+
+    async def handle_request(self, method, path, body):
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if method == 'GET' and parts == ['health']:
+            return HTTPStatus.OK, {'status': 'ok', 'models': {n: s.version for n, s in self.slots.items()}}
+        if method == 'GET' and parts == ['metrics']:
+            return HTTPStatus.OK, {
+                'uptime_seconds': time.time() - self.started,
+                'models': {name: dict(slot.metrics.snapshot(), version=slot.version, queued=len(slot.batcher.pending))
+                           for name, slot in self.slots.items()},
+            }
+        if method != 'POST' or len(parts) != 2 or parts[0] not in ('predict', 'reload'):
+            return HTTPStatus.NOT_FOUND, {'error': f"no route for {method} {path}"}
+        slot = self.slots.get(parts[1])
+        if slot is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"model {parts[1]!r} is not loaded; loaded: {list(self.slots)}"}
+
+        try:
+            payload = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': f"invalid JSON: {e}"}
+
+        if parts[0] == 'reload':
+            try:
+                version = await slot.load(payload.get('tflite') if isinstance(payload, dict) else None)
+            except Exception as e:
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"reload failed, previous version kept: {e}"}
+            return HTTPStatus.OK, {'model': slot.name, 'version': version}
+
+        instances = payload.get('instances', [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(instances, list) or not all(isinstance(r, dict) for r in instances):
+            return HTTPStatus.BAD_REQUEST, {'error': "expected a record object or {\"instances\": [record, ...]}"}
+        version = slot.version
+        predictions = await slot.predict(instances)
+        return HTTPStatus.OK, {'model': slot.name, 'version': version, 'predictions': predictions}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                # A rejected body is left unread, so the connection cannot be reused
+                body_read = 0 <= length <= MAX_BODY_BYTES
+                if length < 0:
+                    status, response = HTTPStatus.BAD_REQUEST, {'error': 'invalid Content-Length'}
+                elif length > MAX_BODY_BYTES:
+                    status, response = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'request body too large'}
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, response = await self.handle_request(method.upper(), path, body)
+                    except Exception as e:
+                        print(f"Warning: {method} {path} failed: {e!r}")
+                        status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"internal error: {e}"}
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1' and body_read
+                payload = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """Reload any model whose params JSON training has rewritten
+
+        A failed reload keeps the previous version and is retried on the next
+        tick, which covers catching a training run between writing its files.
+        """
+        while True:
+            await asyncio.sleep(self.watch_seconds)
+            for slot in self.slots.values():
+                try:
+                    if model_version(slot.name, slot.tflite_path) != slot.version:
+                        print(f"{slot.name}: params changed, reloading...")
+                        print(f"✓ {slot.name} now serving version {await slot.load()}")
+                except Exception as e:
+                    print(f"Warning: reloading {slot.name} failed, previous version kept: {e}")
+
+
+async def serve(models=DEFAULT_MODELS, host='127.0.0.1', port=8080, max_batch_size=MAX_BATCH_SIZE,
+                max_delay_ms=MAX_DELAY_MS, watch_seconds=None, num_threads=1, text_field='posts'):
+    slots = {}
+    for name in models:
+        slot = ModelSlot(name, {'num_threads': num_threads, 'text_field': text_field}, max_batch_size, max_delay_ms)
+        try:
+            print(f"Loading {name} (version {await slot.load()})")
+        except Exception as e:
+            print(f"Warning: skipping {name}: {e}")
+            continue
+        slots[name] = slot
+    if not slots:
+        raise RuntimeError("No model could be loaded; train one first")
+
+    server = InferenceServer(slots, watch_seconds)
+    tcp_server = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"✓ Serving {', '.join(slots)} on http://{host}:{port} "
+          f"(batches of up to {max_batch_size}, {max_delay_ms:g} ms max delay)")
+    watcher = asyncio.get_running_loop().create_task(server.watch()) if watch_seconds else None
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        for slot in slots.values():
+            await slot.batcher.close()
@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.cluster import KMeans
+from threadpoolctl import threadpool_limits
+
+from .cluster_quality import score_clustering
+
+# Per-worker state, set once by the pool initializer instead of pickled per task
+_worker_features = None
+_worker_threads = None
+
+
+def _init_worker(features, threads):
+    global _worker_features, _worker_threads
+    _worker_features = features
+    _worker_threads = threads
+
+
+def fit_candidate(features, n_clusters, random_state=42, n_init=10, max_iter=300, threads=None, quality=None):
+    """Fit one candidate k exactly as the sequential sweep did and score it
+
+    quality holds keyword arguments for score_clustering (mode, sample_size, ...).
+    """
+    with threadpool_limits(limits=threads):
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=n_init, max_iter=max_iter)
+        labels = kmeans.fit_predict(features)
+        silhouette = score_clustering(features, labels, kmeans.cluster_centers_,
+                                      random_state=random_state, **(quality or {}))
+    return {
+        'n_clusters': n_clusters,
+        'silhouette_score': silhouette.pop('score'),
+        'silhouette': silhouette,
+        'inertia': float(kmeans.inertia_),
+        'n_iter': int(kmeans.n_iter_),
+        'centers': kmeans.cluster_centers_,
+    }
+
+
+def _fit_candidate_in_worker(args):
+    n_clusters, random_state, n_init, max_iter, quality = args
+    return fit_candidate(_worker_features, n_clusters, random_state, n_init, max_iter,
+                         threads=_worker_threads, quality=quality)
+
+
+def sweep_kmeans(features, cluster_range, random_state=42, n_init=10, max_iter=300, n_jobs=-1, quality=None):
+    """Fit every candidate k concurrently, returning results ordered by k
+
+    Each worker process gets an equal share of the cores for BLAS/OpenMP so
+    the pool does not oversubscribe the machine. Every candidate uses the
+    same random_state as the sequential loop, so scores and the selected k
+    do not depend on n_jobs.
+    """
+    cluster_range = list(cluster_range)
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = cpu_count
+    n_jobs = min(n_jobs, len(cluster_range))
+    threads = max(1, cpu_count // n_jobs)
+
+    tasks = [(k, random_state, n_init, max_iter, quality) for k in cluster_range]
+    if n_jobs == 1:
+        return [fit_candidate(features, *task[:4], threads=threads, quality=quality) for task in tasks]
+
+    print(f"Sweeping {len(cluster_range)} cluster counts across {n_jobs} processes ({threads} BLAS threads each)...")
+    context = multiprocessing.get_context('spawn')  # TensorFlow is not fork-safe
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context, initializer=_init_worker,
+                             initargs=(np.ascontiguousarray(features), threads)) as executor:
+        return list(executor.map(_fit_candidate_in_worker, tasks))
+
+
+def refine_winner(features, best, random_state=42, max_iter=500):
+    """Continue from the winning candidate's centroids instead of refitting from scratch"""
+    kmeans = KMeans(n_clusters=best['n_clusters'], init=best['centers'], n_init=1,
+                    max_iter=max_iter, random_state=random_state)
+    labels = kmeans.fit_predict(features)
+    return kmeans, labels
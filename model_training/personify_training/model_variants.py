@@ -0,0 +1,204 @@
+import hashlib
+import importlib
+import json
+import os
+import pickle
+
+import numpy as np
+
+from .dataset_store import load_columns
+from .paths import ASSETS_DIR, BIGFIVE_CSV, MBTI_CSV, PERSONALITY_CSV
+
+TEST_SIZE = 0.2
+SPLIT_SEED = 42
+
+
+def _load_params(variant):
+    with open(os.path.join(ASSETS_DIR, variant['params']), 'r') as f:
+        return json.load(f)
+
+
+def _load_pickle(filename):
+    with open(os.path.join(ASSETS_DIR, filename), 'rb') as f:
+        return pickle.load(f)
+
+
+def personality_features(variant):
+    """Rebuild train_personality_model.py's scaled features from the CSV and its saved encodings"""
+    params = _load_params(variant)
+    df = load_columns(PERSONALITY_CSV).dropna()
+    encoders = params['label_encoders']
+    for col in ('Stage_fear', 'Drained_after_socializing'):
+        df[col] = df[col].map(encoders[col])
+    y = df['Personality'].map(encoders['Personality']).values
+    X = df[params['feature_columns']].values.astype(np.float64)
+    scaled = (X - np.asarray(params['scaler_mean'])) / np.asarray(params['scaler_scale'])
+    return scaled.astype(np.float32), y
+
+
+def mbti_features(variant):
+    """Rebuild an MBTI script's features: its own sampling, then the saved vectorizer and encoder"""
+    module = importlib.import_module(variant['module'])
+    params = _load_params(variant)
+    loader_kwargs = {key: params[key] for key in variant.get('loader_params', ()) if key in params}
+    texts, labels = module.load_and_preprocess_data(str(MBTI_CSV), **loader_kwargs)
+    vectorizer = _load_pickle(variant['vectorizer'])
+    encoder = _load_pickle(variant['encoder'])
+    return vectorizer.transform(texts), encoder.transform(labels)
+
+
+def bigfive_features(variant):
+    """Rebuild the Big Five features: saved scaler, saved K-Means labels as targets"""
+    module = importlib.import_module(variant['module'])
+    params = _load_params(variant)
+    features, _, _ = module.load_and_preprocess_bigfive_data(
+        str(BIGFIVE_CSV),
+        use_full_dataset=params.get('use_full_dataset', False),
+        max_samples=params['max_samples']
+    )
+    X_scaled = _load_pickle('bigfive_scaler.pickle').transform(features)
+    y = _load_pickle('bigfive_kmeans_model.pickle').predict(X_scaled)
+    return X_scaled.astype(np.float32), y
+
+
+# Every trained model, the script that produces it and how to rebuild its features.
+# mbti_base and mbti_linear write the same files; 'owns' tells whose artifacts are on disk.
+VARIANTS = {
+    'personality': {
+        'script': 'train_personality_model.py',
+        'module': 'train_personality_model',
+        'keras': 'personality_model.h5',
+        'tflite': 'personality_model.tflite',
+        'params': 'preprocessing_params.json',
+        'features': personality_features,
+        'top_k': None,
+    },
+    'mbti_base': {
+        'script': 'train_mbti_model.py',
+        'module': 'train_mbti_model',
+        'keras': 'mbti_linear_model.keras',
+        'tflite': 'mbti_linear_model.tflite',
+        'params': 'mbti_linear_params.json',
+        'vectorizer': 'mbti_tfidf_vectorizer.pickle',
+        'encoder': 'mbti_label_encoder.pickle',
+        'owns': lambda params: 'feature_mode' not in params,
+        'features': mbti_features,
+        'top_k': 3,
+    },
+    'mbti_linear': {
+        'script': 'train_mbti_linear_model.py',
+        'module': 'train_mbti_linear_model',
+        'keras': 'mbti_linear_model.keras',
+        'tflite': 'mbti_linear_model.tflite',
+        'params': 'mbti_linear_params.json',
+        'vectorizer': 'mbti_tfidf_vectorizer.pickle',
+        'encoder': 'mbti_label_encoder.pickle',
+        'owns': lambda params: 'feature_mode' in params,
+        'features': mbti_features,
+        'top_k': 3,
+    },
+    'mbti_optimized': {
+        'script': 'train_mbti_optimized_model.py',
+        'module': 'train_mbti_optimized_model',
+        'keras': 'mbti_optimized_model.keras',
+        'tflite': 'mbti_optimized_model.tflite',
+        'params': 'mbti_optimized_params.json',
+        'vectorizer': 'mbti_optimized_vectorizer.pickle',
+        'encoder': 'mbti_optimized_encoder.pickle',
+        'loader_params': ('max_samples_per_class', 'sampling'),
+        'features': mbti_features,
+        'top_k': 3,
+    },
+    'bigfive_clustering': {
+        'script': 'train_bigfive_clustering_model.py',
+        'module': 'train_bigfive_clustering_model',
+        'keras': 'bigfive_clustering_model.keras',
+        'tflite': 'bigfive_clustering_model.tflite',
+        'params': 'bigfive_clustering_params.json',
+        'scaler': 'bigfive_scaler.pickle',
+        'features': bigfive_features,
+        'top_k': 3,
+    },
+}
+
+
+def artifact_path(variant, key):
+    return os.path.join(ASSETS_DIR, variant[key])
+
+
+def artifacts_available(name):
+    """Whether this variant's model and params are on disk and were written by its own script"""
+    variant = VARIANTS[name]
+    if not all(os.path.exists(artifact_path(variant, key)) for key in ('keras', 'params')):
+        return False
+    owns = variant.get('owns')
+    return owns is None or owns(_load_params(variant))
+
+
+def load_params(name):
+    return _load_params(VARIANTS[name])
+
+
+def serving_files(name):
+    """Files besides the params JSON that scoring a variant reads"""
+    variant = VARIANTS[name]
+    return [variant[key] for key in ('tflite', 'vectorizer', 'encoder', 'scaler') if key in variant]
+
+
+def file_digests(filenames, assets_dir=ASSETS_DIR):
+    """SHA-256 of each file, for the params JSON's 'artifacts' entry
+
+    Training writes the params JSON last, so its digests describe one
+    complete set of files; a reader can tell that set from a run still in
+    progress.
+    """
+    digests = {}
+    for filename in filenames:
+        with open(os.path.join(assets_dir, filename), 'rb') as f:
+            digests[filename] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def load_serving_artifacts(name, tflite_path=None):
+    """(params, {filename: bytes}) of one consistent training run, read once
+
+    Every serving file is checked against the digests in the params JSON;
+    a mismatch means training is rewriting the files, and ValueError is
+    raised instead of pairing new files with old ones. A tflite_path given
+    explicitly is read as is. Params written before digests were recorded
+    are not checked.
+    """
+    variant = VARIANTS[name]
+    params = _load_params(variant)
+    expected = params.get('artifacts') or {}
+    files = {}
+    for filename in serving_files(name):
+        path = tflite_path if filename == variant['tflite'] and tflite_path else os.path.join(ASSETS_DIR, filename)
+        with open(path, 'rb') as f:
+            files[filename] = f.read()
+        if path == tflite_path or filename not in expected:
+            continue
+        if hashlib.sha256(files[filename]).hexdigest() != expected[filename]:
+            raise ValueError(f"{filename} does not match {variant['params']}; training may still be writing it")
+    return params, files
+
+
+def load_split(name):
+    """(X_train, X_test, y_train, y_test) for a variant: 20% held out, stratified, seed 42
+
+    Every training script carves off this test split first, so X_test is
+    exactly the data the model never saw. Scripts that hold out a validation
+    set take it from X_train afterwards.
+    """
+    from sklearn.model_selection import train_test_split
+
+    variant = VARIANTS[name]
+    X, y = variant['features'](variant)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=SPLIT_SEED, stratify=y)
+    return X_train, X_test, np.asarray(y_train), np.asarray(y_test)
+
+
+def load_test_split(name):
+    """(X_test, y_test) for a variant, exactly as its training script held it out"""
+    _, X_test, _, y_test = load_split(name)
+    return X_test, y_test
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+# Anchored to this file rather than the working directory, so scripts run from anywhere
+TRAINING_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = TRAINING_DIR.parent
+
+DATA_DIR = REPO_ROOT / 'lib' / 'data'
+ASSETS_DIR = REPO_ROOT / 'assets' / 'models'
+CACHE_DIR = REPO_ROOT / 'cache'
+
+FEATURE_CACHE_DIR = CACHE_DIR / 'features'
+DATASET_STORE_DIR = CACHE_DIR / 'datasets'
+BENCHMARK_DIR = CACHE_DIR / 'benchmarks'
+
+PERSONALITY_CSV = DATA_DIR / 'personality_dataset.csv'
+MBTI_CSV = DATA_DIR / 'mbti_personality.csv'
+BIGFIVE_CSV = DATA_DIR / 'data-final.csv'
+BIGFIVE_CODEBOOK = DATA_DIR / 'codebook.txt'
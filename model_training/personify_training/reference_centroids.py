@@ -0,0 +1,96 @@
+"""Pure-Python nearest-centroid predictor for the Big Five cluster model
+
+This is the reference the Flutter app's cluster assignment is ported from:
+it uses only the standard library and reads nothing but the exported
+``.pbc`` file. A prediction is k distance computations over d features, so
+it needs no interpreter.
+
+File layout (little-endian)::
+
+    0   magic            b'PBFC'
+    4   u16 version, u16 reserved (0)
+    8   u32 n_features, u32 n_clusters, u32 config_len, 4 bytes padding
+    24  config           UTF-8 JSON, zero-padded to a multiple of 8 bytes
+        mean             f32[n_features]    StandardScaler.mean_
+        scale            f32[n_features]    StandardScaler.scale_
+        centroids        f32[n_clusters * n_features], row-major, in scaled space
+
+Inputs are the features the clustering scaler was fitted on, in the order
+of config['feature_names'] (trait scores, then demographics standardized
+with config['demographic_scaling'] when present).
+"""
+import json
+import math
+import struct
+import sys
+from array import array
+
+MAGIC = b'PBFC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIII4x')
+
+
+def _read_array(typecode, data, offset, count):
+    values = array(typecode)
+    values.frombytes(data[offset:offset + count * values.itemsize])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, offset + count * values.itemsize
+
+
+class ReferenceCentroids:
+    """Reproduces KMeans.predict on StandardScaler output from an exported .pbc file"""
+
+    def __init__(self, data):
+        magic, version, _, n_features, n_clusters, config_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a centroid file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported centroid format version {version}")
+
+        offset = HEADER.size
+        self.config = json.loads(data[offset:offset + config_len].decode('utf-8'))
+        offset += config_len + (-config_len % 8)
+
+        self.n_features = n_features
+        self.n_clusters = n_clusters
+        self.mean, offset = _read_array('f', data, offset, n_features)
+        self.scale, offset = _read_array('f', data, offset, n_features)
+        flat, offset = _read_array('f', data, offset, n_clusters * n_features)
+        self.centroids = [flat[c * n_features:(c + 1) * n_features] for c in range(n_clusters)]
+        self.temperature = float(self.config.get('temperature', 1.0))
+
+    @classmethod
+    def load(cls, path):
+        """Load a centroid file with a single read"""
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def standardize(self, features):
+        if len(features) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {len(features)}")
+        return [(x - m) / s for x, m, s in zip(features, self.mean, self.scale)]
+
+    def squared_distances(self, features):
+        """Squared Euclidean distance from one unscaled feature row to every centroid"""
+        scaled = self.standardize(features)
+        return [sum((x - c) * (x - c) for x, c in zip(scaled, centroid)) for centroid in self.centroids]
+
+    def predict_one(self, features):
+        """Index of the nearest centroid; ties go to the lowest index, as in KMeans.predict"""
+        distances = self.squared_distances(features)
+        return min(range(self.n_clusters), key=distances.__getitem__)
+
+    def soft_assign(self, features, temperature=None):
+        """Cluster probabilities, a softmax over negative squared distances
+
+        Lower temperatures sharpen the assignment towards the nearest
+        centroid. The nearest distance is subtracted first so the exponentials
+        cannot underflow to all zeros.
+        """
+        temperature = self.temperature if temperature is None else temperature
+        distances = self.squared_distances(features)
+        nearest = min(distances)
+        weights = [math.exp(-(d - nearest) / temperature) for d in distances]
+        total = sum(weights)
+        return [w / total for w in weights]
@@ -0,0 +1,210 @@
+"""Pure-Python reader for the compact TF-IDF vocabulary format
+
+This is the reference the Flutter app's featurizer is ported from: it uses
+only the standard library and reads nothing but the exported ``.tfv`` file.
+
+File layout (little-endian)::
+
+    0   magic            b'PTFV'
+    4   u16 version, u16 mode (0 = vocabulary, 1 = hashing)
+    8   u32 n_features, u32 n_terms, u32 config_len, u32 blob_len
+    24  config           UTF-8 JSON, zero-padded to a multiple of 8 bytes
+        idf              f64[n_features]
+        term_offsets     u32[n_terms + 1]   byte offsets into the term blob
+        term_columns     u32[n_terms]       feature column of each term
+        term_blob        UTF-8 n-grams, sorted by their encoded bytes
+
+Terms are sorted by their UTF-8 bytes so a lookup is a binary search over
+the blob, with no hash table to build at startup.
+"""
+import json
+import math
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+
+MAGIC = b'PTFV'
+FORMAT_VERSION = 1
+MODE_VOCABULARY = 0
+MODE_HASHING = 1
+HEADER = struct.Struct('<4sHHIIII')
+
+
+def _read_array(typecode, data, offset, count):
+    values = array(typecode)
+    values.frombytes(data[offset:offset + count * values.itemsize])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, offset + count * values.itemsize
+
+
+def murmurhash3_32(data, seed=0):
+    """Signed 32-bit MurmurHash3 (x86 variant), as used by HashingVectorizer"""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed & 0xffffffff
+    n_blocks = len(data) // 4
+    for i in range(n_blocks):
+        k = int.from_bytes(data[4 * i:4 * i + 4], 'little')
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xffffffff
+        h = (h * 5 + 0xe6546b64) & 0xffffffff
+
+    tail = data[4 * n_blocks:]
+    k = 0
+    if len(tail) >= 3:
+        k ^= tail[2] << 16
+    if len(tail) >= 2:
+        k ^= tail[1] << 8
+    if len(tail) >= 1:
+        k ^= tail[0]
+        k = (k * c1) & 0xffffffff
+        k = ((k << 15) | (k >> 17)) & 0xffffffff
+        k = (k * c2) & 0xffffffff
+        h ^= k
+
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xffffffff
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xffffffff
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+class ReferenceFeaturizer:
+    """Reproduces TfidfVectorizer.transform from an exported .tfv file"""
+
+    def __init__(self, data):
+        magic, version, mode, n_features, n_terms, config_len, blob_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a TF-IDF vocabulary file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported vocabulary format version {version}")
+
+        offset = HEADER.size
+        self.config = json.loads(data[offset:offset + config_len].decode('utf-8'))
+        offset += config_len + (-config_len % 8)
+
+        self.mode = mode
+        self.n_features = n_features
+        self.n_terms = n_terms
+        self.idf, offset = _read_array('d', data, offset, n_features)
+        self.term_offsets, offset = _read_array('I', data, offset, n_terms + 1)
+        self.term_columns, offset = _read_array('I', data, offset, n_terms)
+        self.term_blob = bytes(data[offset:offset + blob_len])
+
+        self.token_pattern = re.compile(self.config['token_pattern'])
+        self.stop_words = frozenset(self.config['stop_words'] or [])
+        self.ngram_range = tuple(self.config['ngram_range'])
+
+        cleaning = self.config.get('text_cleaning')
+        self.cleaning = None
+        if cleaning:
+            self.cleaning = {
+                'url': re.compile(cleaning['url_pattern']),
+                'non_alnum': re.compile(cleaning['non_alnum_pattern']),
+                'stopwords': frozenset(cleaning['stopwords']),
+                'min_len': cleaning['min_word_length'],
+                'max_len': cleaning['max_word_length'],
+            }
+
+    @classmethod
+    def load(cls, path):
+        """Load a vocabulary file with a single read"""
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def _term(self, i):
+        return self.term_blob[self.term_offsets[i]:self.term_offsets[i + 1]]
+
+    def column(self, term):
+        """Feature column of an n-gram, or None when it is out of vocabulary"""
+        if self.mode == MODE_HASHING:
+            h = murmurhash3_32(term.encode('utf-8'))
+            if h == -2147483648:
+                return (2147483647 - (self.n_features - 1)) % self.n_features
+            return abs(h) % self.n_features
+
+        key = term.encode('utf-8')
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._term(lo) == key:
+            return self.term_columns[lo]
+        return None
+
+    def clean(self, text):
+        """Training-time text cleaning recorded in the file, if any"""
+        if self.cleaning is None:
+            return text
+        text = self.cleaning['url'].sub('', text.lower())
+        text = self.cleaning['non_alnum'].sub(' ', text)
+        return ' '.join(word for word in text.split()
+                        if word not in self.cleaning['stopwords']
+                        and self.cleaning['min_len'] <= len(word) <= self.cleaning['max_len'])
+
+    def analyze(self, text):
+        """Lowercase, strip accents, tokenize, drop stop words and build n-grams"""
+        if self.config['lowercase']:
+            text = text.lower()
+        if self.config['strip_accents'] == 'ascii':
+            text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+        elif self.config['strip_accents'] == 'unicode':
+            text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+        tokens = [token for token in self.token_pattern.findall(text) if token not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        ngrams = []
+        for n in range(min_n, min(max_n, len(tokens)) + 1):
+            for i in range(len(tokens) - n + 1):
+                ngrams.append(' '.join(tokens[i:i + n]))
+        return ngrams
+
+    def transform_one(self, text, clean=False):
+        """Sparse TF-IDF vector of one document as {column: value}, columns ascending"""
+        if clean:
+            text = self.clean(text)
+
+        counts = {}
+        for ngram in self.analyze(text):
+            col = self.column(ngram)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+
+        vector = {}
+        for col in sorted(counts):
+            tf = float(counts[col])
+            if self.config['sublinear_tf']:
+                tf = math.log(tf) + 1.0
+            value = tf * self.idf[col]
+            if value != 0.0:
+                vector[col] = value
+
+        if self.config['norm'] == 'l2':
+            norm = math.sqrt(sum(value * value for value in vector.values()))
+        elif self.config['norm'] == 'l1':
+            norm = sum(abs(value) for value in vector.values())
+        else:
+            norm = 0.0
+        if norm > 0.0:
+            vector = {col: value / norm for col, value in vector.items()}
+        return vector
+
+    def transform(self, texts, clean=False):
+        return [self.transform_one(text, clean=clean) for text in texts]
+
+    def transform_dense(self, text, clean=False):
+        """Dense float list, the layout the TFLite model input expects"""
+        dense = [0.0] * self.n_features
+        for col, value in self.transform_one(text, clean=clean).items():
+            dense[col] = value
+        return dense
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import tensorflow as tf
+
+
+class CSRBatchSequence(tf.keras.utils.Sequence):
+    """Feeds a scipy CSR matrix to Keras one densified batch at a time
+
+    TF-IDF matrices are well under 1% dense, so only the current batch is
+    materialized as float32 instead of the whole (n_samples, max_features)
+    array. Class weights are applied as per-sample weights so the same
+    sequence works for fit, evaluate and predict.
+    """
+
+    def __init__(self, features, labels=None, batch_size=128, shuffle=False,
+                 class_weight=None, seed=42):
+        super().__init__()
+        self.features = features.tocsr()
+        self.labels = None if labels is None else np.asarray(labels)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+        self.indices = np.arange(self.features.shape[0])
+        self.sample_weights = None
+        if class_weight is not None and self.labels is not None:
+            weights = np.array([class_weight[c] for c in range(max(class_weight) + 1)], dtype=np.float32)
+            self.sample_weights = weights[self.labels]
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+    def __len__(self):
+        return math.ceil(self.features.shape[0] / self.batch_size)
+
+    def __getitem__(self, index):
+        batch = self.indices[index * self.batch_size:(index + 1) * self.batch_size]
+        x = self.features[batch].toarray().astype(np.float32, copy=False)
+        if self.labels is None:
+            return (x,)
+        if self.sample_weights is None:
+            return x, self.labels[batch]
+        return x, self.labels[batch], self.sample_weights[batch]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.indices)
+
+
+def csr_density(features):
+    """Fraction of non-zero entries in a sparse matrix"""
+    rows, cols = features.shape
+    return features.nnz / max(rows * cols, 1)
@@ -0,0 +1,158 @@
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def get_peak_rss_mb():
+    """Return the peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _stop_tracing_in_child():
+    # Forked pool workers inherit tracing, which would slow every allocation they make
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_stop_tracing_in_child)
+
+
+def _children_cpu_seconds():
+    # Worker processes (cleaning shards, K sweep) are counted once they are reaped
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageProfiler:
+    """Wall time, CPU time, peak traced memory and peak RSS per pipeline stage
+
+    Stages run one after another: begin('vectorize') closes the running stage
+    and opens the next, so a pipeline is instrumented without re-indenting it.
+    A stage entered twice accumulates. Peak RSS is always recorded and
+    includes everything, such as TensorFlow's allocator. Traced memory
+    (tracemalloc: Python and NumPy allocations only) is opt-in, because
+    tracing slows every allocation and with it the stage being timed:
+    trace_memory=True traces every stage, a collection of names traces only
+    those stages, and tracing is stopped again when a traced stage ends.
+    """
+
+    def __init__(self, trace_memory=False):
+        if trace_memory in (True, False, None):
+            self.trace_memory = bool(trace_memory)
+        else:
+            self.trace_memory = frozenset(trace_memory)
+        self.stages = {}
+        self.epochs = []
+        self._current = None
+
+    def traces(self, name):
+        if isinstance(self.trace_memory, frozenset):
+            return name in self.trace_memory
+        return self.trace_memory
+
+    def begin(self, name):
+        self.end()
+        traced = self.traces(name)
+        started_tracing = False
+        if traced:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        self._current = {
+            'name': name,
+            'traced': traced,
+            'started_tracing': started_tracing,
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'children_cpu': _children_cpu_seconds(),
+            'rss': get_peak_rss_mb(),
+        }
+
+    def end(self):
+        if self._current is None:
+            return
+        start, self._current = self._current, None
+        peak_rss = get_peak_rss_mb()
+        peak_traced = None
+        if start['traced']:
+            peak_traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if start['started_tracing']:
+                tracemalloc.stop()
+        measured = {
+            'wall_seconds': time.perf_counter() - start['wall'],
+            'cpu_seconds': time.process_time() - start['cpu'] + _children_cpu_seconds() - start['children_cpu'],
+            'peak_traced_mb': peak_traced,
+            'peak_rss_mb': peak_rss,
+            'rss_growth_mb': peak_rss - start['rss'],
+        }
+
+        stage = self.stages.get(start['name'])
+        if stage is None:
+            self.stages[start['name']] = measured
+            return
+        # Repeated stage: times add up, peaks keep the maximum
+        for key in ('wall_seconds', 'cpu_seconds', 'rss_growth_mb'):
+            stage[key] += measured[key]
+        stage['peak_rss_mb'] = max(stage['peak_rss_mb'], peak_rss)
+        if peak_traced is not None:
+            stage['peak_traced_mb'] = max(stage['peak_traced_mb'] or 0.0, peak_traced)
+
+    @contextmanager
+    def stage(self, name):
+        self.begin(name)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    def epoch_callback(self, n_samples):
+        """Keras callback recording seconds and samples/sec of every training epoch"""
+        import tensorflow as tf
+
+        profiler = self
+
+        class EpochThroughput(tf.keras.callbacks.Callback):
+            def on_epoch_begin(self, epoch, logs=None):
+                self._epoch_start = time.perf_counter()
+
+            def on_epoch_end(self, epoch, logs=None):
+                seconds = time.perf_counter() - self._epoch_start
+                profiler.epochs.append({
+                    'epoch': epoch + 1,
+                    'seconds': seconds,
+                    'samples_per_sec': n_samples / seconds if seconds > 0 else None,
+                })
+
+        return EpochThroughput()
+
+    def to_dict(self):
+        """Closes the running stage, so call it after the last stage worth measuring"""
+        self.end()
+        throughput = [e['samples_per_sec'] for e in self.epochs if e['samples_per_sec']]
+        return {
+            'stages': self.stages,
+            'epochs': self.epochs,
+            'mean_samples_per_sec': sum(throughput) / len(throughput) if throughput else None,
+            'peak_rss_mb': get_peak_rss_mb(),
+            'trace_memory': (sorted(self.trace_memory) if isinstance(self.trace_memory, frozenset)
+                             else self.trace_memory),
+        }
+
+    def report(self):
+        print(f"\n{'Stage':<12} {'Wall (s)':>9} {'CPU (s)':>9} {'Traced (MB)':>12} {'Peak RSS (MB)':>14}")
+        for name, stage in self.to_dict()['stages'].items():
+            traced = f"{stage['peak_traced_mb']:>12.1f}" if stage['peak_traced_mb'] is not None else f"{'-':>12}"
+            print(f"{name:<12} {stage['wall_seconds']:>9.2f} {stage['cpu_seconds']:>9.2f} "
+                  f"{traced} {stage['peak_rss_mb']:>14.0f}")
+        rates = [e['samples_per_sec'] for e in self.epochs if e['samples_per_sec']]
+        if rates:
+            print(f"Training throughput: {min(rates):.0f}-{max(rates):.0f} samples/sec per epoch")
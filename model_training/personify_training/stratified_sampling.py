@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+
+from .dataset_store import open_dataset
+
+STREAM_CHUNK_SIZE = 20000
+
+
+def _class_codes(labels):
+    """Sorted class names and each row's class index, in one hashed pass over the labels"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(np.asarray(labels), sort=True)
+    return np.asarray(uniques), codes
+
+
+def _group_rows(codes, n_classes, rows):
+    """Rows reordered so classes are contiguous, keeping their order within each class
+
+    A stable sort of small integer codes is a radix sort in NumPy, so this is
+    linear in the number of rows.
+    """
+    order = rows[np.argsort(codes[rows].astype(np.int16), kind='stable')]
+    counts = np.bincount(codes, minlength=n_classes)
+    return order, counts
+
+
+def balanced_sample(labels, max_per_class, min_per_class=0, seed=42, shuffle=False):
+    """Row indices with at most max_per_class rows of every class, chosen uniformly at random
+
+    One random permutation, grouped by class, then the first cap rows of each
+    group, instead of a filter, sample and concat per class. Classes below
+    min_per_class are kept whole and reported. Returns (rows, report), rows
+    grouped by class (or shuffled), report mapping each class to
+    (available, taken).
+    """
+    classes, codes = _class_codes(labels)
+    rng = np.random.default_rng(seed)
+    order, counts = _group_rows(codes, len(classes), rng.permutation(len(codes)))
+
+    caps = np.minimum(counts, max_per_class)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, counts)
+    rows = order[rank < np.repeat(caps, counts)]
+    if shuffle:
+        rows = rng.permutation(rows)
+
+    report = {str(c): (int(n), int(cap)) for c, n, cap in zip(classes, counts, caps)}
+    for name, (available, _) in report.items():
+        if available < min_per_class:
+            print(f"Warning: {name} has only {available} samples (less than {min_per_class})")
+    return rows, report
+
+
+class ReservoirSampler:
+    """Uniform sample of at most max_per_class items per class from a stream of chunks
+
+    Algorithm R per class: the t-th item of a class fills slot t while the
+    reservoir has room, afterwards it replaces a random slot with probability
+    k / t. Each chunk is handled with array operations per class present in
+    it, and one uniform draw is consumed per item in stream order, so the
+    sample depends only on the seed and the items, not on the chunk size.
+    Memory is bounded by the reservoirs, never the stream.
+    """
+
+    def __init__(self, max_per_class, seed=42):
+        self.max_per_class = max_per_class
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.reservoirs = {}
+        self.seen = {}
+
+    def add(self, labels, items):
+        labels = np.asarray(labels)
+        items = np.asarray(items, dtype=object)
+        draws = self.rng.random(len(labels))
+        classes, codes = _class_codes(labels)
+        order, counts = _group_rows(codes, len(classes), np.arange(len(labels)))
+
+        k = self.max_per_class
+        for label, rows in zip(classes, np.split(order, np.cumsum(counts)[:-1])):
+            label = str(label)
+            reservoir = self.reservoirs.setdefault(label, np.empty(k, dtype=object))
+            t = self.seen.get(label, 0) + np.arange(1, len(rows) + 1)
+            self.seen[label] = int(t[-1])
+            slots = np.where(t <= k, t - 1, np.floor(draws[rows] * t).astype(np.int64))
+            accepted = slots < k
+            slots, rows = slots[accepted], rows[accepted]
+            # Later items win a contested slot, as in the sequential algorithm
+            _, last = np.unique(slots[::-1], return_index=True)
+            keep = len(slots) - 1 - last
+            reservoir[slots[keep]] = items[rows[keep]]
+
+    def sample(self, shuffle=True):
+        """(items, labels) of every reservoir, classes in sorted order unless shuffled"""
+        items, labels = [], []
+        for label in sorted(self.reservoirs):
+            taken = min(self.seen[label], self.max_per_class)
+            items.extend(self.reservoirs[label][:taken])
+            labels.extend([label] * taken)
+        items, labels = np.asarray(items, dtype=object), np.asarray(labels)
+        if shuffle:
+            order = np.random.default_rng(self.seed).permutation(len(items))
+            items, labels = items[order], labels[order]
+        return items, labels
+
+    def report(self):
+        return {label: (self.seen[label], min(self.seen[label], self.max_per_class)) for label in sorted(self.seen)}
+
+
+def stream_balanced_sample(csv_paths, label_column, item_column, max_per_class, seed=42,
+                           chunksize=STREAM_CHUNK_SIZE):
+    """Reservoir-sample one or more CSVs chunk by chunk, without loading any of them whole
+
+    Files are read in the order given, through the columnar store when
+    pyarrow is available. Returns (items, labels, report) like ReservoirSampler.
+    """
+    import pandas as pd
+
+    sampler = ReservoirSampler(max_per_class, seed=seed)
+    columns = [label_column, item_column]
+    if isinstance(csv_paths, (str, os.PathLike)):
+        csv_paths = [csv_paths]
+    for csv_path in csv_paths:
+        store = open_dataset(csv_path)
+        if store is not None:
+            reader = store.iter_frames(columns, chunksize=chunksize)
+        else:
+            reader = pd.read_csv(csv_path, usecols=columns, chunksize=chunksize)
+        for chunk in reader:
+            chunk = chunk.dropna(subset=columns)
+            sampler.add(chunk[label_column].astype(str).to_numpy(), chunk[item_column].to_numpy())
+    items, labels = sampler.sample()
+    return items, labels, sampler.report()
@@ -0,0 +1,196 @@
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import tensorflow as tf
+
+# Quantization variants, smallest change first:
+#   dynamic - weights int8, activations float (the converter's Optimize.DEFAULT)
+#   float16 - weights float16, activations float
+#   int8    - full integer: weights and activations int8, int8 input/output
+#   uint8   - full integer with uint8 input/output
+QUANTIZATION_VARIANTS = ('dynamic', 'float16', 'int8', 'uint8')
+FULL_INTEGER_IO = {'int8': tf.int8, 'uint8': tf.uint8}
+
+REPRESENTATIVE_SAMPLES = 200
+EVAL_BATCH_SIZE = 256
+LATENCY_RUNS = 200
+LATENCY_WARMUP = 10
+
+
+def _dense_rows(features, rows):
+    """Float32 rows of a dense array or CSR matrix, densifying only the requested rows"""
+    batch = features[rows]
+    if sp.issparse(batch):
+        batch = batch.toarray()
+    return np.asarray(batch, dtype=np.float32)
+
+
+def representative_dataset(features, num_samples=REPRESENTATIVE_SAMPLES, seed=42):
+    """Calibration generator over a fixed random subset of the training split"""
+    n_rows = features.shape[0]
+    rows = np.random.default_rng(seed).choice(n_rows, size=min(num_samples, n_rows), replace=False)
+
+    def generator():
+        for row in np.sort(rows):
+            yield [_dense_rows(features, [row])]
+
+    return generator
+
+
+def convert_variant(model, variant, calibration_features=None):
+    """Convert a Keras model with one quantization variant"""
+    if variant not in QUANTIZATION_VARIANTS:
+        raise ValueError(f"Unknown quantization variant {variant!r}, expected one of {QUANTIZATION_VARIANTS}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant in FULL_INTEGER_IO:
+        if calibration_features is None:
+            raise ValueError("Full-integer quantization needs calibration features from the training split")
+        converter.representative_dataset = representative_dataset(calibration_features)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = FULL_INTEGER_IO[variant]
+        converter.inference_output_type = FULL_INTEGER_IO[variant]
+    return converter.convert()
+
+
+def quantize_input(batch, detail):
+    scale, zero_point = detail['quantization']
+    if detail['dtype'] == np.float32 or scale == 0:
+        return batch.astype(detail['dtype'])
+    info = np.iinfo(detail['dtype'])
+    return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(detail['dtype'])
+
+
+def dequantize_output(values, detail):
+    scale, zero_point = detail['quantization']
+    if detail['dtype'] == np.float32 or scale == 0:
+        return values.astype(np.float32)
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+def interpreter_predict(interpreter, features, batch_size=EVAL_BATCH_SIZE):
+    """Float outputs of an allocated interpreter, resizing its input only when the batch shape changes
+
+    The interpreter is left sized for the last batch, so a long-lived one
+    scoring equally sized chunks is resized once.
+    """
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+
+    outputs = []
+    for start in range(0, features.shape[0], batch_size):
+        batch = _dense_rows(features, slice(start, start + batch_size))
+        if tuple(input_detail['shape']) != batch.shape:
+            interpreter.resize_tensor_input(input_detail['index'], batch.shape)
+            interpreter.allocate_tensors()
+            input_detail = interpreter.get_input_details()[0]
+        interpreter.set_tensor(input_detail['index'], quantize_input(batch, input_detail))
+        interpreter.invoke()
+        outputs.append(dequantize_output(interpreter.get_tensor(output_detail['index']), output_detail))
+    return np.concatenate(outputs)
+
+
+def tflite_predict(tflite_model, features, batch_size=EVAL_BATCH_SIZE):
+    """Float outputs of a converted model, quantizing inputs and dequantizing outputs as needed"""
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    interpreter.allocate_tensors()
+    return interpreter_predict(interpreter, features, batch_size)
+
+
+def predicted_classes(outputs):
+    """Class ids from softmax outputs, or from a single sigmoid unit"""
+    if outputs.shape[-1] == 1:
+        return (outputs[:, 0] > 0.5).astype(int)
+    return np.argmax(outputs, axis=1)
+
+
+def measure_latency(tflite_model, features, runs=LATENCY_RUNS, warmup=LATENCY_WARMUP):
+    """Single-example interpreter invoke latency in milliseconds, cycling through the rows of features"""
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    rows = _dense_rows(features, slice(0, runs))
+    rows = [quantize_input(rows[i:i + 1], input_detail) for i in range(len(rows))]
+
+    for i in range(warmup):
+        interpreter.set_tensor(input_detail['index'], rows[i % len(rows)])
+        interpreter.invoke()
+    timings = np.empty(runs)
+    for i in range(runs):
+        interpreter.set_tensor(input_detail['index'], rows[i % len(rows)])
+        start = time.perf_counter()
+        interpreter.invoke()
+        timings[i] = (time.perf_counter() - start) * 1000
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'mean_ms': float(timings.mean())}
+
+
+def export_tflite_variants(model, assets_dir, name, X_train, X_test, y_test, keras_accuracy,
+                           variants=('dynamic', 'int8'), primary_variant=None):
+    """Convert, save and evaluate every quantization variant of a model
+
+    The primary variant is written to {name}.tflite (the file the app loads);
+    the others to {name}_{variant}.tflite. Full-integer variants are calibrated
+    on representative rows of X_train. Returns one report per variant with file
+    size, accuracy delta against the Keras model and interpreter latency.
+    """
+    from .tflite_parity import DEFAULT_TOLERANCES, exceeded_tolerances, keras_outputs, parity_report
+
+    primary_variant = primary_variant or variants[0]
+    y_test = np.asarray(y_test)
+    reference = keras_outputs(model, X_test)
+
+    reports = []
+    for variant in variants:
+        print(f"Converting to TensorFlow Lite ({variant})...")
+        try:
+            tflite_model = convert_variant(model, variant, calibration_features=X_train)
+        except Exception as e:
+            print(f"Warning: TensorFlow Lite conversion failed ({variant}): {e}")
+            reports.append({'variant': variant, 'error': str(e)})
+            continue
+
+        filename = f'{name}.tflite' if variant == primary_variant else f'{name}_{variant}.tflite'
+        tflite_path = os.path.join(assets_dir, filename)
+        # Renamed into place, so a reader never loads a partially written model
+        tmp_path = f'{tflite_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(tflite_model)
+        os.replace(tmp_path, tflite_path)
+
+        # Whole test split through both models: probability error and argmax agreement
+        parity = parity_report(reference, tflite_predict(tflite_model, X_test), y_test)
+        accuracy = parity['tflite_accuracy']
+        report = {
+            'variant': variant,
+            'file': filename,
+            'size_kb': len(tflite_model) / 1024,
+            'accuracy': accuracy,
+            'accuracy_delta': accuracy - float(keras_accuracy),
+            'latency': measure_latency(tflite_model, X_test),
+            'parity': parity,
+            'parity_exceeded': exceeded_tolerances(parity, DEFAULT_TOLERANCES[variant]),
+        }
+        reports.append(report)
+        print(f"✓ TensorFlow Lite model saved: {tflite_path}")
+        print(f"✓ {variant}: {report['size_kb']:.1f} KB, accuracy {accuracy:.4f} "
+              f"({report['accuracy_delta']:+.4f} vs Keras), p50 latency {report['latency']['p50_ms']:.3f} ms")
+        if report['parity_exceeded']:
+            print(f"Warning: {variant} output is outside Keras parity tolerance: {report['parity_exceeded']}")
+
+    return reports
+
+
+def print_variant_table(reports):
+    print(f"\n{'Variant':<9} {'Size (KB)':>10} {'Accuracy':>9} {'Delta':>8} {'p50 (ms)':>9}")
+    for r in reports:
+        if 'error' in r:
+            print(f"{r['variant']:<9} {'failed':>10}")
+            continue
+        print(f"{r['variant']:<9} {r['size_kb']:>10.1f} {r['accuracy']:>9.4f} "
+              f"{r['accuracy_delta']:>+8.4f} {r['latency']['p50_ms']:>9.3f}")
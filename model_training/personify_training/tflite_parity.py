@@ -0,0 +1,145 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+import tensorflow as tf
+
+from .sparse_batches import CSRBatchSequence
+from .model_variants import VARIANTS, artifact_path, artifacts_available, load_params, load_test_split
+from .paths import BENCHMARK_DIR
+from .tflite_export import predicted_classes, tflite_predict
+
+RESULTS_PATH = BENCHMARK_DIR / 'tflite_parity.json'
+EVAL_BATCH_SIZE = 256
+
+# Allowed deviation of a converted model from its Keras source, per quantization variant.
+# accuracy_drop only limits losses; a converted model scoring higher is not a failure.
+DEFAULT_TOLERANCES = {
+    'dynamic': {'max_abs_error': 0.05, 'mean_abs_error': 0.005, 'argmax_disagreement': 0.01, 'accuracy_drop': 0.01},
+    'float16': {'max_abs_error': 0.01, 'mean_abs_error': 0.001, 'argmax_disagreement': 0.005, 'accuracy_drop': 0.005},
+    'int8': {'max_abs_error': 0.2, 'mean_abs_error': 0.02, 'argmax_disagreement': 0.03, 'accuracy_drop': 0.02},
+    'uint8': {'max_abs_error': 0.2, 'mean_abs_error': 0.02, 'argmax_disagreement': 0.03, 'accuracy_drop': 0.02},
+}
+
+
+def keras_outputs(model, features, batch_size=EVAL_BATCH_SIZE):
+    if sp.issparse(features):
+        return model.predict(CSRBatchSequence(features, batch_size=batch_size), verbose=0)
+    return model.predict(features, batch_size=batch_size, verbose=0)
+
+
+def parity_report(reference, converted, y_true):
+    """Probability error, prediction disagreement and accuracy change of converted vs reference outputs"""
+    reference = np.asarray(reference, dtype=np.float32)
+    converted = np.asarray(converted, dtype=np.float32)
+    y_true = np.asarray(y_true)
+    errors = np.abs(reference - converted)
+    reference_classes = predicted_classes(reference)
+    converted_classes = predicted_classes(converted)
+    reference_accuracy = float(np.mean(reference_classes == y_true))
+    converted_accuracy = float(np.mean(converted_classes == y_true))
+    return {
+        'samples': int(len(y_true)),
+        'max_abs_error': float(errors.max()),
+        'mean_abs_error': float(errors.mean()),
+        'argmax_disagreement': float(np.mean(reference_classes != converted_classes)),
+        'keras_accuracy': reference_accuracy,
+        'tflite_accuracy': converted_accuracy,
+        'accuracy_delta': converted_accuracy - reference_accuracy,
+    }
+
+
+def exceeded_tolerances(report, tolerances):
+    """Limits a parity report breaks, with the offending values; empty when it passes"""
+    values = dict(report, accuracy_drop=-report['accuracy_delta'])
+    metrics = ('max_abs_error', 'mean_abs_error', 'argmax_disagreement', 'accuracy_drop')
+    return {metric: values[metric] for metric in metrics if values[metric] > tolerances[metric]}
+
+
+def _describe(exceeded, tolerances):
+    return ', '.join(f"{metric}={value:.4g} (limit {tolerances[metric]:.4g})" for metric, value in exceeded.items())
+
+
+def check_tflite_parity(model, tflite_model, X_test, y_test, tolerances, reference=None):
+    """Run the whole test split through Keras and the interpreter; AssertionError past tolerance
+
+    reference may hold precomputed Keras outputs so several variants share one predict pass.
+    """
+    if reference is None:
+        reference = keras_outputs(model, X_test)
+    report = parity_report(reference, tflite_predict(tflite_model, X_test), y_test)
+    exceeded = exceeded_tolerances(report, tolerances)
+    if exceeded:
+        raise AssertionError(f"TFLite output differs from Keras beyond tolerance: {_describe(exceeded, tolerances)}")
+    return report
+
+
+def variant_of_file(params, filename):
+    """Quantization variant of a .tflite file, as recorded by the export stage"""
+    for report in params.get('tflite_variants', []):
+        if report.get('file') == filename:
+            return report['variant']
+    return 'dynamic'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keras vs TFLite parity over each model's full test split")
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--tolerances', type=Path,
+                        help="JSON file overriding DEFAULT_TOLERANCES, keyed by quantization variant")
+    parser.add_argument('--output', type=Path, default=RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    tolerances = {variant: dict(limits) for variant, limits in DEFAULT_TOLERANCES.items()}
+    if args.tolerances:
+        with open(args.tolerances, 'r') as f:
+            for variant, limits in json.load(f).items():
+                tolerances.setdefault(variant, {}).update(limits)
+
+    print("=== Keras vs TensorFlow Lite Parity ===")
+    results, failures = [], 0
+    for name in args.variants:
+        if not artifacts_available(name):
+            print(f"\nSkipping {name}: no artifacts from {VARIANTS[name]['script']}")
+            continue
+        params = load_params(name)
+        X_test, y_test = load_test_split(name)
+        model = tf.keras.models.load_model(artifact_path(VARIANTS[name], 'keras'))
+        reference = keras_outputs(model, X_test)
+
+        base = Path(VARIANTS[name]['tflite']).stem
+        for tflite_path in sorted(Path(artifact_path(VARIANTS[name], 'tflite')).parent.glob(f'{base}*.tflite')):
+            suffix = tflite_path.stem[len(base):]
+            if suffix and not suffix.startswith('_'):
+                continue
+            quantization = variant_of_file(params, tflite_path.name)
+            with open(tflite_path, 'rb') as f:
+                tflite_model = f.read()
+            report = parity_report(reference, tflite_predict(tflite_model, X_test), y_test)
+            exceeded = exceeded_tolerances(report, tolerances[quantization])
+            results.append(dict(report, model=name, file=tflite_path.name, quantization=quantization,
+                                passed=not exceeded, exceeded=exceeded))
+            if exceeded:
+                failures += 1
+                print(f"✗ {tflite_path.name} ({quantization}): {_describe(exceeded, tolerances[quantization])}")
+            else:
+                print(f"✓ {tflite_path.name} ({quantization}): max err {report['max_abs_error']:.2e}, "
+                      f"mean err {report['mean_abs_error']:.2e}, disagreement {report['argmax_disagreement']:.2%}, "
+                      f"Δacc {report['accuracy_delta']:+.4f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'tolerances': tolerances, 'results': results, 'created_timestamp': time.time()}, f, indent=2)
+    print(f"\n✓ Results saved: {args.output}")
+
+    if failures:
+        print(f"✗ {failures} model file(s) outside parity tolerance")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
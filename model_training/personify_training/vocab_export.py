@@ -0,0 +1,108 @@
+import json
+import sys
+
+import numpy as np
+
+from .hashed_tfidf import HashedTfidfVectorizer
+from .reference_featurizer import FORMAT_VERSION, HEADER, MAGIC, MODE_HASHING, MODE_VOCABULARY, ReferenceFeaturizer
+
+
+def _vectorizer_config(vectorizer, text_cleaning=None):
+    """Tokenization and weighting settings needed to reproduce transform()"""
+    if isinstance(vectorizer, HashedTfidfVectorizer):
+        analyzer_source = vectorizer.hasher
+        use_idf = True
+    else:
+        analyzer_source = vectorizer
+        use_idf = vectorizer.use_idf
+
+    if analyzer_source.analyzer != 'word' or analyzer_source.preprocessor or analyzer_source.tokenizer:
+        raise ValueError("Only the built-in word analyzer can be exported")
+    if not use_idf:
+        raise ValueError("Vectorizers without idf weighting are not supported")
+
+    stop_words = analyzer_source.get_stop_words()
+    return {
+        'lowercase': bool(analyzer_source.lowercase),
+        'strip_accents': analyzer_source.strip_accents,
+        'token_pattern': analyzer_source.token_pattern,
+        'stop_words': sorted(stop_words) if stop_words else None,
+        'ngram_range': list(analyzer_source.ngram_range),
+        'sublinear_tf': bool(vectorizer.sublinear_tf),
+        'smooth_idf': bool(vectorizer.smooth_idf),
+        'norm': vectorizer.norm,
+        'text_cleaning': text_cleaning,
+    }
+
+
+def export_vectorizer(vectorizer, path, text_cleaning=None):
+    """Write a fitted TfidfVectorizer / HashedTfidfVectorizer as a compact binary file"""
+    config = json.dumps(_vectorizer_config(vectorizer, text_cleaning), sort_keys=True).encode('utf-8')
+
+    if isinstance(vectorizer, HashedTfidfVectorizer):
+        mode = MODE_HASHING
+        idf = np.asarray(vectorizer.idf_, dtype='<f8')
+        terms, columns = [], []
+    else:
+        mode = MODE_VOCABULARY
+        idf = np.asarray(vectorizer.idf_, dtype='<f8')
+        encoded = sorted((term.encode('utf-8'), col) for term, col in vectorizer.vocabulary_.items())
+        terms = [term for term, _ in encoded]
+        columns = [col for _, col in encoded]
+
+    offsets = np.zeros(len(terms) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(term) for term in terms], dtype=np.int64)
+    blob = b''.join(terms)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, mode, len(idf), len(terms), len(config), len(blob)))
+        f.write(config)
+        f.write(b'\0' * (-len(config) % 8))
+        f.write(idf.tobytes())
+        f.write(offsets.tobytes())
+        f.write(np.asarray(columns, dtype='<u4').tobytes())
+        f.write(blob)
+    return path
+
+
+def check_parity(vectorizer, path, texts, atol=1e-12):
+    """Compare the reference featurizer on the exported file with vectorizer.transform
+
+    Raises AssertionError when a document has a different set of non-zero
+    columns or any value differs by more than atol.
+    """
+    featurizer = ReferenceFeaturizer.load(path)
+    expected = vectorizer.transform(texts).tocsr()
+    expected.sort_indices()
+
+    max_error = 0.0
+    for i, text in enumerate(texts):
+        row = expected[i]
+        actual = featurizer.transform_one(text)
+        if list(actual) != row.indices.tolist():
+            raise AssertionError(f"Document {i}: non-zero columns differ from TfidfVectorizer.transform")
+        if actual:
+            error = float(np.max(np.abs(np.fromiter(actual.values(), dtype=np.float64) - row.data)))
+            max_error = max(max_error, error)
+    if max_error > atol:
+        raise AssertionError(f"Max absolute difference {max_error:.3e} exceeds tolerance {atol:.0e}")
+    return max_error
+
+
+def main():
+    """Check an exported file against its pickled vectorizer: python -m personify_training.vocab_export VECTORIZER.pickle FILE.tfv TEXTS.txt"""
+    import pickle
+
+    if len(sys.argv) != 4:
+        print(main.__doc__)
+        sys.exit(2)
+    with open(sys.argv[1], 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open(sys.argv[3], encoding='utf-8') as f:
+        texts = [line.rstrip('\n') for line in f]
+    max_error = check_parity(vectorizer, sys.argv[2], texts)
+    print(f"✓ Parity OK on {len(texts)} documents (max abs error {max_error:.2e})")
+
+
+if __name__ == "__main__":
+    main()
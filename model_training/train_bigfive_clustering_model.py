@@ -1,20 +1,25 @@
 import pandas as pd
 import numpy as np
 import tensorflow as tf
-from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score, silhouette_score
-from sklearn.decomposition import PCA
+from sklearn.metrics import classification_report, accuracy_score
+from pandas.api.types import union_categoricals
+from personify_training.bigfive_scoring import BigFiveScorer, demographic_features
+from personify_training.dataset_store import open_dataset
+from personify_training.feature_cache import FeatureCache, content_key
+from personify_training.kmeans_sweep import sweep_kmeans, refine_winner
+from personify_training.centroid_export import CENTROID_FILE, DEFAULT_TEMPERATURE, export_centroids
+from personify_training.cluster_quality import DEFAULT_SAMPLE_SIZE, resolve_mode
+from personify_training.stage_profiler import StageProfiler, get_peak_rss_mb
+from personify_training.tflite_export import export_tflite_variants, print_variant_table
+from personify_training.model_variants import file_digests, serving_files
+from personify_training.paths import ASSETS_DIR, CACHE_DIR, FEATURE_CACHE_DIR, BIGFIVE_CSV
 import pickle
 import json
 import os
-import hashlib
 from pathlib import Path
 import time
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import Counter
 
 # Set random seeds for reproducibility
 np.random.seed(42)
@@ -24,26 +29,63 @@ tf.random.set_seed(42)
 tf.config.set_visible_devices([], 'GPU')
 
 # Cache directory for preprocessed data
-CACHE_DIR = Path('../cache')
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-def load_and_preprocess_bigfive_data(csv_path, use_full_dataset=False, max_samples=50000):
+# Content-addressed cache for preprocessed data and features
+FEATURE_CACHE = FeatureCache(FEATURE_CACHE_DIR)
+
+# Per-stage wall/CPU time and memory, written to the params JSON under 'profile'
+PROFILER = StageProfiler()
+
+def stream_bigfive_chunks(csv_path, personality_cols, other_cols, chunksize=100000, nrows=None):
+    """Stream the Big Five TSV in chunks, yielding only clean rows with compact dtypes"""
+    # Items are read as float32 so 'NULL' and blank answers become NaN, they are
+    # narrowed to uint8 once the range mask has dropped every invalid row.
+    # Prefer the memory-mapped columnar store, fall back to parsing the TSV
+    store = open_dataset(csv_path, sep='\t', numeric_dtype=np.float32)
+    if store is not None:
+        reader = store.iter_frames(personality_cols + other_cols, chunksize=chunksize, nrows=nrows)
+    else:
+        dtypes = {col: np.float32 for col in personality_cols}
+        dtypes.update({col: np.float32 for col in other_cols if col != 'country'})
+        if 'country' in other_cols:
+            dtypes['country'] = 'category'
+        reader = pd.read_csv(
+            csv_path,
+            sep='\t',
+            usecols=personality_cols + other_cols,
+            dtype=dtypes,
+            chunksize=chunksize,
+            nrows=nrows
+        )
+    
+    for chunk in reader:
+        items = chunk[personality_cols].to_numpy()
+        
+        # One vectorized mask per chunk: every item answered and inside the 1-5 range
+        # (NaN fails both comparisons) and, when available, a single submission per IP
+        mask = ((items >= 1) & (items <= 5)).all(axis=1)
+        if 'IPC' in chunk.columns:
+            mask &= chunk['IPC'].to_numpy() == 1
+        
+        clean = chunk.loc[mask, other_cols].reset_index(drop=True)
+        if 'country' in clean.columns:
+            clean['country'] = clean['country'].astype('category')
+        item_frame = pd.DataFrame(items[mask].astype(np.uint8), columns=personality_cols)
+        yield len(chunk), pd.concat([item_frame, clean], axis=1)
+
+def load_and_preprocess_bigfive_data(csv_path, use_full_dataset=False, max_samples=50000, chunksize=100000):
     """Load and preprocess the Big Five personality dataset"""
     print("Loading Big Five personality dataset...")
     
-    # Create cache key based on configuration
-    config_key = f"bigfive_{max_samples}"
-    cache_key = hashlib.md5(f"{csv_path}_{config_key}_enhanced".encode()).hexdigest()
-    cache_file = CACHE_DIR / f"bigfive_data_{cache_key}.pkl"
-    
-    # Try to load from cache
-    if cache_file.exists():
+    # Cache key covers the TSV contents and every loading parameter
+    cache_key = content_key('bigfive_data', Path(csv_path), use_full_dataset=use_full_dataset,
+                            max_samples=None if use_full_dataset else max_samples,
+                            codebook=BigFiveScorer.from_codebook().to_dict())
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
         print("Loading preprocessed data from cache...")
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
-    
-    # Load data with chunking for large files
-    print("Reading CSV file (this may take a while for large files)...")
+        return cached['features'], cached['feature_names'], cached['df']
     
     # Big Five trait columns based on codebook
     ext_cols = [f'EXT{i}' for i in range(1, 11)]  # Extraversion
@@ -58,143 +100,62 @@ def load_and_preprocess_bigfive_data(csv_path, use_full_dataset=False, max_sampl
     # Additional useful columns that definitely exist
     other_cols = ['country', 'screenw', 'screenh', 'testelapse', 'IPC']
     
-    # Read data efficiently
-    try:
-        # Read header first to check available columns - handle tab separation
-        header_df = pd.read_csv(csv_path, nrows=0, sep='\t')
-        available_cols = header_df.columns.tolist()
-        print(f"Available columns in dataset: {len(available_cols)}")
-        print(f"Sample columns: {available_cols[:10]}")
-        
-        # Filter to only use columns that actually exist
-        personality_available = [col for col in personality_cols if col in available_cols]
-        other_available = [col for col in other_cols if col in available_cols]
-        
-        print(f"Found {len(personality_available)} personality trait columns")
-        print(f"Found {len(other_available)} demographic columns")
-        
-        if len(personality_available) < 10:  # Need at least some personality data
-            raise ValueError(f"Insufficient personality data: only {len(personality_available)} columns found")
-        
-        # Read the actual data
-        columns_to_use = personality_available + other_available
-        print(f"Reading {len(columns_to_use)} columns from dataset...")
-        df = pd.read_csv(csv_path, usecols=columns_to_use, nrows=max_samples if not use_full_dataset else None, sep='\t')
-        
-        # Debug: Print sample of columns that were actually read
-        print(f"Successfully read data with columns: {df.columns.tolist()[:10]}{'...' if len(df.columns) > 10 else ''}")
-        print(f"Data types: {df.dtypes.iloc[:5]}")
-        
-    except Exception as e:
-        print(f"Error reading with specific columns: {e}")
-        print("Falling back to reading all columns...")
-        df = pd.read_csv(csv_path, nrows=max_samples if not use_full_dataset else None, sep='\t')
-        
-        # Filter to available columns
-        personality_available = [col for col in personality_cols if col in df.columns]
-        other_available = [col for col in other_cols if col in df.columns]
-    
-    print(f"Original dataset shape: {df.shape}")
+    # Read header first to check available columns - handle tab separation
+    header_df = pd.read_csv(csv_path, nrows=0, sep='\t')
+    available_cols = header_df.columns.tolist()
+    print(f"Available columns in dataset: {len(available_cols)}")
     
-    # Clean data
-    print("Cleaning data...")
+    # Filter to only use columns that actually exist
+    personality_available = [col for col in personality_cols if col in available_cols]
+    other_available = [col for col in other_cols if col in available_cols]
     
-    # Remove rows with missing personality trait values
-    if len(personality_available) > 0:
-        df = df.dropna(subset=personality_available[:10])  # At least first 10 columns
+    print(f"Found {len(personality_available)} personality trait columns")
+    print(f"Found {len(other_available)} demographic columns")
     
-    # Filter for quality responses (IPC = 1 for single submissions)
-    if 'IPC' in df.columns:
-        initial_size = len(df)
-        df = df[df['IPC'] == 1]
-        print(f"Filtered to single submissions: {initial_size} -> {len(df)} samples")
+    if len(personality_available) < 10:  # Need at least some personality data
+        raise ValueError(f"Insufficient personality data: only {len(personality_available)} columns found")
     
-    # Remove outliers (responses outside 1-5 range) for personality columns
-    for col in personality_available:
-        if col in df.columns:
-            df = df[(df[col] >= 1) & (df[col] <= 5)]
+    # Stream the file in chunks so parse memory stays flat as the file grows
+    nrows = None if use_full_dataset else max_samples
+    print(f"Streaming {len(personality_available) + len(other_available)} columns "
+          f"in chunks of {chunksize} rows ({'full dataset' if use_full_dataset else f'first {max_samples} rows'})...")
     
-    print(f"After cleaning: {df.shape}")
-    
-    # Calculate Big Five scores based on codebook
+    # Trait scores are computed per chunk with the IPIP key matrix from the codebook
     print("Calculating Big Five trait scores...")
-    
-    trait_scores = []  # Initialize empty list to collect trait scores
-    
-    # Extraversion (EXT2, EXT4, EXT6, EXT8, EXT10 are reverse scored)
-    ext_available = [col for col in ext_cols if col in df.columns]
-    if len(ext_available) >= 8:  # Need at least 8 out of 10 for reliable score
-        ext_forward = [f'EXT{i}' for i in [1, 3, 5, 7, 9] if f'EXT{i}' in df.columns]
-        ext_reverse = [f'EXT{i}' for i in [2, 4, 6, 8, 10] if f'EXT{i}' in df.columns]
-        
-        forward_sum = df[ext_forward].sum(axis=1) if ext_forward else 0
-        reverse_sum = (6 - df[ext_reverse]).sum(axis=1) if ext_reverse else 0
-        total_items = len(ext_forward) + len(ext_reverse)
-        
-        if total_items > 0:
-            df['EXT_score'] = (forward_sum + reverse_sum) / total_items
-            trait_scores.append('EXT_score')
-            print(f"  Extraversion: {total_items} items used")
-    
-    # Emotional Stability (EST1, EST3, EST5, EST6, EST7, EST8, EST9, EST10 are reverse scored)
-    est_available = [col for col in est_cols if col in df.columns]
-    if len(est_available) >= 8:
-        est_forward = [f'EST{i}' for i in [2, 4] if f'EST{i}' in df.columns]
-        est_reverse = [f'EST{i}' for i in [1, 3, 5, 6, 7, 8, 9, 10] if f'EST{i}' in df.columns]
-        
-        forward_sum = df[est_forward].sum(axis=1) if est_forward else 0
-        reverse_sum = (6 - df[est_reverse]).sum(axis=1) if est_reverse else 0
-        total_items = len(est_forward) + len(est_reverse)
-        
-        if total_items > 0:
-            df['EST_score'] = (forward_sum + reverse_sum) / total_items
-            trait_scores.append('EST_score')
-            print(f"  Emotional Stability: {total_items} items used")
-    
-    # Agreeableness (AGR1, AGR3, AGR5, AGR7 are reverse scored)
-    agr_available = [col for col in agr_cols if col in df.columns]
-    if len(agr_available) >= 8:
-        agr_forward = [f'AGR{i}' for i in [2, 4, 6, 8, 9, 10] if f'AGR{i}' in df.columns]
-        agr_reverse = [f'AGR{i}' for i in [1, 3, 5, 7] if f'AGR{i}' in df.columns]
-        
-        forward_sum = df[agr_forward].sum(axis=1) if agr_forward else 0
-        reverse_sum = (6 - df[agr_reverse]).sum(axis=1) if agr_reverse else 0
-        total_items = len(agr_forward) + len(agr_reverse)
-        
-        if total_items > 0:
-            df['AGR_score'] = (forward_sum + reverse_sum) / total_items
-            trait_scores.append('AGR_score')
-            print(f"  Agreeableness: {total_items} items used")
-    
-    # Conscientiousness (CSN2, CSN4, CSN6, CSN8 are reverse scored)
-    csn_available = [col for col in csn_cols if col in df.columns]
-    if len(csn_available) >= 8:
-        csn_forward = [f'CSN{i}' for i in [1, 3, 5, 7, 9, 10] if f'CSN{i}' in df.columns]
-        csn_reverse = [f'CSN{i}' for i in [2, 4, 6, 8] if f'CSN{i}' in df.columns]
-        
-        forward_sum = df[csn_forward].sum(axis=1) if csn_forward else 0
-        reverse_sum = (6 - df[csn_reverse]).sum(axis=1) if csn_reverse else 0
-        total_items = len(csn_forward) + len(csn_reverse)
-        
-        if total_items > 0:
-            df['CSN_score'] = (forward_sum + reverse_sum) / total_items
-            trait_scores.append('CSN_score')
-            print(f"  Conscientiousness: {total_items} items used")
-    
-    # Openness (OPN2, OPN4, OPN6 are reverse scored)
-    opn_available = [col for col in opn_cols if col in df.columns]
-    if len(opn_available) >= 8:
-        opn_forward = [f'OPN{i}' for i in [1, 3, 5, 7, 8, 9, 10] if f'OPN{i}' in df.columns]
-        opn_reverse = [f'OPN{i}' for i in [2, 4, 6] if f'OPN{i}' in df.columns]
-        
-        forward_sum = df[opn_forward].sum(axis=1) if opn_forward else 0
-        reverse_sum = (6 - df[opn_reverse]).sum(axis=1) if opn_reverse else 0
-        total_items = len(opn_forward) + len(opn_reverse)
-        
-        if total_items > 0:
-            df['OPN_score'] = (forward_sum + reverse_sum) / total_items
-            trait_scores.append('OPN_score')
-            print(f"  Openness: {total_items} items used")
+    scorer = BigFiveScorer.from_codebook(available_items=personality_available)
+    for trait in scorer.traits:
+        print(f"  {trait}: {sum(item.startswith(trait) for item in scorer.items)} items used")
+    
+    chunks = []
+    rows_read = 0
+    for chunk_rows, clean_chunk in stream_bigfive_chunks(
+        csv_path, personality_available, other_available, chunksize=chunksize, nrows=nrows
+    ):
+        rows_read += chunk_rows
+        if scorer.traits:
+            scores = scorer.score(clean_chunk[scorer.items].to_numpy())
+            clean_chunk[scorer.score_names] = scores
+        chunks.append(clean_chunk)
+        print(f"  Read {rows_read} rows, kept {sum(len(c) for c in chunks)} "
+              f"(peak RSS {get_peak_rss_mb():.0f} MB)")
+    
+    if not chunks:
+        raise ValueError(f"No rows could be read from {csv_path}")
+    
+    # Chunks carry their own country categories, merge them before concatenating
+    if 'country' in other_available:
+        countries = union_categoricals([c['country'] for c in chunks])
+        for c in chunks:
+            c['country'] = pd.Categorical(c['country'], categories=countries.categories)
+    df = pd.concat(chunks, ignore_index=True)
+    del chunks
+    
+    print(f"Original dataset rows: {rows_read}")
+    print(f"After cleaning (IPC == 1, all items in 1-5): {df.shape}")
+    print(f"Retained data size: {df.memory_usage(deep=True).sum() / (1024 * 1024):.1f} MB")
+    print(f"Peak RSS after loading: {get_peak_rss_mb():.0f} MB")
+    
+    trait_scores = scorer.score_names
     
     # Create feature matrix for clustering
     if len(trait_scores) >= 3:  # Need at least 3 traits for meaningful clustering
@@ -212,23 +173,9 @@ def load_and_preprocess_bigfive_data(csv_path, use_full_dataset=False, max_sampl
     print(f"Features: {feature_names}")
     
     # Add demographic features if available
-    demo_features = []
-    demo_names = []
-    
-    if 'screenw' in df.columns and 'screenh' in df.columns:
-        # Screen resolution
-        screen_ratio = df['screenw'] / (df['screenh'] + 1e-8)  # Avoid division by zero
-        demo_features.append(screen_ratio.values.reshape(-1, 1))
-        demo_names.append('screen_ratio')
-    
-    if 'testelapse' in df.columns:
-        # Log transform test time to handle outliers
-        test_time = np.log1p(df['testelapse'].values)
-        demo_features.append(test_time.reshape(-1, 1))
-        demo_names.append('log_test_time')
-    
-    if demo_features:
-        demo_matrix = np.hstack(demo_features)
+    demo_matrix, demo_names = demographic_features(df)
+    
+    if demo_names:
         # Normalize demographic features
         from sklearn.preprocessing import StandardScaler
         demo_scaler = StandardScaler()
@@ -242,12 +189,12 @@ def load_and_preprocess_bigfive_data(csv_path, use_full_dataset=False, max_sampl
         raise ValueError("No valid features could be extracted from the dataset!")
     
     print("Caching preprocessed data...")
-    with open(cache_file, 'wb') as f:
-        pickle.dump((features, feature_names, df), f)
+    FEATURE_CACHE.put(cache_key, {'features': features, 'feature_names': feature_names, 'df': df})
     
     return features, feature_names, df
 
-def perform_kmeans_clustering(features, n_clusters_range=(3, 12), random_state=42):
+def perform_kmeans_clustering(features, n_clusters_range=(3, 12), random_state=42, n_jobs=-1,
+                              silhouette_mode='auto', silhouette_sample_size=DEFAULT_SAMPLE_SIZE):
     """Perform K-Means clustering with optimal cluster selection"""
     print("Performing K-Means clustering analysis...")
     
@@ -258,23 +205,24 @@ def perform_kmeans_clustering(features, n_clusters_range=(3, 12), random_state=4
     print(f"Scaled features shape: {features_scaled.shape}")
     print(f"Testing cluster range: {n_clusters_range[0]} to {n_clusters_range[1]}")
     
-    # Test different numbers of clusters
-    silhouette_scores = []
-    inertias = []
+    # Test different numbers of clusters, each candidate in its own worker process
     cluster_range = range(n_clusters_range[0], n_clusters_range[1] + 1)
-    
-    for n_clusters in cluster_range:
-        print(f"Testing {n_clusters} clusters...")
-        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10, max_iter=300)
-        cluster_labels = kmeans.fit_predict(features_scaled)
-        
-        # Calculate silhouette score
-        sil_score = silhouette_score(features_scaled, cluster_labels)
-        silhouette_scores.append(sil_score)
-        inertias.append(kmeans.inertia_)
-        
-        print(f"  Silhouette score: {sil_score:.4f}")
-        print(f"  Inertia: {kmeans.inertia_:.2f}")
+    quality = {'mode': silhouette_mode, 'sample_size': silhouette_sample_size}
+    print(f"Silhouette mode: {resolve_mode(silhouette_mode, len(features_scaled))} (requested '{silhouette_mode}')")
+    candidates = sweep_kmeans(features_scaled, cluster_range, random_state=random_state, n_jobs=n_jobs,
+                              quality=quality)
+    silhouette_scores = [c['silhouette_score'] for c in candidates]
+    inertias = [c['inertia'] for c in candidates]
+    
+    for candidate in candidates:
+        print(f"{candidate['n_clusters']} clusters:")
+        silhouette = candidate['silhouette']
+        if 'ci_low' in silhouette:
+            print(f"  Silhouette score: {candidate['silhouette_score']:.4f} "
+                  f"({silhouette['confidence']:.0%} CI {silhouette['ci_low']:.4f}-{silhouette['ci_high']:.4f}, n={silhouette['sample_size']})")
+        else:
+            print(f"  Silhouette score: {candidate['silhouette_score']:.4f}")
+        print(f"  Inertia: {candidate['inertia']:.2f}")
     
     # Find optimal number of clusters
     optimal_idx = np.argmax(silhouette_scores)
@@ -284,10 +232,9 @@ def perform_kmeans_clustering(features, n_clusters_range=(3, 12), random_state=4
     print(f"\nOptimal number of clusters: {optimal_clusters}")
     print(f"Best silhouette score: {optimal_silhouette:.4f}")
     
-    # Fit final model with optimal clusters
-    print(f"Fitting final K-Means model with {optimal_clusters} clusters...")
-    final_kmeans = KMeans(n_clusters=optimal_clusters, random_state=random_state, n_init=20, max_iter=500)
-    final_labels = final_kmeans.fit_predict(features_scaled)
+    # Warm-start the final model from the winning fit instead of refitting from scratch
+    print(f"Refining final K-Means model with {optimal_clusters} clusters from the sweep's best fit...")
+    final_kmeans, final_labels = refine_winner(features_scaled, candidates[optimal_idx], random_state=random_state)
     
     # Analyze cluster characteristics
     print("\nCluster Analysis:")
@@ -300,6 +247,9 @@ def perform_kmeans_clustering(features, n_clusters_range=(3, 12), random_state=4
         'optimal_clusters': optimal_clusters,
         'silhouette_score': optimal_silhouette,
         'silhouette_scores': silhouette_scores,
+        'silhouette_mode': candidates[optimal_idx]['silhouette']['mode'],
+        'silhouette_requested_mode': silhouette_mode,
+        'silhouette_details': [dict(c['silhouette'], n_clusters=c['n_clusters']) for c in candidates],
         'inertias': inertias,
         'cluster_range': list(cluster_range)
     }
@@ -396,19 +346,27 @@ def main():
     
     # Configuration
     MAX_SAMPLES = 100000  # Limit for faster processing
+    USE_FULL_DATASET = False  # Stream every row of the TSV instead of the first MAX_SAMPLES
+    STREAM_CHUNK_SIZE = 100000  # Rows parsed per chunk, bounds the loader's working memory
     BATCH_SIZE = 128
     EPOCHS = 50
     N_CLUSTERS_RANGE = (5, 10)  # Test 5-10 clusters
+    SWEEP_N_JOBS = -1  # Processes for the K sweep (-1 = one per candidate, up to all cores)
+    SILHOUETTE_MODE = 'auto'  # 'auto', 'exact', 'sampled' (stratified + bootstrap CI) or 'centroid' (O(n*k))
+    SILHOUETTE_SAMPLE_SIZE = 10000
+    TFLITE_VARIANTS = ('float16', 'int8', 'uint8')  # First is shipped as bigfive_clustering_model.tflite
     
     print("=== Big Five Personality Clustering Model (K-Means + Deep Learning) ===")
     print(f"Configuration:")
-    print(f"  • Max Samples: {MAX_SAMPLES}")
+    print(f"  • Max Samples: {'all' if USE_FULL_DATASET else MAX_SAMPLES}")
+    print(f"  • Stream Chunk Size: {STREAM_CHUNK_SIZE}")
     print(f"  • Batch Size: {BATCH_SIZE}")
     print(f"  • Epochs: {EPOCHS}")
     print(f"  • Cluster Range: {N_CLUSTERS_RANGE}")
     
+    PROFILER.begin('load')
     # Load and preprocess data
-    csv_path = '../lib/data/data-final.csv'
+    csv_path = str(BIGFIVE_CSV)
     if not os.path.exists(csv_path):
         print(f"Error: Dataset file not found at {csv_path}")
         print("Please ensure the Big Five dataset is available.")
@@ -416,8 +374,9 @@ def main():
     
     features, feature_names, df = load_and_preprocess_bigfive_data(
         csv_path,
-        use_full_dataset=False,
-        max_samples=MAX_SAMPLES
+        use_full_dataset=USE_FULL_DATASET,
+        max_samples=MAX_SAMPLES,
+        chunksize=STREAM_CHUNK_SIZE
     )
     
     print(f"\nDataset summary:")
@@ -425,13 +384,26 @@ def main():
     print(f"  • Features: {features.shape[1]}")
     print(f"  • Feature names: {feature_names}")
     
+    PROFILER.begin('cluster')
     # Perform K-Means clustering
     kmeans_model, scaler, cluster_labels, cluster_info = perform_kmeans_clustering(
-        features, n_clusters_range=N_CLUSTERS_RANGE
+        features, n_clusters_range=N_CLUSTERS_RANGE, n_jobs=SWEEP_N_JOBS,
+        silhouette_mode=SILHOUETTE_MODE, silhouette_sample_size=SILHOUETTE_SAMPLE_SIZE
     )
     
     optimal_clusters = cluster_info['optimal_clusters']
     
+    # Same item x trait key used at training time, exported for inference
+    scorer = BigFiveScorer.from_codebook(available_items=df.columns)
+    
+    # Standardization the loader applied to the demographic columns, also needed at inference
+    demo_matrix, demo_names = demographic_features(df)
+    demographic_scaling = None
+    if demo_names:
+        demo_scaler = StandardScaler().fit(demo_matrix)
+        demographic_scaling = {'features': demo_names, 'mean': demo_scaler.mean_.tolist(),
+                               'scale': demo_scaler.scale_.tolist()}
+    
     # Create personality type labels
     personality_types = create_personality_type_labels(cluster_labels, features, feature_names)
     
@@ -439,6 +411,7 @@ def main():
     X_scaled = scaler.transform(features)
     y_clusters = cluster_labels
     
+    PROFILER.begin('split')
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
         X_scaled, y_clusters,
@@ -459,6 +432,7 @@ def main():
     print(f"  • Validation samples: {X_val.shape[0]}")
     print(f"  • Test samples: {X_test.shape[0]}")
     
+    PROFILER.begin('train')
     # Create and train neural network classifier
     model = create_personality_classifier(features, cluster_labels, X_train.shape[1], optimal_clusters)
     
@@ -481,11 +455,12 @@ def main():
             verbose=1
         ),
         tf.keras.callbacks.ModelCheckpoint(
-            filepath='../cache/best_bigfive_clustering_model.keras',
+            filepath=str(CACHE_DIR / 'best_bigfive_clustering_model.keras'),
             monitor='val_accuracy',
             save_best_only=True,
             verbose=1
-        )
+        ),
+        PROFILER.epoch_callback(X_train.shape[0])
     ]
     
     # Train model
@@ -504,6 +479,7 @@ def main():
     training_time = time.time() - training_start
     print(f"\nTraining completed in {training_time:.2f} seconds")
     
+    PROFILER.begin('evaluate')
     # Evaluate model
     print(f"\nEvaluating model...")
     test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
@@ -524,11 +500,12 @@ def main():
     )
     print(report)
     
+    PROFILER.begin('save')
     # Save all model artifacts
     print(f"\nSaving model and artifacts...")
     
     # Create assets directory
-    assets_dir = '../assets/models'
+    assets_dir = str(ASSETS_DIR)
     os.makedirs(assets_dir, exist_ok=True)
     
     # Save Keras model
@@ -536,26 +513,16 @@ def main():
     model.save(model_path)
     print(f"✓ Keras model saved: {model_path}")
     
-    # Convert to TensorFlow Lite
-    print("Converting to TensorFlow Lite...")
-    try:
-        converter = tf.lite.TFLiteConverter.from_keras_model(model)
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        converter.target_spec.supported_types = [tf.float16]
-        
-        tflite_model = converter.convert()
-        
-        tflite_path = f'{assets_dir}/bigfive_clustering_model.tflite'
-        with open(tflite_path, 'wb') as f:
-            f.write(tflite_model)
-        
-        tflite_size = len(tflite_model) / 1024  # KB
-        print(f"✓ TensorFlow Lite model saved: {tflite_path}")
-        print(f"✓ TensorFlow Lite model size: {tflite_size:.1f} KB")
-        
-    except Exception as e:
-        print(f"Warning: TensorFlow Lite conversion failed: {e}")
+    PROFILER.begin('convert')
+    # Convert to TensorFlow Lite: the shipped float16 model plus full-integer
+    # variants calibrated on the training split
+    tflite_variants = export_tflite_variants(
+        model, assets_dir, 'bigfive_clustering_model', X_train, X_test, y_test, test_accuracy,
+        variants=TFLITE_VARIANTS
+    )
+    print_variant_table(tflite_variants)
     
+    PROFILER.begin('save')
     # Save K-Means model and scaler
     kmeans_path = f'{assets_dir}/bigfive_kmeans_model.pickle'
     with open(kmeans_path, 'wb') as f:
@@ -573,6 +540,14 @@ def main():
         pickle.dump(personality_types, f, protocol=pickle.HIGHEST_PROTOCOL)
     print(f"✓ Personality type labels saved: {labels_path}")
     
+    # Scaler and centroids as a flat float32 file: nearest-centroid inference without an interpreter
+    centroid_path = export_centroids(scaler, kmeans_model, f'{assets_dir}/{CENTROID_FILE}',
+                                     feature_names=feature_names, personality_types=personality_types,
+                                     demographic_scaling=demographic_scaling, temperature=DEFAULT_TEMPERATURE)
+    centroid_export = {'file': CENTROID_FILE, 'size_bytes': os.path.getsize(centroid_path),
+                       'temperature': DEFAULT_TEMPERATURE}
+    print(f"✓ Centroid file saved: {centroid_path} ({centroid_export['size_bytes']} bytes)")
+    
     # Save comprehensive parameters
     best_epoch = np.argmax(history.history['val_accuracy']) + 1
     best_val_acc = np.max(history.history['val_accuracy'])
@@ -596,10 +571,18 @@ def main():
         'test_samples': X_test.shape[0],
         'epochs_trained': len(history.history['loss']),
         'max_samples': MAX_SAMPLES,
+        'use_full_dataset': USE_FULL_DATASET,
+        'peak_rss_mb': get_peak_rss_mb(),
         'model_architecture': 'Dense(128)->BN->Dense(64)->BN->Dense(32)->BN->Softmax',
         'optimizer': 'Adam(lr=0.001)',
         'regularization': 'L2(0.001) + BatchNorm + Dropout',
         'cluster_analysis': cluster_info,
+        'tflite_variants': tflite_variants,
+        'artifacts': file_digests(serving_files('bigfive_clustering'), assets_dir),
+        'centroid_export': centroid_export,
+        'trait_scoring': scorer.to_dict(),
+        'demographic_scaling': demographic_scaling,
+        'profile': PROFILER.to_dict(),
         'created_timestamp': time.time()
     }
     
@@ -609,6 +592,8 @@ def main():
     print(f"✓ Model parameters saved: {params_path}")
     
     # Performance summary
+    FEATURE_CACHE.report()
+    PROFILER.report()
     total_time = time.time() - start_time
     print(f"\n{'='*70}")
     print(f"🎉 BIG FIVE CLUSTERING MODEL TRAINING COMPLETE! 🎉")
@@ -625,9 +610,13 @@ def main():
     print(f"📦 Model Files:")
     print(f"   • bigfive_clustering_model.keras")
     print(f"   • bigfive_clustering_model.tflite")  
+    for report in tflite_variants[1:]:
+        if 'file' in report:
+            print(f"   • {report['file']}")
     print(f"   • bigfive_kmeans_model.pickle")
     print(f"   • bigfive_scaler.pickle")
     print(f"   • bigfive_personality_types.pickle")
+    print(f"   • {CENTROID_FILE}")
     print(f"   • bigfive_clustering_params.json")
     print(f"📁 Location: {assets_dir}/")
     print(f"\n🎭 Discovered Personality Types:")
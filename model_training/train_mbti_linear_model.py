@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 import tensorflow as tf
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -8,9 +7,19 @@ from sklearn.metrics import classification_report, accuracy_score
 import pickle
 import json
 import os
-import hashlib
 from pathlib import Path
 import time
+from personify_training.dataset_store import load_columns
+from personify_training.feature_cache import FeatureCache, content_key
+from personify_training.sparse_batches import CSRBatchSequence, csr_density
+from personify_training.feature_shards import (InputStallMonitor, cached_shards, read_manifest, read_shards,
+                                               shard_dataset, shard_labels, transform_chunks)
+from personify_training.hashed_tfidf import HashedTfidfVectorizer
+from personify_training.vocab_export import export_vectorizer, check_parity
+from personify_training.stage_profiler import StageProfiler
+from personify_training.tflite_export import export_tflite_variants, print_variant_table
+from personify_training.model_variants import file_digests, serving_files
+from personify_training.paths import ASSETS_DIR, CACHE_DIR, FEATURE_CACHE_DIR, MBTI_CSV
 
 # Set random seeds for reproducibility
 np.random.seed(42)
@@ -20,60 +29,70 @@ tf.random.set_seed(42)
 tf.config.set_visible_devices([], 'GPU')
 
 # Cache directory for preprocessed data
-CACHE_DIR = Path('../cache')
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Documents checked for exported vocabulary parity
+PARITY_SAMPLES = 500
+
+# Content-addressed cache for preprocessed data and features
+FEATURE_CACHE = FeatureCache(FEATURE_CACHE_DIR)
+
+# Per-stage wall/CPU time and memory, written to the params JSON under 'profile'
+PROFILER = StageProfiler()
+
+# Time training spends waiting on input, written to the params JSON under 'input_pipeline'
+INPUT_STALLS = InputStallMonitor()
+
+# Text preparation, used by the loader and its cache key alike
+SAMPLE_FRAC = 1.0  # Fraction of the dataset used; 1.0 keeps every row
+SAMPLE_SEED = 42
+LOWERCASE = True
+
+# Settings of the shipped model that hparam_sweep and cross_validation also read
+MAX_FEATURES = 20000   # TF-IDF max features for accuracy
+EPOCHS = 60            # More epochs for deeper learning
+EARLY_STOPPING_PATIENCE = 10
 
 def load_and_preprocess_data(csv_path):
     """Load and preprocess the MBTI dataset with caching for TF-IDF"""
     print("Loading MBTI dataset...")
     
-    # Create cache key based on file modification time and path
-    file_stat = os.stat(csv_path)
-    cache_key = hashlib.md5(f"{csv_path}_{file_stat.st_mtime}_tfidf".encode()).hexdigest()
-    cache_file = CACHE_DIR / f"tfidf_data_{cache_key}.pkl"
-    
-    # Try to load from cache
-    if cache_file.exists():
+    # Cache key covers the CSV contents and every sampling parameter
+    cache_key = content_key('mbti_texts', Path(csv_path), sample_frac=SAMPLE_FRAC,
+                            random_state=SAMPLE_SEED if SAMPLE_FRAC < 1.0 else None, lowercase=LOWERCASE)
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
         print("Loading preprocessed TF-IDF data from cache...")
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
+        return cached['texts'], cached['labels']
     
     # Load and preprocess data
-    df = pd.read_csv(csv_path)
+    df = load_columns(csv_path, columns=['type', 'posts'])
     print(f"Dataset shape: {df.shape}")
     
-    # Use 100% of the dataset for maximum accuracy
-    df_sample = df  # Use entire dataset
-    print(f"Using full dataset: {df_sample.shape[0]} samples")
-    # No sampling, use all available data for each class
-    texts = df_sample['posts'].astype(str).str.lower().values
+    # Use the whole dataset (SAMPLE_FRAC = 1.0) for maximum accuracy
+    if SAMPLE_FRAC < 1.0:
+        df_sample = df.sample(frac=SAMPLE_FRAC, random_state=SAMPLE_SEED)
+        print(f"Using sample size: {df_sample.shape[0]} ({SAMPLE_FRAC:.0%} of original)")
+    else:
+        df_sample = df
+        print(f"Using full dataset: {df_sample.shape[0]} samples")
+    PROFILER.begin('clean')
+    # No per-class sampling, use all available data for each class
+    posts = df_sample['posts'].astype(str)
+    texts = (posts.str.lower() if LOWERCASE else posts).values
     labels = df_sample['type'].values
     print(f"Text length: average {np.mean([len(text) for text in texts]):.0f} characters")
     
     # Cache the processed data
     print("Caching preprocessed data...")
-    with open(cache_file, 'wb') as f:
-        pickle.dump((texts, labels), f)
+    FEATURE_CACHE.put(cache_key, {'texts': texts, 'labels': labels})
     
     return texts, labels
 
-def create_tfidf_features(texts, max_features=5000):
-    """Create TF-IDF features from texts with higher feature count for better accuracy"""
-    print(f"Creating TF-IDF features with max_features={max_features}...")
-    
-    # Check for cached TF-IDF vectorizer
-    tfidf_cache = CACHE_DIR / f"tfidf_vectorizer_{max_features}.pkl"
-    features_cache = CACHE_DIR / f"tfidf_features_{max_features}.pkl"
-    if tfidf_cache.exists() and features_cache.exists():
-        print("Loading TF-IDF vectorizer and features from cache...")
-        with open(tfidf_cache, 'rb') as f:
-            vectorizer = pickle.load(f)
-        with open(features_cache, 'rb') as f:
-            features = pickle.load(f)
-        return features, vectorizer
-    # Create TF-IDF vectorizer with enhanced parameters for accuracy
-    vectorizer = TfidfVectorizer(
-        max_features=max_features,
+def create_tfidf_vectorizer(max_features=5000, feature_mode='vocab'):
+    """Unfitted TF-IDF vectorizer for a feature mode"""
+    # TF-IDF parameters tuned for accuracy, shared by both feature modes
+    tfidf_config = dict(
         stop_words='english',
         ngram_range=(1, 4),  # Up to 4-grams for more context
         lowercase=True,
@@ -82,36 +101,74 @@ def create_tfidf_features(texts, max_features=5000):
         max_df=0.95,
         sublinear_tf=True
     )
-    features = vectorizer.fit_transform(texts).toarray()
-    print(f"TF-IDF features shape: {features.shape}")
-    print(f"Feature vocabulary size: {len(vectorizer.vocabulary_)}")
+    if feature_mode == 'hashing':
+        # Fixed-width feature hashing, only the IDF vector is fitted
+        return HashedTfidfVectorizer(n_features=max_features, **tfidf_config)
+    return TfidfVectorizer(max_features=max_features, **tfidf_config)
+
+def create_tfidf_features(texts, max_features=5000, feature_mode='vocab', n_jobs=1):
+    """Create TF-IDF features from texts with higher feature count for better accuracy"""
+    print(f"Creating TF-IDF features with max_features={max_features} ({feature_mode} mode)...")
+    vectorizer = create_tfidf_vectorizer(max_features, feature_mode)
+    # Cache key covers the texts and the full vectorizer configuration
+    cache_key = content_key('tfidf', texts, vectorizer=vectorizer.get_params())
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
+        print("Loading TF-IDF vectorizer and features from cache...")
+        return cached['features'], cached['vectorizer']
+    fit_start = time.time()
+    if feature_mode == 'hashing':
+        features = vectorizer.fit_transform(texts, n_jobs=n_jobs)
+    else:
+        features = vectorizer.fit_transform(texts)
+    print(f"Fit time: {time.time() - fit_start:.2f} seconds")
+    print(f"TF-IDF features shape: {features.shape} (sparse, density {csr_density(features):.4f})")
+    if feature_mode == 'hashing':
+        print(f"Active hash buckets: {int(np.count_nonzero(vectorizer.idf_))}")
+    else:
+        print(f"Feature vocabulary size: {len(vectorizer.vocabulary_)}")
     print("Caching TF-IDF vectorizer and features...")
-    with open(tfidf_cache, 'wb') as f:
-        pickle.dump(vectorizer, f)
-    with open(features_cache, 'wb') as f:
-        pickle.dump(features, f)
+    FEATURE_CACHE.put(cache_key, {'features': features, 'vectorizer': vectorizer})
     return features, vectorizer
 
-def create_linear_model(input_dim, num_classes):
-    """Create a simple but effective TensorFlow linear model"""
+def fit_tfidf_vectorizer(texts, max_features=5000, feature_mode='vocab', n_jobs=1):
+    """Fit the TF-IDF vectorizer without keeping the feature matrix, for featurizing a block at a time"""
+    print(f"Fitting TF-IDF vectorizer with max_features={max_features} ({feature_mode} mode)...")
+    vectorizer = create_tfidf_vectorizer(max_features, feature_mode)
+    cache_key = content_key('tfidf_vectorizer', texts, vectorizer=vectorizer.get_params())
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
+        print("Loading TF-IDF vectorizer from cache...")
+        return cached['vectorizer']
+    fit_start = time.time()
+    if feature_mode == 'hashing':
+        vectorizer.fit(texts, n_jobs=n_jobs)
+    else:
+        vectorizer.fit(texts)
+    print(f"Fit time: {time.time() - fit_start:.2f} seconds")
+    FEATURE_CACHE.put(cache_key, {'vectorizer': vectorizer})
+    return vectorizer
+
+def create_linear_model(input_dim, num_classes, hidden_units=(512, 256, 128, 64), dropout=(0.5, 0.4, 0.3, 0.2),
+                        l2=0.0005, learning_rate=0.0007):
+    """Create a simple but effective TensorFlow linear model
+
+    The defaults are the tuned configuration; hparam_sweep searches over them.
+    """
     print(f"Creating linear model with input_dim={input_dim}, num_classes={num_classes}")
     
-    model = tf.keras.Sequential([
-        tf.keras.layers.Dense(512, activation='relu', input_shape=(input_dim,), kernel_regularizer=tf.keras.regularizers.l2(0.0005)),
-        tf.keras.layers.BatchNormalization(),
-        tf.keras.layers.Dropout(0.5),
-        tf.keras.layers.Dense(256, activation='relu', kernel_regularizer=tf.keras.regularizers.l2(0.0005)),
-        tf.keras.layers.BatchNormalization(),
-        tf.keras.layers.Dropout(0.4),
-        tf.keras.layers.Dense(128, activation='relu', kernel_regularizer=tf.keras.regularizers.l2(0.0005)),
-        tf.keras.layers.BatchNormalization(),
-        tf.keras.layers.Dropout(0.3),
-        tf.keras.layers.Dense(64, activation='relu', kernel_regularizer=tf.keras.regularizers.l2(0.0005)),
-        tf.keras.layers.Dropout(0.2),
-        tf.keras.layers.Dense(num_classes, activation='softmax')
-    ])
+    layers = []
+    for i, (units, rate) in enumerate(zip(hidden_units, dropout)):
+        extra = {'input_shape': (input_dim,)} if i == 0 else {}
+        layers.append(tf.keras.layers.Dense(units, activation='relu',
+                                            kernel_regularizer=tf.keras.regularizers.l2(l2), **extra))
+        # Batch normalization on every hidden layer but the last
+        if i < len(hidden_units) - 1:
+            layers.append(tf.keras.layers.BatchNormalization())
+        layers.append(tf.keras.layers.Dropout(rate))
+    model = tf.keras.Sequential(layers + [tf.keras.layers.Dense(num_classes, activation='softmax')])
     model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.0007),
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
         loss='sparse_categorical_crossentropy',
         metrics=['accuracy']
     )
@@ -121,31 +178,59 @@ def main():
     start_time = time.time()
     
     # Configuration for extremely accurate linear model
-    MAX_FEATURES = 20000   # TF-IDF max features for accuracy
+    FEATURE_MODE = 'vocab' # 'vocab' (fitted TfidfVectorizer) or 'hashing' (hashed TF-IDF)
+    TFLITE_VARIANTS = ('dynamic', 'int8', 'uint8')  # First is shipped as mbti_linear_model.tflite
     BATCH_SIZE = 128       # Larger batch size for faster training
-    EPOCHS = 60            # More epochs for deeper learning
+    INPUT_PIPELINE = 'sequence'  # 'sequence' (in-memory CSR) or 'shards' (tf.data over on-disk shards)
+    SHARD_FORMAT = 'tfrecord'    # 'tfrecord' or 'npz', for INPUT_PIPELINE = 'shards'
+    CALIBRATION_ROWS = 2048      # Training rows read back from the shards for TFLite calibration
     print("=== TensorFlow Linear MBTI Classification Model (Max Accuracy) ===")
     print(f"Configuration: max_features={MAX_FEATURES}, batch_size={BATCH_SIZE}, epochs={EPOCHS}")
     # Load data
-    csv_path = '../lib/data/mbti_personality.csv'
+    csv_path = str(MBTI_CSV)
+    PROFILER.begin('load')
     texts, labels = load_and_preprocess_data(csv_path)
-    # Create TF-IDF features
-    X_tfidf, vectorizer = create_tfidf_features(texts, max_features=MAX_FEATURES)
+    PROFILER.begin('split')
     # Encode labels
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(labels)
     print(f"Label classes: {label_encoder.classes_}")
     print(f"Number of classes: {len(label_encoder.classes_)}")
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_tfidf, y_encoded, 
+    # Split row indices, so either input pipeline gets the same rows
+    train_rows, test_rows, y_train, y_test = train_test_split(
+        np.arange(len(texts)), y_encoded, 
         test_size=0.2, 
         random_state=42, 
         stratify=y_encoded
     )
-    print(f"Training samples: {X_train.shape[0]}")
-    print(f"Test samples: {X_test.shape[0]}")
-    print(f"Feature dimensions: {X_train.shape[1]}")
+    PROFILER.begin('vectorize')
+    if INPUT_PIPELINE == 'shards':
+        # Only the fitted vectorizer is kept; each split is transformed a block
+        # of texts at a time straight into sparse shards on disk
+        vectorizer = fit_tfidf_vectorizer(texts, max_features=MAX_FEATURES, feature_mode=FEATURE_MODE, n_jobs=-1)
+        shard_params = {'vectorizer': vectorizer.get_params(), 'format': SHARD_FORMAT}
+        train_shards = cached_shards(
+            FEATURE_CACHE, content_key('mbti_linear_train', texts, y_encoded, train_rows, **shard_params),
+            transform_chunks(vectorizer.transform, texts[train_rows], y_train), SHARD_FORMAT)
+        test_shards = cached_shards(
+            FEATURE_CACHE, content_key('mbti_linear_test', texts, y_encoded, test_rows, **shard_params),
+            transform_chunks(vectorizer.transform, texts[test_rows], y_test), SHARD_FORMAT)
+        # Labels, calibration rows and the held-out split come back from the shards
+        y_train, y_test = shard_labels(train_shards), shard_labels(test_shards)
+        X_calibration, _ = read_shards(train_shards, max_rows=CALIBRATION_ROWS)
+        X_test, _ = read_shards(test_shards)
+        n_features = read_manifest(train_shards)['n_features']
+    else:
+        # Create TF-IDF features
+        X_tfidf, vectorizer = create_tfidf_features(texts, max_features=MAX_FEATURES, feature_mode=FEATURE_MODE,
+                                                    n_jobs=-1)
+        X_train, X_test = X_tfidf[train_rows], X_tfidf[test_rows]
+        X_calibration = X_train
+        n_features = X_train.shape[1]
+    print(f"Training samples: {len(y_train)}")
+    print(f"Test samples: {len(y_test)}")
+    print(f"Feature dimensions: {n_features}")
+    PROFILER.begin('train')
     # Calculate class weights for imbalanced dataset
     from sklearn.utils.class_weight import compute_class_weight
     class_weights = compute_class_weight(
@@ -156,13 +241,13 @@ def main():
     class_weight_dict = dict(enumerate(class_weights))
     print(f"Using balanced class weights")
     # Create and train model
-    model = create_linear_model(X_train.shape[1], len(label_encoder.classes_))
+    model = create_linear_model(n_features, len(label_encoder.classes_))
     print("\nModel architecture:")
     model.summary()
     # Training callbacks
     early_stopping = tf.keras.callbacks.EarlyStopping(
         monitor='val_accuracy', 
-        patience=10, 
+        patience=EARLY_STOPPING_PATIENCE, 
         restore_best_weights=True,
         verbose=1,
         min_delta=0.001
@@ -175,7 +260,7 @@ def main():
         verbose=1
     )
     checkpoint = tf.keras.callbacks.ModelCheckpoint(
-        filepath='../cache/best_linear_model.keras',
+        filepath=str(CACHE_DIR / 'best_linear_model.keras'),
         monitor='val_accuracy',
         save_best_only=True,
         verbose=1
@@ -183,37 +268,51 @@ def main():
     # Train the model
     print("\nTraining model...")
     training_start = time.time()
+    if INPUT_PIPELINE == 'shards':
+        # Sparse shards on disk, read, shuffled and densified by tf.data while the model trains
+        train_batches = shard_dataset(train_shards, BATCH_SIZE, shuffle=True)
+        val_batches = shard_dataset(test_shards, BATCH_SIZE)
+        fit_options = {'class_weight': class_weight_dict}
+    else:
+        # Sparse TF-IDF rows are densified one batch at a time
+        train_batches = CSRBatchSequence(X_train, y_train, batch_size=BATCH_SIZE, shuffle=True,
+                                         class_weight=class_weight_dict)
+        val_batches = CSRBatchSequence(X_test, y_test, batch_size=BATCH_SIZE)
+        fit_options = {}
     history = model.fit(
-        X_train, y_train,
-        batch_size=BATCH_SIZE,
+        train_batches,
         epochs=EPOCHS,
-        validation_data=(X_test, y_test),
-        class_weight=class_weight_dict,
-        callbacks=[early_stopping, reduce_lr, checkpoint],
-        verbose=1
+        validation_data=val_batches,
+        callbacks=[early_stopping, reduce_lr, checkpoint, PROFILER.epoch_callback(len(y_train)),
+                   INPUT_STALLS.callback()],
+        verbose=1,
+        **fit_options
     )
     training_time = time.time() - training_start
     print(f"Training completed in {training_time:.2f} seconds")
     
+    PROFILER.begin('evaluate')
     # Evaluate model
     print("\nEvaluating model...")
-    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    # The validation batches are unshuffled, so predictions line up with y_test
+    test_loss, test_accuracy = model.evaluate(val_batches, verbose=0)
     print(f"Test accuracy: {test_accuracy:.4f}")
     print(f"Test loss: {test_loss:.4f}")
     
     # Generate predictions for detailed evaluation
-    y_pred = model.predict(X_test, verbose=0)
+    y_pred = model.predict(val_batches, verbose=0)
     y_pred_classes = np.argmax(y_pred, axis=1)
     
     # Classification report
     print("\nDetailed Classification Report:")
     print(classification_report(y_test, y_pred_classes, target_names=label_encoder.classes_))
     
+    PROFILER.begin('save')
     # Save all model artifacts
     print("\nSaving model and preprocessing artifacts...")
     
     # Create assets directory if it doesn't exist
-    assets_dir = '../assets/models'
+    assets_dir = str(ASSETS_DIR)
     os.makedirs(assets_dir, exist_ok=True)
     
     # Save Keras model in new format
@@ -221,38 +320,30 @@ def main():
     model.save(model_path)
     print(f"✓ Keras model saved: {model_path}")
     
-    # Convert to TensorFlow Lite
-    print("Converting to TensorFlow Lite...")
-    try:
-        # Create converter
-        converter = tf.lite.TFLiteConverter.from_keras_model(model)
-        
-        # Set optimizations for mobile deployment
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        
-        # Convert model
-        tflite_model = converter.convert()
-        
-        # Save TensorFlow Lite model
-        tflite_path = f'{assets_dir}/mbti_linear_model.tflite'
-        with open(tflite_path, 'wb') as f:
-            f.write(tflite_model)
-        print(f"✓ TensorFlow Lite model saved: {tflite_path}")
-        
-        # Model size info
-        tflite_size = len(tflite_model) / 1024  # KB
-        print(f"✓ TensorFlow Lite model size: {tflite_size:.1f} KB")
-        
-    except Exception as e:
-        print(f"Warning: TensorFlow Lite conversion failed: {e}")
-        print("Continuing with Keras model only...")
+    PROFILER.begin('convert')
+    # Convert to TensorFlow Lite: the shipped dynamic-range model plus
+    # full-integer variants calibrated on the training split
+    tflite_variants = export_tflite_variants(
+        model, assets_dir, 'mbti_linear_model', X_calibration, X_test, y_test, test_accuracy,
+        variants=TFLITE_VARIANTS
+    )
+    print_variant_table(tflite_variants)
     
+    PROFILER.begin('save')
     # Save TF-IDF vectorizer
     vectorizer_path = f'{assets_dir}/mbti_tfidf_vectorizer.pickle'
     with open(vectorizer_path, 'wb') as f:
         pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
     print(f"✓ TF-IDF vectorizer saved: {vectorizer_path}")
     
+    # Compact binary vocabulary + idf for on-device featurization, checked
+    # against TfidfVectorizer.transform with the pure-Python reference reader
+    vocab_path = f'{assets_dir}/mbti_linear_vocab.tfv'
+    export_vectorizer(vectorizer, vocab_path, text_cleaning=None)
+    parity_error = check_parity(vectorizer, vocab_path, list(texts[:PARITY_SAMPLES]))
+    print(f"✓ Binary vocabulary saved: {vocab_path} ({os.path.getsize(vocab_path) / 1024:.1f} KB, "
+          f"parity max error {parity_error:.1e})")
+    
     # Save label encoder
     encoder_path = f'{assets_dir}/mbti_label_encoder.pickle'
     with open(encoder_path, 'wb') as f:
@@ -263,19 +354,26 @@ def main():
     preprocessing_params = {
         'model_type': 'tensorflow_linear',
         'max_features': MAX_FEATURES,
-        'input_dim': X_train.shape[1],
+        'feature_mode': FEATURE_MODE,
+        'input_dim': n_features,
         'num_classes': len(label_encoder.classes_),
         'label_classes': label_encoder.classes_.tolist(),
         'test_accuracy': float(test_accuracy),
         'test_loss': float(test_loss),
         'training_time_seconds': training_time,
         'total_samples': len(texts),
-        'train_samples': X_train.shape[0],
-        'test_samples': X_test.shape[0],
+        'train_samples': len(y_train),
+        'test_samples': len(y_test),
         'epochs_trained': len(history.history['loss']),
         'model_architecture': 'Dense(256)->Dense(128)->Dense(64)->Dense(16)',
         'optimizer': 'Adam(lr=0.001)',
         'regularization': 'L2(0.001)',
+        'vocabulary_file': 'mbti_linear_vocab.tfv',
+        'tflite_variants': tflite_variants,
+        'artifacts': file_digests(serving_files('mbti_linear'), assets_dir),
+        'profile': PROFILER.to_dict(),
+        'input_pipeline': dict(INPUT_STALLS.to_dict(), mode=INPUT_PIPELINE,
+                               shard_format=SHARD_FORMAT if INPUT_PIPELINE == 'shards' else None),
         'created_timestamp': time.time()
     }
     
@@ -285,6 +383,9 @@ def main():
     print(f"✓ Model parameters saved: {params_path}")
     
     # Summary
+    FEATURE_CACHE.report()
+    PROFILER.report()
+    INPUT_STALLS.report()
     total_time = time.time() - start_time
     print(f"\n{'='*60}")
     print(f"🎉 MBTI Linear Model Training Complete!")
@@ -295,8 +396,12 @@ def main():
     print(f"📦 Model Files:")
     print(f"   • mbti_linear_model.keras")
     print(f"   • mbti_linear_model.tflite")
+    for report in tflite_variants[1:]:
+        if 'file' in report:
+            print(f"   • {report['file']}")
     print(f"   • mbti_tfidf_vectorizer.pickle")
     print(f"   • mbti_label_encoder.pickle")
+    print(f"   • mbti_linear_vocab.tfv")
     print(f"   • mbti_linear_params.json")
     print(f"📁 Saved in: {assets_dir}/")
 
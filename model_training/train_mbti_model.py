@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 import tensorflow as tf
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -8,9 +7,16 @@ from sklearn.metrics import classification_report, accuracy_score
 import pickle
 import json
 import os
-import hashlib
 from pathlib import Path
 import time
+from personify_training.dataset_store import load_columns
+from personify_training.feature_cache import FeatureCache, content_key
+from personify_training.sparse_batches import CSRBatchSequence, csr_density
+from personify_training.stage_profiler import StageProfiler
+from personify_training.stratified_sampling import balanced_sample
+from personify_training.tflite_export import export_tflite_variants, print_variant_table
+from personify_training.model_variants import file_digests, serving_files
+from personify_training.paths import ASSETS_DIR, CACHE_DIR, FEATURE_CACHE_DIR, MBTI_CSV
 
 # Set random seeds for reproducibility
 np.random.seed(42)
@@ -20,57 +26,55 @@ tf.random.set_seed(42)
 tf.config.set_visible_devices([], 'GPU')  # Use CPU only for compatibility
 
 # Cache directory for preprocessed data
-CACHE_DIR = Path('../cache')
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Content-addressed cache for preprocessed data and features
+FEATURE_CACHE = FeatureCache(FEATURE_CACHE_DIR)
+
+# Per-stage wall/CPU time and memory, written to the params JSON under 'profile'
+PROFILER = StageProfiler()
+
+# Sampling and text preparation, used by the loader and its cache key alike
+SAMPLE_FRAC = 0.5
+MIN_SAMPLES_PER_CLASS = 100
+MAX_SAMPLES_PER_CLASS = 500
+MAX_CHARS = 500
+SAMPLE_SEED = 42
+
+# Settings of the shipped model that cross_validation also reads
+MAX_FEATURES = 1000   # TF-IDF max features for speed
+EPOCHS = 15           # More epochs for linear model
+EARLY_STOPPING_PATIENCE = 5
 
 def load_and_preprocess_data(csv_path):
     """Load and preprocess the MBTI dataset with caching for TF-IDF"""
     print("Loading MBTI dataset...")
     
-    # Create cache key based on file modification time and path
-    file_stat = os.stat(csv_path)
-    cache_key = hashlib.md5(f"{csv_path}_{file_stat.st_mtime}_tfidf".encode()).hexdigest()
-    cache_file = CACHE_DIR / f"tfidf_data_{cache_key}.pkl"
-    
-    # Try to load from cache
-    if cache_file.exists():
+    # Cache key covers the CSV contents and every sampling parameter
+    cache_key = content_key('mbti_texts', Path(csv_path), sample_frac=SAMPLE_FRAC,
+                            min_samples_per_class=MIN_SAMPLES_PER_CLASS, max_samples_per_class=MAX_SAMPLES_PER_CLASS,
+                            max_chars=MAX_CHARS, random_state=SAMPLE_SEED, sampler='grouped')
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
         print("Loading preprocessed TF-IDF data from cache...")
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
+        return cached['texts'], cached['labels']
     
     # Load and preprocess data
-    df = pd.read_csv(csv_path)
+    df = load_columns(csv_path, columns=['type', 'posts'])
     print(f"Dataset shape: {df.shape}")
     
-    # Use 50% of the dataset for better performance
-    df_sample = df.sample(frac=0.5, random_state=42)
-    print(f"Using sample size: {df_sample.shape[0]} (50% of original)")
-    
-    # Balanced sampling for better performance
-    balanced_samples = []
-    min_samples_per_class = 100   # Higher minimum samples per class
-    max_samples_per_class = 500   # More samples per class for better learning
-    
-    for mbti_type in df_sample['type'].unique():
-        type_samples = df_sample[df_sample['type'] == mbti_type]
-        available_samples = len(type_samples)
-        
-        if available_samples < min_samples_per_class:
-            print(f"Warning: {mbti_type} has only {available_samples} samples (less than {min_samples_per_class})")
-            samples_to_take = available_samples
-        else:
-            samples_to_take = min(available_samples, max_samples_per_class)
-        
-        # Randomly sample the data
-        if samples_to_take < available_samples:
-            selected_samples = type_samples.sample(n=samples_to_take, random_state=42)
-        else:
-            selected_samples = type_samples
-            
-        balanced_samples.append(selected_samples)
-        print(f"{mbti_type}: {samples_to_take} samples")
-    
-    df_balanced = pd.concat(balanced_samples, ignore_index=True)
+    PROFILER.begin('sample')
+    # Use a fraction of the dataset for better performance
+    df_sample = df.sample(frac=SAMPLE_FRAC, random_state=SAMPLE_SEED)
+    print(f"Using sample size: {df_sample.shape[0]} ({SAMPLE_FRAC:.0%} of original)")
+    
+    # Balanced sampling for better performance: capped rows per class
+    # (warning below the minimum), chosen in one grouped pass
+    rows, class_counts = balanced_sample(df_sample['type'].values, max_per_class=MAX_SAMPLES_PER_CLASS,
+                                         min_per_class=MIN_SAMPLES_PER_CLASS, seed=SAMPLE_SEED)
+    for mbti_type, (_, taken) in class_counts.items():
+        print(f"{mbti_type}: {taken} samples")
+    df_balanced = df_sample.iloc[rows].reset_index(drop=True)
     print(f"Balanced dataset size: {df_balanced.shape[0]}")
     print(f"Distribution of types:\n{df_balanced['type'].value_counts()}")
     
@@ -78,14 +82,14 @@ def load_and_preprocess_data(csv_path):
     texts = df_balanced['posts'].values
     labels = df_balanced['type'].values
     
-    # Preprocess texts - keep first 500 characters and clean
-    texts = [str(text)[:500].lower() for text in texts]
+    PROFILER.begin('clean')
+    # Preprocess texts - keep the first MAX_CHARS characters and clean
+    texts = [str(text)[:MAX_CHARS].lower() for text in texts]
     print(f"Text length: average {np.mean([len(text) for text in texts]):.0f} characters")
     
     # Cache the processed data
     print("Caching preprocessed data...")
-    with open(cache_file, 'wb') as f:
-        pickle.dump((texts, labels), f)
+    FEATURE_CACHE.put(cache_key, {'texts': texts, 'labels': labels})
     
     return texts, labels
 
@@ -93,18 +97,6 @@ def create_tfidf_features(texts, max_features=1000):
     """Create TF-IDF features from texts"""
     print(f"Creating TF-IDF features with max_features={max_features}...")
     
-    # Check for cached TF-IDF vectorizer
-    tfidf_cache = CACHE_DIR / f"tfidf_vectorizer_{max_features}.pkl"
-    features_cache = CACHE_DIR / f"tfidf_features_{max_features}.pkl"
-    
-    if tfidf_cache.exists() and features_cache.exists():
-        print("Loading TF-IDF vectorizer and features from cache...")
-        with open(tfidf_cache, 'rb') as f:
-            vectorizer = pickle.load(f)
-        with open(features_cache, 'rb') as f:
-            features = pickle.load(f)
-        return features, vectorizer
-    
     # Create TF-IDF vectorizer
     vectorizer = TfidfVectorizer(
         max_features=max_features,
@@ -114,18 +106,22 @@ def create_tfidf_features(texts, max_features=1000):
         strip_accents='ascii'
     )
     
+    # Cache key covers the texts and the full vectorizer configuration
+    cache_key = content_key('tfidf', texts, vectorizer=vectorizer.get_params())
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
+        print("Loading TF-IDF vectorizer and features from cache...")
+        return cached['features'], cached['vectorizer']
+    
     # Fit and transform texts
-    features = vectorizer.fit_transform(texts).toarray()
+    features = vectorizer.fit_transform(texts)
     
-    print(f"TF-IDF features shape: {features.shape}")
+    print(f"TF-IDF features shape: {features.shape} (sparse, density {csr_density(features):.4f})")
     print(f"Feature vocabulary size: {len(vectorizer.vocabulary_)}")
     
     # Cache vectorizer and features
     print("Caching TF-IDF vectorizer and features...")
-    with open(tfidf_cache, 'wb') as f:
-        pickle.dump(vectorizer, f)
-    with open(features_cache, 'wb') as f:
-        pickle.dump(features, f)
+    FEATURE_CACHE.put(cache_key, {'features': features, 'vectorizer': vectorizer})
     
     return features, vectorizer
 
@@ -176,19 +172,20 @@ def main():
     start_time = time.time()
     
     # Configuration for mobile-optimized linear model
-    MAX_FEATURES = 1000   # TF-IDF max features for speed
     BATCH_SIZE = 64       # Batch size for training
-    EPOCHS = 15           # More epochs for linear model
     
     print("=== TensorFlow Linear MBTI Classification Model ===")
     
     # Load data
-    csv_path = '../lib/data/mbti_personality.csv'
+    csv_path = str(MBTI_CSV)
+    PROFILER.begin('load')
     texts, labels = load_and_preprocess_data(csv_path)
     
+    PROFILER.begin('vectorize')
     # Create TF-IDF features
     X_tfidf, vectorizer = create_tfidf_features(texts, max_features=MAX_FEATURES)
     
+    PROFILER.begin('split')
     # Encode labels
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(labels)
@@ -206,6 +203,7 @@ def main():
     print(f"Training samples: {X_train.shape[0]}")
     print(f"Test samples: {X_test.shape[0]}")
     
+    PROFILER.begin('train')
     # Calculate class weights to handle imbalanced dataset
     from sklearn.utils.class_weight import compute_class_weight
     class_weights = compute_class_weight(
@@ -227,7 +225,7 @@ def main():
     # Callbacks
     early_stopping = tf.keras.callbacks.EarlyStopping(
         monitor='val_accuracy', 
-        patience=5, 
+        patience=EARLY_STOPPING_PATIENCE, 
         restore_best_weights=True
     )
     
@@ -239,73 +237,79 @@ def main():
     )
     
     # Train the model
+    # Sparse TF-IDF rows are densified one batch at a time
+    train_batches = CSRBatchSequence(X_train, y_train, batch_size=BATCH_SIZE, shuffle=True,
+                                     class_weight=class_weight_dict)
+    val_batches = CSRBatchSequence(X_test, y_test, batch_size=BATCH_SIZE)
     history = model.fit(
-        X_train, y_train,
-        batch_size=BATCH_SIZE,
+        train_batches,
         epochs=EPOCHS,
-        validation_data=(X_test, y_test),
-        class_weight=class_weight_dict,
-        callbacks=[early_stopping, reduce_lr],
+        validation_data=val_batches,
+        callbacks=[early_stopping, reduce_lr, PROFILER.epoch_callback(X_train.shape[0])],
         verbose=1
     )
     
+    PROFILER.begin('evaluate')
     # Evaluate model
     print("\nEvaluating model...")
-    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    test_loss, test_accuracy = model.evaluate(CSRBatchSequence(X_test, y_test, batch_size=BATCH_SIZE), verbose=0)
     print(f"Test accuracy: {test_accuracy:.4f}")
     
     # Generate predictions for detailed evaluation
-    y_pred = model.predict(X_test, verbose=0)
+    y_pred = model.predict(CSRBatchSequence(X_test, batch_size=BATCH_SIZE), verbose=0)
     y_pred_classes = np.argmax(y_pred, axis=1)
     
     # Classification report
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred_classes, target_names=label_encoder.classes_))
     
+    PROFILER.begin('save')
     # Save model in different formats
     print("\nSaving model...")
     
     # Create assets directory if it doesn't exist
-    assets_dir = '../assets/models'
+    assets_dir = str(ASSETS_DIR)
     os.makedirs(assets_dir, exist_ok=True)
     
     # Save Keras model
     model.save(f'{assets_dir}/mbti_linear_model.keras')
     
-    # Convert to TensorFlow Lite with optimizations
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    
-    try:
-        tflite_model = converter.convert()
-        
-        with open(f'{assets_dir}/mbti_linear_model.tflite', 'wb') as f:
-            f.write(tflite_model)
-        print("✓ TensorFlow Lite model saved successfully")
-    except Exception as e:
-        print(f"Warning: TFLite conversion failed: {e}")
-        print("Saving only the Keras model")
+    PROFILER.begin('convert')
+    # Convert to TensorFlow Lite: the shipped dynamic-range model plus
+    # full-integer variants calibrated on the training split
+    tflite_variants = export_tflite_variants(
+        model, assets_dir, 'mbti_linear_model', X_train, X_test, y_test, test_accuracy,
+        variants=('dynamic', 'int8', 'uint8')
+    )
+    print_variant_table(tflite_variants)
     
+    PROFILER.begin('save')
     # Save TF-IDF vectorizer
     with open(f'{assets_dir}/mbti_tfidf_vectorizer.pickle', 'wb') as f:
         pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
     
-    # Save preprocessing parameters
+    # Save label encoder
+    with open(f'{assets_dir}/mbti_label_encoder.pickle', 'wb') as f:
+        pickle.dump(label_encoder, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    # Save preprocessing parameters last, after every file it describes
     preprocessing_params = {
         'model_type': 'tensorflow_linear',
         'max_features': MAX_FEATURES,
         'input_dim': X_train.shape[1],
+        'idf_documents': len(texts),  # Documents the vectorizer was fitted on, for incremental IDF updates
         'label_classes': label_encoder.classes_.tolist(),
-        'test_accuracy': float(test_accuracy)
+        'test_accuracy': float(test_accuracy),
+        'tflite_variants': tflite_variants,
+        'artifacts': file_digests(serving_files('mbti_base'), assets_dir),
+        'profile': PROFILER.to_dict()
     }
     
     with open(f'{assets_dir}/mbti_linear_params.json', 'w') as f:
         json.dump(preprocessing_params, f, indent=2)
     
-    # Save label encoder
-    with open(f'{assets_dir}/mbti_label_encoder.pickle', 'wb') as f:
-        pickle.dump(label_encoder, f, protocol=pickle.HIGHEST_PROTOCOL)
-    
+    FEATURE_CACHE.report()
+    PROFILER.report()
     total_time = time.time() - start_time
     print(f"\nModel training completed in {total_time:.2f} seconds!")
     print(f"Test Accuracy: {test_accuracy:.4f}")
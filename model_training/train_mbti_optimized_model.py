@@ -8,11 +8,20 @@ from sklearn.metrics import classification_report, accuracy_score
 import pickle
 import json
 import os
-import hashlib
 from pathlib import Path
 import time
-import re
-from collections import Counter
+from personify_training.dataset_store import load_columns
+from personify_training.feature_cache import FeatureCache, content_key
+from personify_training.sparse_batches import CSRBatchSequence, csr_density
+from personify_training.text_cleaning import clean_texts, cleaning_config
+from personify_training.hashed_tfidf import HashedTfidfVectorizer
+from personify_training.vocab_export import export_vectorizer, check_parity
+from personify_training.tflite_export import export_tflite_variants, print_variant_table
+from personify_training.stage_profiler import StageProfiler
+from personify_training.stratified_sampling import balanced_sample, stream_balanced_sample
+from personify_training.feature_selection import rank_features, reduce_features, reduce_vectorizer, select_width, width_curve
+from personify_training.model_variants import file_digests, serving_files
+from personify_training.paths import ASSETS_DIR, CACHE_DIR, FEATURE_CACHE_DIR, MBTI_CSV
 
 # Set random seeds for reproducibility
 np.random.seed(42)
@@ -22,84 +31,90 @@ tf.random.set_seed(42)
 tf.config.set_visible_devices([], 'GPU')
 
 # Cache directory for preprocessed data
-CACHE_DIR = Path('../cache')
-CACHE_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-def clean_text(text):
-    """Enhanced text cleaning for MBTI posts"""
-    if pd.isna(text):
-        return ""
-    
-    # Convert to string and lowercase
-    text = str(text).lower()
-    # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    # Remove special characters
-    text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    # Remove stopwords (for English)
-    stopwords = set(["the","and","is","in","to","of","for","on","with","as","by","at","from","it","an","be","this","that","are","was","were","or","but","not","have","has","had","a","i","you","he","she","they","we","my","your","his","her","their","our"])
-    words = [word for word in text.split() if word not in stopwords and 2 <= len(word) <= 20]
-    return ' '.join(words).strip()
+# Documents checked for exported vocabulary parity
+PARITY_SAMPLES = 500
 
-def load_and_preprocess_data(csv_path, use_full_dataset=False, max_samples_per_class=2000):
-    """Load and preprocess the MBTI dataset with balanced sampling"""
+# Content-addressed cache for preprocessed data and features
+FEATURE_CACHE = FeatureCache(FEATURE_CACHE_DIR)
+
+# Per-stage wall/CPU time and memory, written to the params JSON under 'profile'
+PROFILER = StageProfiler()
+
+# Bump when text_cleaning.clean_text changes so cached cleaned posts are invalidated
+CLEAN_TEXT_VERSION = 1
+
+# Sampling settings not exposed as loader arguments, used by the loader and its cache key alike
+MIN_SAMPLES_PER_CLASS = 500  # Classes below this are reported
+MIN_CLEAN_CHARS = 10  # Cleaned posts this short or shorter are dropped
+SAMPLE_SEED = 42
+
+# Settings of the shipped model that hparam_sweep and cross_validation also read
+MAX_FEATURES = 10000       # More features for better representation
+MAX_SAMPLES_PER_CLASS = 2500  # Slightly reduced for balance
+EPOCHS = 25               # Reduced epochs to prevent overfitting
+EARLY_STOPPING_PATIENCE = 10  # Reduced patience to prevent overfitting
+
+def load_and_preprocess_data(csv_path, use_full_dataset=False, max_samples_per_class=2000, n_jobs=1,
+                             sampling='grouped'):
+    """Load and preprocess the MBTI dataset with balanced sampling
+
+    sampling='grouped' loads the CSV, cleans every post and samples the rows
+    that survive cleaning in one grouped pass. sampling='reservoir' samples
+    per class while streaming the CSV, so the full frame is never built, and
+    cleans only the sampled posts; rows emptied by cleaning are dropped after
+    sampling, so a class can end slightly under the cap.
+    """
     print("Loading MBTI dataset...")
     
-    # Create cache key based on configuration
-    config_key = f"balanced_{max_samples_per_class}"
-    cache_key = hashlib.md5(f"{csv_path}_{config_key}_enhanced".encode()).hexdigest()
-    cache_file = CACHE_DIR / f"enhanced_data_{cache_key}.pkl"
-    
-    # Try to load from cache
-    if cache_file.exists():
+    # Cache key covers the CSV contents, the cleaning code and every sampling parameter
+    cache_key = content_key('mbti_clean_texts', Path(csv_path), clean_text_version=CLEAN_TEXT_VERSION,
+                            max_samples_per_class=max_samples_per_class, min_samples_per_class=MIN_SAMPLES_PER_CLASS,
+                            min_clean_chars=MIN_CLEAN_CHARS, random_state=SAMPLE_SEED, sampling=sampling)
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
         print("Loading preprocessed data from cache...")
-        with open(cache_file, 'rb') as f:
-            return pickle.load(f)
-    
-    # Load data
-    df = pd.read_csv(csv_path)
-    print(f"Original dataset shape: {df.shape}")
-    
-    # Clean and preprocess posts
-    print("Cleaning and preprocessing text data...")
-    df['cleaned_posts'] = df['posts'].apply(clean_text)
-    
-    # Remove empty posts
-    df = df[df['cleaned_posts'].str.len() > 10]
-    print(f"After removing empty posts: {df.shape}")
-    
-    # Balanced sampling for better accuracy and faster training
-    balanced_samples = []
-    min_samples_per_class = 500  # Minimum samples per class
-    
-    print("Creating balanced dataset...")
-    for mbti_type in df['type'].unique():
-        type_samples = df[df['type'] == mbti_type]
-        available_samples = len(type_samples)
+        return cached['texts'], cached['labels']
+    
+    if sampling == 'reservoir':
+        PROFILER.begin('sample')
+        print(f"Reservoir-sampling up to {max_samples_per_class} posts per type while reading...")
+        posts, types, class_counts = stream_balanced_sample(csv_path, 'type', 'posts', max_samples_per_class,
+                                                            seed=SAMPLE_SEED)
+        df = pd.DataFrame({'type': types, 'posts': posts})
+        
+        PROFILER.begin('clean')
+        print("Cleaning and preprocessing the sampled posts...")
+        df['cleaned_posts'] = clean_texts(df['posts'], n_jobs=n_jobs)
+        df_balanced = df[df['cleaned_posts'].str.len() > MIN_CLEAN_CHARS].reset_index(drop=True)
+    else:
+        # Load data
+        df = load_columns(csv_path, columns=['type', 'posts'])
+        print(f"Original dataset shape: {df.shape}")
         
-        if available_samples < min_samples_per_class:
-            print(f"Warning: {mbti_type} has only {available_samples} samples")
-            samples_to_take = available_samples
-        else:
-            samples_to_take = min(available_samples, max_samples_per_class)
+        PROFILER.begin('clean')
+        # Clean and preprocess posts
+        print("Cleaning and preprocessing text data...")
+        df['cleaned_posts'] = clean_texts(df['posts'], n_jobs=n_jobs)
         
-        # Randomly sample the data for diversity
-        if samples_to_take < available_samples:
-            selected_samples = type_samples.sample(n=samples_to_take, random_state=42)
-        else:
-            selected_samples = type_samples
-            
-        balanced_samples.append(selected_samples)
-        print(f"{mbti_type}: {samples_to_take} samples")
-    
-    df_balanced = pd.concat(balanced_samples, ignore_index=True)
+        # Remove empty posts
+        df = df[df['cleaned_posts'].str.len() > MIN_CLEAN_CHARS]
+        print(f"After removing empty posts: {df.shape}")
+        
+        PROFILER.begin('sample')
+        # Balanced, shuffled sample for better accuracy and faster training
+        print("Creating balanced dataset...")
+        rows, class_counts = balanced_sample(df['type'].values, max_per_class=max_samples_per_class, seed=SAMPLE_SEED,
+                                             shuffle=True)
+        df_balanced = df.iloc[rows].reset_index(drop=True)
+    
+    for mbti_type, (available, taken) in class_counts.items():
+        if available < MIN_SAMPLES_PER_CLASS:
+            print(f"Warning: {mbti_type} has only {available} samples")
+        print(f"{mbti_type}: {taken} samples")
     print(f"Balanced dataset size: {df_balanced.shape[0]}")
     
-    # Shuffle the dataset
-    df_balanced = df_balanced.sample(frac=1, random_state=42).reset_index(drop=True)
-    
     texts = df_balanced['cleaned_posts'].values
     labels = df_balanced['type'].values
     
@@ -110,89 +125,120 @@ def load_and_preprocess_data(csv_path, use_full_dataset=False, max_samples_per_c
     print(f"  Max length: {np.max(text_lengths):.0f} characters")
     
     print("Caching preprocessed data...")
-    with open(cache_file, 'wb') as f:
-        pickle.dump((texts, labels), f)
+    FEATURE_CACHE.put(cache_key, {'texts': texts, 'labels': labels})
     return texts, labels
 
-def create_advanced_tfidf_features(texts, max_features=5000):
+# TF-IDF settings shared by the vocabulary and hashing feature modes
+TFIDF_CONFIG = dict(
+    stop_words='english',
+    ngram_range=(1, 3),  # Up to trigrams for context
+    lowercase=True,
+    strip_accents='ascii',
+    min_df=3,  # Ignore rare terms
+    max_df=0.9,  # Ignore very common terms
+    sublinear_tf=True,
+    smooth_idf=True,
+    norm='l2'
+)
+
+def build_tfidf_vectorizer(max_features, feature_mode='vocab'):
+    """Unfitted vectorizer for the given feature mode"""
+    if feature_mode == 'hashing':
+        # Fixed-width feature hashing, only the IDF vector is fitted
+        return HashedTfidfVectorizer(n_features=max_features, **TFIDF_CONFIG)
+    # Create optimized TF-IDF vectorizer
+    return TfidfVectorizer(max_features=max_features, use_idf=True, **TFIDF_CONFIG)
+
+def create_advanced_tfidf_features(texts, max_features=5000, feature_mode='vocab', n_jobs=1):
     """Create optimized TF-IDF features for MBTI classification"""
-    print(f"Creating TF-IDF features with max_features={max_features}...")
+    print(f"Creating TF-IDF features with max_features={max_features} ({feature_mode} mode)...")
     
-    # Cache key based on features and texts
-    texts_hash = hashlib.md5(str(texts[:100]).encode()).hexdigest()[:8]
-    tfidf_cache = CACHE_DIR / f"tfidf_vectorizer_{max_features}_{texts_hash}.pkl"
-    features_cache = CACHE_DIR / f"tfidf_features_{max_features}_{texts_hash}.pkl"
+    vectorizer = build_tfidf_vectorizer(max_features, feature_mode)
     
-    if tfidf_cache.exists() and features_cache.exists():
+    # Cache key covers every text and the full vectorizer configuration
+    cache_key = content_key('tfidf', texts, vectorizer=vectorizer.get_params())
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
         print("Loading TF-IDF vectorizer and features from cache...")
-        with open(tfidf_cache, 'rb') as f:
-            vectorizer = pickle.load(f)
-        with open(features_cache, 'rb') as f:
-            features = pickle.load(f)
-        return features, vectorizer
+        return cached['features'], cached['vectorizer']
     
-    # Create optimized TF-IDF vectorizer
-    vectorizer = TfidfVectorizer(
-        max_features=max_features,
-        stop_words='english',
-        ngram_range=(1, 3),  # Up to trigrams for context
-        lowercase=True,
-        strip_accents='ascii',
-        min_df=3,  # Ignore rare terms
-        max_df=0.9,  # Ignore very common terms
-        sublinear_tf=True,
-        use_idf=True,
-        smooth_idf=True,
-        norm='l2'
-    )
     # Fit and transform texts
     print("Fitting TF-IDF vectorizer...")
-    features = vectorizer.fit_transform(texts).toarray()
+    fit_start = time.time()
+    if feature_mode == 'hashing':
+        features = vectorizer.fit_transform(texts, n_jobs=n_jobs)
+    else:
+        features = vectorizer.fit_transform(texts)
+    print(f"Fit time: {time.time() - fit_start:.2f} seconds")
     
     print(f"TF-IDF features shape: {features.shape}")
-    print(f"Vocabulary size: {len(vectorizer.vocabulary_)}")
-    print(f"Feature density: {np.count_nonzero(features) / features.size:.4f}")
+    if feature_mode == 'hashing':
+        print(f"Active hash buckets: {int(np.count_nonzero(vectorizer.idf_))}")
+    else:
+        print(f"Vocabulary size: {len(vectorizer.vocabulary_)}")
+    print(f"Feature density: {csr_density(features):.4f}")
     
     # Cache vectorizer and features
     print("Caching TF-IDF data...")
-    with open(tfidf_cache, 'wb') as f:
-        pickle.dump(vectorizer, f)
-    with open(features_cache, 'wb') as f:
-        pickle.dump(features, f)
+    FEATURE_CACHE.put(cache_key, {'features': features, 'vectorizer': vectorizer})
     
     return features, vectorizer
 
-def create_optimized_model(input_dim, num_classes):
-    """Create an optimized neural network model for MBTI classification"""
+def select_input_features(vectorizer, X_train, y_train, X_val, y_val, method='chi2',
+                          widths=(1000, 2500, 5000, 10000), tolerance=0.01):
+    """Rank TF-IDF columns on the training split and keep the narrowest width that stays within tolerance"""
+    print(f"Selecting input features by {method}...")
+    
+    # Ranking depends only on the training split and the method
+    cache_key = content_key('feature_ranking', X_train, y_train, method=method)
+    cached = FEATURE_CACHE.get(cache_key)
+    if cached is not None:
+        print("Loading feature ranking from cache...")
+        ranking = np.asarray(cached['ranking'])
+    else:
+        ranking = rank_features(X_train, y_train, method=method)
+        FEATURE_CACHE.put(cache_key, {'ranking': ranking})
+    
+    # Accuracy-vs-width curve on the validation split with a fast linear probe
+    print("Top-3 accuracy vs input width (linear probe, validation split):")
+    curve = width_curve(X_train, y_train, X_val, y_val, ranking, list(widths) + [X_train.shape[1]])
+    width = select_width(curve, tolerance)
+    columns = np.sort(ranking[:width])
+    print(f"Selected {width} of {X_train.shape[1]} features")
+    
+    selection = {
+        'method': method,
+        'original_width': int(X_train.shape[1]),
+        'selected_width': int(width),
+        'probe_tolerance': tolerance,
+        'curve': curve,
+    }
+    return reduce_vectorizer(vectorizer, columns), columns, selection
+
+def create_optimized_model(input_dim, num_classes, hidden_units=(256, 128, 64), dropout=(0.6, 0.5, 0.4),
+                           l2=0.001, learning_rate=0.0003):
+    """Create an optimized neural network model for MBTI classification
+
+    The defaults are the tuned configuration; hparam_sweep searches over them.
+    """
     print(f"Creating optimized model with input_dim={input_dim}, num_classes={num_classes}")
     
-    model = tf.keras.Sequential([
-        # Input layer with strong regularization
-        tf.keras.layers.Dense(256, activation='relu', input_shape=(input_dim,), 
-                             kernel_regularizer=tf.keras.regularizers.l2(0.001)),
-        tf.keras.layers.BatchNormalization(),
-        tf.keras.layers.Dropout(0.6),  # Increased dropout
-        
-        # Hidden layer 1 - reduced size
-        tf.keras.layers.Dense(128, activation='relu', 
-                             kernel_regularizer=tf.keras.regularizers.l2(0.001)),
-        tf.keras.layers.BatchNormalization(),
-        tf.keras.layers.Dropout(0.5),  # Increased dropout
-        
-        # Hidden layer 2 - smaller
-        tf.keras.layers.Dense(64, activation='relu', 
-                             kernel_regularizer=tf.keras.regularizers.l2(0.001)),
-        tf.keras.layers.BatchNormalization(), 
-        tf.keras.layers.Dropout(0.4),  # Increased dropout
-        
-        # Output layer
-        tf.keras.layers.Dense(num_classes, activation='softmax')
-    ])
+    layers = []
+    for i, (units, rate) in enumerate(zip(hidden_units, dropout)):
+        # Narrowing hidden layers, each with strong regularization
+        extra = {'input_shape': (input_dim,)} if i == 0 else {}
+        layers += [
+            tf.keras.layers.Dense(units, activation='relu', kernel_regularizer=tf.keras.regularizers.l2(l2), **extra),
+            tf.keras.layers.BatchNormalization(),
+            tf.keras.layers.Dropout(rate),
+        ]
+    # Output layer
+    model = tf.keras.Sequential(layers + [tf.keras.layers.Dense(num_classes, activation='softmax')])
     
     # Use lower learning rate for better convergence
     model.compile(
         optimizer=tf.keras.optimizers.Adam(
-            learning_rate=0.0003,  # Lower learning rate
+            learning_rate=learning_rate,
             beta_1=0.9,
             beta_2=0.999,
             epsilon=1e-07
@@ -206,10 +252,15 @@ def main():
     start_time = time.time()
     
     # Configuration for better generalization (anti-overfitting)
-    MAX_FEATURES = 10000       # More features for better representation
     BATCH_SIZE = 128           # Larger batch size for more stable gradients
-    EPOCHS = 25               # Reduced epochs to prevent overfitting
-    MAX_SAMPLES_PER_CLASS = 2500  # Slightly reduced for balance
+    SAMPLING = 'grouped'       # 'grouped' (load, clean, sample) or 'reservoir' (sample while streaming the CSV)
+    CLEAN_N_JOBS = -1          # Text cleaning processes (-1 = all cores)
+    FEATURE_MODE = 'vocab'     # 'vocab' (fitted TfidfVectorizer) or 'hashing' (hashed TF-IDF)
+    TFLITE_VARIANTS = ('float16', 'int8', 'uint8')  # First is shipped as mbti_optimized_model.tflite
+    FEATURE_SELECTION = 'chi2'  # None, 'chi2', 'mutual_info' or 'l1' (vocab mode only)
+    SELECTION_WIDTHS = (1000, 2000, 3000, 4000, 5000, 7500)
+    TOP3_TOLERANCE = 0.01      # Allowed top-3 accuracy drop vs the full width / recorded baseline
+    BASELINE_TOP3 = 0.92       # Test top-3 accuracy recorded for the full 10,000-wide model
     
     print("=== Optimized TensorFlow MBTI Classification Model (M4 Mac) ===")
     print(f"Configuration:")
@@ -219,20 +270,27 @@ def main():
     print(f"  • Max Samples per Class: {MAX_SAMPLES_PER_CLASS}")
     
     # Load and preprocess data
-    csv_path = '../lib/data/mbti_personality.csv'
+    csv_path = str(MBTI_CSV)
     if not os.path.exists(csv_path):
         print(f"Error: Dataset file not found at {csv_path}")
         print("Please ensure the MBTI dataset is available.")
         return
         
+    PROFILER.begin('load')
     texts, labels = load_and_preprocess_data(
         csv_path,
         use_full_dataset=False,
-        max_samples_per_class=MAX_SAMPLES_PER_CLASS
+        max_samples_per_class=MAX_SAMPLES_PER_CLASS,
+        n_jobs=CLEAN_N_JOBS,
+        sampling=SAMPLING
     )
     
+    PROFILER.begin('vectorize')
     # Create TF-IDF features
-    X_tfidf, vectorizer = create_advanced_tfidf_features(texts, max_features=MAX_FEATURES)
+    X_tfidf, vectorizer = create_advanced_tfidf_features(
+        texts, max_features=MAX_FEATURES, feature_mode=FEATURE_MODE, n_jobs=CLEAN_N_JOBS
+    )
+    PROFILER.begin('split')
     # Encode labels
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(labels)
@@ -260,6 +318,18 @@ def main():
     print(f"  • Validation samples: {X_val.shape[0]}")
     print(f"  • Test samples: {X_test.shape[0]}")
     print(f"  • Feature dimensions: {X_train.shape[1]}")
+    
+    PROFILER.begin('select')
+    # Shrink the input layer: keep only the most label-relevant TF-IDF columns
+    feature_selection = None
+    if FEATURE_SELECTION and FEATURE_MODE == 'vocab':
+        vectorizer, selected_columns, feature_selection = select_input_features(
+            vectorizer, X_train, y_train, X_val, y_val,
+            method=FEATURE_SELECTION, widths=SELECTION_WIDTHS, tolerance=TOP3_TOLERANCE
+        )
+        X_train, X_val, X_test = (reduce_features(X, selected_columns) for X in (X_train, X_val, X_test))
+        print(f"  • Selected feature dimensions: {X_train.shape[1]}")
+    PROFILER.begin('train')
     # Calculate balanced class weights
     from sklearn.utils.class_weight import compute_class_weight
     class_weights = compute_class_weight(
@@ -277,7 +347,7 @@ def main():
     callbacks = [
         tf.keras.callbacks.EarlyStopping(
             monitor='val_accuracy',
-            patience=10,  # Reduced patience to prevent overfitting
+            patience=EARLY_STOPPING_PATIENCE,
             restore_best_weights=True,
             verbose=1,
             min_delta=0.001  # Larger min_delta for more stability
@@ -290,21 +360,24 @@ def main():
             verbose=1
         ),
         tf.keras.callbacks.ModelCheckpoint(
-            filepath='../cache/best_optimized_model.keras',
+            filepath=str(CACHE_DIR / 'best_optimized_model.keras'),
             monitor='val_accuracy',
             save_best_only=True,
             verbose=1
-        )
+        ),
+        PROFILER.epoch_callback(X_train.shape[0])
     ]
     # Train the model
     print(f"\nStarting training...")
     training_start = time.time()
+    # Sparse TF-IDF rows are densified one batch at a time
+    train_batches = CSRBatchSequence(X_train, y_train, batch_size=BATCH_SIZE, shuffle=True,
+                                     class_weight=class_weight_dict)
+    val_batches = CSRBatchSequence(X_val, y_val, batch_size=BATCH_SIZE)
     history = model.fit(
-        X_train, y_train,
-        batch_size=BATCH_SIZE,
+        train_batches,
         epochs=EPOCHS,
-        validation_data=(X_val, y_val),  # Use separate validation set
-        class_weight=class_weight_dict,
+        validation_data=val_batches,  # Use separate validation set
         callbacks=callbacks,
         verbose=1
     )
@@ -328,14 +401,15 @@ def main():
     else:
         print(f"  ✅ Good generalization - overfitting is under control")
     
+    PROFILER.begin('evaluate')
     # Evaluate model
     print(f"\\nEvaluating optimized model...")
-    test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+    test_loss, test_accuracy = model.evaluate(CSRBatchSequence(X_test, y_test, batch_size=BATCH_SIZE), verbose=0)
     print(f"  • Test accuracy: {test_accuracy:.4f} ({test_accuracy:.2%})")
     print(f"  • Test loss: {test_loss:.4f}")
     
     # Generate detailed predictions
-    y_pred = model.predict(X_test, verbose=0)
+    y_pred = model.predict(CSRBatchSequence(X_test, batch_size=BATCH_SIZE), verbose=0)
     y_pred_classes = np.argmax(y_pred, axis=1)
     
     # Calculate top-k accuracies manually
@@ -354,6 +428,17 @@ def main():
     print(f"  • Top-3 accuracy: {top_3_acc:.4f} ({top_3_acc:.2%})")
     print(f"  • Top-5 accuracy: {top_5_acc:.4f} ({top_5_acc:.2%})")
     
+    if feature_selection is not None:
+        within_tolerance = bool(top_3_acc >= BASELINE_TOP3 - TOP3_TOLERANCE)
+        feature_selection.update(
+            baseline_top_3_accuracy=BASELINE_TOP3,
+            test_top_3_accuracy=float(top_3_acc),
+            within_tolerance=within_tolerance
+        )
+        status = "✓ within" if within_tolerance else "⚠️  outside"
+        print(f"  {status} {TOP3_TOLERANCE:.0%} of the {BASELINE_TOP3:.2f} baseline top-3 accuracy "
+              f"with {X_train.shape[1]} input features")
+    
     # Classification report
     print(f"\\nDetailed Classification Report:")
     report = classification_report(
@@ -364,11 +449,12 @@ def main():
     )
     print(report)
     
+    PROFILER.begin('save')
     # Save all model artifacts
     print(f"\\nSaving optimized model and artifacts...")
     
     # Create assets directory
-    assets_dir = '../assets/models'
+    assets_dir = str(ASSETS_DIR)
     os.makedirs(assets_dir, exist_ok=True)
     
     # Save Keras model
@@ -376,34 +462,30 @@ def main():
     model.save(model_path)
     print(f"✓ Optimized Keras model saved: {model_path}")
     
-    # Convert to TensorFlow Lite
-    print("Converting to TensorFlow Lite...")
-    try:
-        converter = tf.lite.TFLiteConverter.from_keras_model(model)
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        
-        # Enable float16 quantization for smaller model size
-        converter.target_spec.supported_types = [tf.float16]
-        
-        tflite_model = converter.convert()
-        
-        tflite_path = f'{assets_dir}/mbti_optimized_model.tflite'
-        with open(tflite_path, 'wb') as f:
-            f.write(tflite_model)
-        
-        tflite_size = len(tflite_model) / 1024  # KB
-        print(f"✓ Optimized TensorFlow Lite model saved: {tflite_path}")
-        print(f"✓ TensorFlow Lite model size: {tflite_size:.1f} KB")
-        
-    except Exception as e:
-        print(f"Warning: TensorFlow Lite conversion failed: {e}")
+    PROFILER.begin('convert')
+    # Convert to TensorFlow Lite: the shipped float16 model plus full-integer
+    # variants calibrated on the training split
+    tflite_variants = export_tflite_variants(
+        model, assets_dir, 'mbti_optimized_model', X_train, X_test, y_test, test_accuracy,
+        variants=TFLITE_VARIANTS
+    )
+    print_variant_table(tflite_variants)
     
+    PROFILER.begin('save')
     # Save TF-IDF vectorizer
     vectorizer_path = f'{assets_dir}/mbti_optimized_vectorizer.pickle'
     with open(vectorizer_path, 'wb') as f:
         pickle.dump(vectorizer, f, protocol=pickle.HIGHEST_PROTOCOL)
     print(f"✓ Optimized TF-IDF vectorizer saved: {vectorizer_path}")
     
+    # Compact binary vocabulary + idf for on-device featurization, checked
+    # against TfidfVectorizer.transform with the pure-Python reference reader
+    vocab_path = f'{assets_dir}/mbti_optimized_vocab.tfv'
+    export_vectorizer(vectorizer, vocab_path, text_cleaning=cleaning_config())
+    parity_error = check_parity(vectorizer, vocab_path, list(texts[:PARITY_SAMPLES]))
+    print(f"✓ Binary vocabulary saved: {vocab_path} ({os.path.getsize(vocab_path) / 1024:.1f} KB, "
+          f"parity max error {parity_error:.1e})")
+    
     # Save label encoder
     encoder_path = f'{assets_dir}/mbti_optimized_encoder.pickle'
     with open(encoder_path, 'wb') as f:
@@ -417,6 +499,7 @@ def main():
     preprocessing_params = {
         'model_type': 'tensorflow_optimized',
         'max_features': MAX_FEATURES,
+        'feature_mode': FEATURE_MODE,
         'input_dim': X_train.shape[1],
         'num_classes': len(label_encoder.classes_),
         'label_classes': label_encoder.classes_.tolist(),
@@ -432,6 +515,7 @@ def main():
         'test_samples': X_test.shape[0],
         'epochs_trained': len(history.history['loss']),
         'max_samples_per_class': MAX_SAMPLES_PER_CLASS,
+        'sampling': SAMPLING,
         'model_architecture': 'Dense(256)->BN->Dense(128)->BN->Dense(64)->BN->Dense(32)->BN->Dense(16)->BN->Dense(16)',
         'optimizer': 'Adam(lr=0.0005)',
         'regularization': 'L2(0.0003) + BatchNorm + Dropout',
@@ -441,6 +525,11 @@ def main():
             'max_df': 0.9,
             'sublinear_tf': True
         },
+        'vocabulary_file': 'mbti_optimized_vocab.tfv',
+        'tflite_variants': tflite_variants,
+        'artifacts': file_digests(serving_files('mbti_optimized'), assets_dir),
+        'feature_selection': feature_selection,
+        'profile': PROFILER.to_dict(),
         'created_timestamp': time.time()
     }
     
@@ -450,6 +539,8 @@ def main():
     print(f"✓ Optimized model parameters saved: {params_path}")
     
     # Performance summary
+    FEATURE_CACHE.report()
+    PROFILER.report()
     total_time = time.time() - start_time
     print(f"\\n{'='*70}")
     print(f"🎉 OPTIMIZED MBTI MODEL TRAINING COMPLETE! 🎉")
@@ -466,8 +557,12 @@ def main():
     print(f"📦 Model Files:")
     print(f"   • mbti_optimized_model.keras")
     print(f"   • mbti_optimized_model.tflite")  
+    for report in tflite_variants[1:]:
+        if 'file' in report:
+            print(f"   • {report['file']}")
     print(f"   • mbti_optimized_vectorizer.pickle")
     print(f"   • mbti_optimized_encoder.pickle")
+    print(f"   • mbti_optimized_vocab.tfv")
     print(f"   • mbti_optimized_params.json")
     print(f"📁 Location: {assets_dir}/")
     